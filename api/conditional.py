@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# api/conditional.py
+"""
+GET condicional (ETag/Last-Modified) para viewsets de models auditados
+
+O validador vem das próprias linhas da resposta: na lista, a página já
+fatiada pela paginação (``page_size + 1`` linhas na faixa do índice), no
+detalhe, a linha do ``get_object()``. Entram o pk e o DataAlteracao de cada
+linha e dos relacionamentos em ``select_related`` (ex.: ``ClienteNome`` em
+OrderSerializer), além do estado da paginação. Nenhuma agregação percorre
+o queryset inteiro; quando o cliente envia o mesmo ETag a resposta é 304
+sem serializar as linhas.
+
+Os UPDATEs em massa também carimbam DataAlteracao (AuditQuerySet.update),
+então alterações por ``update()`` mudam o validador. A lista não envia
+Last-Modified: exclusões não alteram a data, só o conjunto de pks (que entra
+apenas no ETag).
+"""
+import hashlib
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from core.database.tenants import TenantManager
+
+def _select_paths(select_related, prefix=''):
+    """{'Cliente': {'Idioma': {}}} -> ['Cliente', 'Cliente__Idioma']"""
+    if not isinstance(select_related, dict):
+        return []
+    paths = []
+    for name, nested in select_related.items():
+        paths.append(prefix + name)
+        paths.extend(_select_paths(nested, f'{prefix}{name}__'))
+    return paths
+
+class ConditionalGetMixin:
+    """list/retrieve com ETag (e Last-Modified no detalhe); 304 sem serializar"""
+
+    modified_field = 'DataAlteracao'
+    pagination_state = ('count', 'has_next', 'has_previous')
+
+    def _has_modified_field(self, model):
+        try:
+            model._meta.get_field(self.modified_field)
+        except FieldDoesNotExist:
+            return False
+        return True
+
+    @staticmethod
+    def _related_model(model, path):
+        for part in path.split('__'):
+            model = model._meta.get_field(part).related_model
+        return model
+
+    def get_modified_paths(self, queryset):
+        """Caminhos do DataAlteracao da linha e dos relacionamentos em select_related"""
+        model = queryset.model
+        paths = [self.modified_field] if self._has_modified_field(model) else []
+        paths.extend(
+            f'{path}__{self.modified_field}' for path in _select_paths(queryset.query.select_related)
+            if self._has_modified_field(self._related_model(model, path))
+        )
+        return paths
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields, defer = queryset.query.deferred_loading
+        if self.request.method not in SAFE_METHODS or defer:
+            return queryset
+        # only() dos campos pedidos: o validador precisa das datas já carregadas
+        return queryset.only(*fields, *self.get_modified_paths(queryset))
+
+    @staticmethod
+    def _stamp(row, path):
+        for part in path.split('__'):
+            row = getattr(row, part, None)
+            if row is None:
+                return None
+        return row
+
+    def get_validator(self, rows, paths):
+        """(pks/datas das linhas, última alteração)"""
+        tokens, stamps = [], []
+        for row in rows:
+            values = [self._stamp(row, path) for path in paths]
+            tokens.append(':'.join([str(row.pk)] + [value.isoformat() if value else '' for value in values]))
+            stamps.extend(value for value in values if value is not None)
+        return ','.join(tokens), max(stamps) if stamps else None
+
+    def get_etag(self, request, validator):
+        """ETag fraco da representação: URL completa, formato, loja, usuário e validador"""
+        media_type = getattr(request, 'accepted_media_type', '')
+        parts = [
+            request.get_full_path(), media_type, TenantManager.get_current() or '',
+            getattr(request.user, 'pk', '') or '', validator,
+        ]
+        digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+        return f'W/"{digest}"'
+
+    def _conditional(self, request, etag, respond, modified=None):
+        timestamp = int(modified.timestamp()) if modified else None
+        response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = respond()
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        # Sempre revalida: o ETag muda assim que qualquer linha da resposta muda
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+
+        validator, _ = self.get_validator(rows, self.get_modified_paths(queryset))
+        if page is not None:
+            state = [getattr(self.paginator, name, None) for name in self.pagination_state]
+            validator = f'{validator}|{state}'
+
+        def respond():
+            data = self.get_serializer(rows, many=True).data
+            return self.get_paginated_response(data) if page is not None else Response(data)
+        return self._conditional(request, self.get_etag(request, validator), respond)
+
+    def retrieve(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        instance = self.get_object()
+        validator, modified = self.get_validator([instance], self.get_modified_paths(queryset))
+        respond = lambda: Response(self.get_serializer(instance).data)
+        return self._conditional(request, self.get_etag(request, validator), respond, modified=modified)
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# api/dynamic.py
+"""
+Campos dinâmicos nos serializers: ``?fields=`` e ``?expand=``
+
+- ``?fields=PedidoId,Numero,Cliente.Nome`` limita os campos (o ponto
+  seleciona campos do relacionamento expandido);
+- ``?expand=Cliente`` troca o id do relacionamento pelo serializer
+  declarado em ``Meta.expandable_fields``.
+
+A view (``DynamicFieldsViewMixin``) aplica no queryset o ``only()`` dos
+campos escolhidos e o ``select_related``/``prefetch_related`` dos
+relacionamentos usados, evitando uma consulta por linha.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+def parse_fields(value):
+    """'a,b.c,b.d' -> {'a': [], 'b': ['c', 'd']}; None se não informado"""
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return value
+    if not isinstance(value, str):
+        value = ','.join(value)
+    tree = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, _, rest = item.partition('.')
+        tree.setdefault(name, [])
+        if rest:
+            tree[name].append(rest)
+    return tree
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer com seleção de campos e expansão de relacionamentos
+
+    Meta opcionais:
+
+    - ``expandable_fields``: {campo: (serializer ou caminho, kwargs)}
+    - ``field_dependencies``: {campo calculado: [campos do model]}, para
+      que campos sem origem direta no model não desativem o ``only()``
+    """
+
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if fields is None and expand is None and request is not None:
+            fields = request.query_params.get(self.fields_query_param)
+            expand = request.query_params.get(self.expand_query_param)
+        fields, expand = parse_fields(fields), parse_fields(expand) or {}
+
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name, nested_expand in expand.items():
+            if name not in expandable or (fields is not None and name not in fields):
+                continue
+            serializer_class, options = expandable[name]
+            if isinstance(serializer_class, str):
+                serializer_class = import_string(serializer_class)
+            nested_fields = fields.get(name) if fields is not None else None
+            self.fields[name] = serializer_class(
+                fields=nested_fields or None, expand=nested_expand, context=self.context,
+                **{'read_only': True, **options}
+            )
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def get_query_plan(self, prefix=''):
+        """(only ou None, select_related, prefetch_related) dos campos selecionados
+
+        ``only`` é None quando algum campo não tem origem conhecida no model.
+        """
+        model = self.Meta.model
+        dependencies = getattr(self.Meta, 'field_dependencies', {})
+        only, select, prefetch = {prefix + model._meta.pk.name}, set(), []
+
+        for name, field in self.fields.items():
+            if name in dependencies:
+                only.update(prefix + dependency for dependency in dependencies[name])
+                continue
+
+            if isinstance(field, DynamicFieldsModelSerializer):
+                # Relacionamento expandido (FK/1:1): mesmo SELECT
+                select.add(prefix + field.source)
+                nested_only, nested_select, nested_prefetch = field.get_query_plan(f'{prefix}{field.source}__')
+                if nested_only is None:
+                    only = None
+                elif only is not None:
+                    only |= nested_only
+                select |= nested_select
+                prefetch.extend(nested_prefetch)
+                continue
+
+            if isinstance(field, serializers.ListSerializer) or field.source == '*':
+                if isinstance(field, serializers.ListSerializer):
+                    prefetch.append(prefix + field.source)
+                else:
+                    only = None
+                continue
+
+            path, current, parts = [], model, field.source.split('.')
+            for index, part in enumerate(parts):
+                try:
+                    model_field = current._meta.get_field(part)
+                except FieldDoesNotExist:
+                    # Propriedade ou método: não dá para restringir as colunas
+                    only, path = None, None
+                    break
+                path.append(part)
+                if model_field.many_to_many or model_field.one_to_many:
+                    prefetch.append(prefix + '__'.join(path))
+                    path = None
+                    break
+                if model_field.is_relation and index < len(parts) - 1:
+                    select.add(prefix + '__'.join(path))
+                    current = model_field.related_model
+            if path and only is not None:
+                only.add(prefix + '__'.join(path))
+
+        return only, select, prefetch
+
+    def optimize_queryset(self, queryset, extra=()):
+        """Aplica o plano de consulta dos campos selecionados ao queryset"""
+        only, select, prefetch = self.get_query_plan()
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if only is None:
+            return queryset.select_related(*select) if select else queryset
+        # select_related da view pode conflitar com as colunas adiadas: o plano é completo
+        queryset = queryset.select_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        return queryset.only(*only, *extra)
+
+class DynamicFieldsViewMixin:
+    """Leituras com o queryset reduzido aos campos pedidos (``?fields=``/``?expand=``)"""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        serializer = self.get_serializer()
+        if not isinstance(serializer, DynamicFieldsModelSerializer):
+            return queryset
+        # O campo da paginação por chave precisa estar carregado
+        extra = [self.keyset_ordering.lstrip('-')] if getattr(self, 'keyset_ordering', None) else []
+        return serializer.optimize_queryset(queryset, extra=extra)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# api/renderers.py
+"""
+Renderer/parser JSON com orjson (opcional)
+
+O orjson serializa UUID, datetime, date e time nativamente em C; Decimal,
+textos traduzíveis e demais tipos caem no ``default`` do encoder do DRF.
+Sem o pacote instalado as classes se comportam como JSONRenderer e
+JSONParser do DRF (com o JSON_ENCODER configurado).
+
+Ativação em REST_FRAMEWORK (ver brava/settings.py, API_JSON_BACKEND)::
+
+    'DEFAULT_RENDERER_CLASSES': ['api.renderers.ORJSONRenderer'],
+    'DEFAULT_PARSER_CLASSES': ['api.renderers.ORJSONParser', ...],
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+_default = JSONEncoder().default
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer com orjson; indentação (``; indent=N``) vira 2 espaços
+
+    Como no encoder do DRF: chaves não-texto (int, UUID) são aceitas e
+    datetimes em UTC terminam em ``Z``.
+    """
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z if orjson is not None else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        options = self.options
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+        ret = orjson.dumps(data, default=_default, option=options)
+        # Mesmo escape do DRF: U+2028/U+2029 quebram JavaScript embutido
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+class ORJSONParser(JSONParser):
+    """JSONParser com orjson (corpo em UTF-8)"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
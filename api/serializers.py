@@ -9,13 +9,15 @@ from customers.models import *
 from dashboard.models import *
 from orders.models import *
 from products.models import *
+from .dynamic import DynamicFieldsModelSerializer
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'first_name', 'last_name', 
-                 'GrupoTrabalho', 'Telefone', 'Avatar', 'Tema', 'IdIdioma', 'is_active']
-        read_only_fields = ['id', 'is_active']
+        fields = ['UsuarioId', 'username', 'email', 'first_name', 'last_name', 
+                 'Papel', 'Telefone', 'Avatar', 'Tema', 'Idioma', 'Lojas', 'is_active']
+        read_only_fields = ['UsuarioId', 'Papel', 'Lojas', 'is_active']
+        expandable_fields = {'Idioma': ('api.serializers.LanguageSerializer', {})}
 
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -38,15 +40,55 @@ class LoginSerializer(serializers.Serializer):
         else:
             raise serializers.ValidationError('Email e senha são obrigatórios.')
 
-class LanguageSerializer(serializers.ModelSerializer):
+class LanguageSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Language
-        fields = ['id', 'Codigo', 'Nome', 'NomeNativo', 'Bandeira', 
+        fields = ['IdiomaId', 'Codigo', 'Nome', 'NomeNativo', 'Bandeira', 
                  'Ativo', 'Padrao']
 
-class TranslationSerializer(serializers.ModelSerializer):
+class TranslationSerializer(DynamicFieldsModelSerializer):
     IdiomaCodigo = serializers.CharField(source='Idioma.Codigo', read_only=True)
     
     class Meta:
         model = Translation
-        fields = ['id', 'Chave', 'Valor', 'Contexto', 'IdiomaCodigo']
\ No newline at end of file
+        fields = ['TraducaoId', 'Chave', 'Valor', 'Contexto', 'Idioma', 'IdiomaCodigo']
+        expandable_fields = {'Idioma': (LanguageSerializer, {})}
+
+class CustomerSerializer(DynamicFieldsModelSerializer):
+    class Meta:
+        model = Customer
+        fields = ['ClienteId', 'Codigo', 'Nome', 'Documento', 'Email']
+
+class CategorySerializer(DynamicFieldsModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['CategoriaId', 'Nome']
+
+class BrandSerializer(DynamicFieldsModelSerializer):
+    class Meta:
+        model = Brand
+        fields = ['MarcaId', 'Nome']
+
+class ProductSerializer(DynamicFieldsModelSerializer):
+    CategoriaNome = serializers.CharField(source='Categoria.Nome', read_only=True)
+    
+    class Meta:
+        model = Product
+        fields = ['ProdutoId', 'Codigo', 'Nome', 'Resumo', 'Categoria', 'CategoriaNome', 'Marca',
+                 'Preco', 'QuantidadeEstoque', 'EstoqueMinimo', 'Status', 'Destaque', 'DataInclusao']
+        expandable_fields = {
+            'Categoria': (CategorySerializer, {}),
+            'Marca': (BrandSerializer, {}),
+        }
+
+class OrderSerializer(DynamicFieldsModelSerializer):
+    ClienteNome = serializers.CharField(source='Cliente.Nome', read_only=True)
+    
+    class Meta:
+        model = Order
+        fields = ['PedidoId', 'Numero', 'Cliente', 'ClienteNome', 'Vendedor', 'Status', 'StatusPagamento',
+                 'FormaPagamento', 'Subtotal', 'Desconto', 'Frete', 'Total', 'DataPedido', 'DataEntregaPrevista']
+        expandable_fields = {
+            'Cliente': (CustomerSerializer, {}),
+            'Vendedor': (UserSerializer, {}),
+        }
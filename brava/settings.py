@@ -2,6 +2,8 @@
 import os
 import sys
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
+from core.database.tenants import parse_tenants, tenant_databases
 from pathlib import Path
 from datetime import timedelta
 
@@ -35,6 +37,9 @@ SECRET_KEY = config('SECRET_KEY', default='django-insecure-ecommerce-admin-chang
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = config('DEBUG', default=True, cast=bool)
 
+# Running under "manage.py test": background writers (users/sessions.py) stay off
+TESTING = sys.argv[1:2] == ['test']
+
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1,0.0.0.0', cast=lambda v: [s.strip() for s in v.split(',')])
 
 # ==============================================================================
@@ -78,14 +83,17 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',  # GZip/Brotli de JSON/CSV/NDJSON
     'corsheaders.middleware.CorsMiddleware',
     'core.middleware.DatabaseSchemaMiddleware',  # Schema management
+    'core.middleware.ReplicaRoutingMiddleware',  # Read replica stickiness
     'core.middleware.AuditMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',  # I18n support
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.UserSessionMiddleware',  # UserSession write-behind
     'core.middleware.UserLanguageMiddleware',  # Custom language
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -136,11 +144,45 @@ DATABASES = {
             'options': '-c search_path=BRAVA,public',  # Schema padrão
         },
         'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
         'ATOMIC_REQUESTS': True,
     }
 }
 
 
+# Optional read replica for dashboard/report reads (e.g. a second local database for tests)
+if config('DB_REPLICA_NAME', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': config('DB_REPLICA_NAME'),
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'HOST': config('DB_REPLICA_HOST', default=DATABASES['default']['HOST']),
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'ATOMIC_REQUESTS': False,  # somente leitura: sem transação por request
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICA = {
+    'ALIAS': 'replica',
+    'APPS': ['dashboard', 'reports'],
+    'STICKY_SECONDS': config('DB_REPLICA_STICKY_SECONDS', default=5, cast=int),  # read-your-writes
+    'MAX_LAG_SECONDS': config('DB_REPLICA_MAX_LAG_SECONDS', default=10, cast=int),
+    'LAG_CHECK_INTERVAL': config('DB_REPLICA_LAG_CHECK_INTERVAL', default=5, cast=int),
+}
+
+# Tenants (stores) on schemas of the same cluster: 'loja1:LOJA1,loja2:LOJA2:dedicated'
+# Dedicated tenants get their own connection alias (tenant_<slug>); the others share
+# 'default' and switch search_path only when the schema changes
+# Tenant schemas are created and migrated with `python manage.py tenants` (also run by setup_db);
+# a tenant whose schema was not provisioned is refused instead of falling back to the shared tables
+TENANTS = parse_tenants(config('DB_TENANTS', default=''))
+TENANT_HEADER = config('TENANT_HEADER', default='X-Tenant')
+# REMOTE_ADDR of the proxies allowed to pick the tenant with TENANT_HEADER (others: host only)
+TENANT_TRUSTED_PROXIES = config('TENANT_TRUSTED_PROXIES', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+TENANT_DEFAULT = config('TENANT_DEFAULT', default=None)
+DATABASES.update(tenant_databases(DATABASES['default'], TENANTS, config('DB_SCHEMA', default='BRAVA')))
+
 # Database routing for multi-schema
 DATABASE_ROUTERS = ['core.database.manager.BRAVAManager']
 
@@ -148,20 +190,32 @@ DATABASE_ROUTERS = ['core.database.manager.BRAVAManager']
 # DJANGO REST FRAMEWORK CONFIGURATION
 # ==============================================================================
 
+# JSON da API: 'json' (DRF) ou 'orjson' (api/renderers.py, cai no stdlib sem o pacote)
+API_JSON_BACKEND = config('API_JSON_BACKEND', default='json')
+API_JSON_BACKENDS = {
+    'orjson': ('api.renderers.ORJSONRenderer', 'api.renderers.ORJSONParser'),
+    'json': ('rest_framework.renderers.JSONRenderer', 'rest_framework.parsers.JSONParser'),
+}
+if API_JSON_BACKEND not in API_JSON_BACKENDS:
+    raise ImproperlyConfigured(
+        f"API_JSON_BACKEND={API_JSON_BACKEND!r} inválido; use um de: {', '.join(API_JSON_BACKENDS)}"
+    )
+API_JSON_CLASSES = API_JSON_BACKENDS[API_JSON_BACKEND]
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.tokens.ClaimsJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        API_JSON_CLASSES[0],
     ],
     'JSON_ENCODER': 'brava.settings.UUIDEncoder',
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        API_JSON_CLASSES[1],
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ],
@@ -206,7 +260,7 @@ SIMPLE_JWT = {
     
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
-    'USER_ID_FIELD': 'id',
+    'USER_ID_FIELD': 'UsuarioId',
     'USER_ID_CLAIM': 'user_id',
     'USER_AUTHENTICATION_RULE': 'rest_framework_simplejwt.authentication.default_user_authentication_rule',
     
@@ -221,6 +275,13 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Revoked refresh tokens: cache mark + batched USR_TOKEN_REVOGADO writes + in-memory Bloom filter
+TOKEN_BLACKLIST_FLUSH_INTERVAL = config('TOKEN_BLACKLIST_FLUSH_INTERVAL', default=5, cast=int)  # segundos
+TOKEN_BLACKLIST_REFRESH_INTERVAL = config('TOKEN_BLACKLIST_REFRESH_INTERVAL', default=300, cast=int)  # segundos
+
+# Build request.user from access token claims (Papel, Idioma, Tema, version) instead of loading USR_USUARIO
+JWT_STATELESS_USER = config('JWT_STATELESS_USER', default=False, cast=bool)
+
 # ==============================================================================
 # CORS CONFIGURATION
 # ==============================================================================
@@ -270,6 +331,16 @@ LOGIN_URL = '/auth/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/'
 
+# Password hashing: PBKDF2 iterations drive login latency (None = Django default; never below it)
+PASSWORD_HASHERS = [
+    'users.hashers.BRAVAPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = config('PASSWORD_HASH_ITERATIONS', default=0, cast=int) or None
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -290,7 +361,9 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 # Session configuration
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+SESSION_ENGINE = 'users.sessions'  # cache + DB write only on change
+SESSION_DB_REFRESH_THRESHOLD = config('SESSION_DB_REFRESH_THRESHOLD', default=600, cast=int)  # segundos
+USER_SESSION_FLUSH_INTERVAL = config('USER_SESSION_FLUSH_INTERVAL', default=30, cast=int)  # segundos
 SESSION_COOKIE_AGE = 86400  # 24 horas
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SECURE = not DEBUG
@@ -408,6 +481,18 @@ CACHE_TTL = {
     'VERY_LONG': 86400 # 24 horas
 }
 
+# Threads (per process, shared by all requests) used to compute dashboard widget data in parallel
+DASHBOARD_LAYOUT_WORKERS = config('DASHBOARD_LAYOUT_WORKERS', default=4, cast=int)
+
+# Seconds between checks of the shared translations version (in-process catalogs)
+TRANSLATION_VERSION_CHECK_INTERVAL = config('TRANSLATION_VERSION_CHECK_INTERVAL', default=5, cast=int)
+
+# Seconds between checks of the active languages version (in-process registry)
+LANGUAGE_VERSION_CHECK_INTERVAL = config('LANGUAGE_VERSION_CHECK_INTERVAL', default=5, cast=int)
+
+# Seconds between checks of the shared permissions version (compiled user permissions)
+PERMISSION_VERSION_CHECK_INTERVAL = config('PERMISSION_VERSION_CHECK_INTERVAL', default=5, cast=int)
+
 # ==============================================================================
 # LOGGING CONFIGURATION
 # ==============================================================================
@@ -548,6 +633,12 @@ API_VERSION = 'v1'
 REST_FRAMEWORK_PAGE_SIZE = 20
 REST_FRAMEWORK_MAX_PAGE_SIZE = 100
 
+# Compressão das respostas da API (core.middleware.CompressionMiddleware): Brotli quando aceito, senão GZip
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)  # bytes
+
+# Exportações em streaming (core/exports.py): linhas por FETCH do cursor no servidor
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
 # Business settings
 BUSINESS_SETTINGS = {
     'COMPANY_NAME': config('COMPANY_NAME', default='BRAVA'),
@@ -558,6 +649,12 @@ BUSINESS_SETTINGS = {
     'TIMEZONE': 'America/Sao_Paulo',
 }
 
+# Geração de códigos (número do pedido, código do cliente)
+CODE_GENERATOR = {
+    'BACKEND': config('CODE_GENERATOR_BACKEND', default='core.database.sequences.SequenceBackend'),
+    'BLOCK_SIZE': config('CODE_GENERATOR_BLOCK_SIZE', default=100, cast=int),  # códigos reservados por nextval
+}
+
 # Integration settings
 INTEGRATION_SETTINGS = {
     'PAGSEGURO': {
@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+    
+    def ready(self):
+        from . import signals
+        post_migrate.connect(signals.create_code_sequences, sender=self, dispatch_uid='brava_code_sequences')
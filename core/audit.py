@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# core/audit.py
+"""
+Contexto de auditoria (UsuarioInclusao/UsuarioAlteracao)
+
+O autor das alterações fica em um ContextVar (request, usuário ou nome),
+válido em WSGI, ASGI, threads com ``copy_context`` e comandos. O nome só é
+resolvido quando algo é gravado:
+
+- instâncias novas recebem o autor pelo default dos campos (vale também
+  para ``bulk_create``, sem laço extra);
+- ``save`` carimba UsuarioAlteracao (incluído, com DataAlteracao, em
+  ``update_fields``);
+- ``QuerySet.update`` e ``bulk_update`` recebem UsuarioAlteracao e
+  DataAlteracao como valores constantes do UPDATE, e os upserts de
+  ``bulk_create`` atualizam as duas colunas.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import models
+from django.http import HttpRequest
+from django.utils import timezone
+
+_actor = ContextVar('brava_audit_actor', default=None)
+
+# Autor das alterações sem usuário (comandos, tarefas, anônimos)
+SYSTEM_USER = 'BRAVA'
+
+# Campos carimbados em todo UPDATE (save com update_fields e upserts)
+AUDIT_UPDATE_FIELDS = ('UsuarioAlteracao', 'DataAlteracao')
+
+class AuditContext:
+    """Autor das alterações no contexto atual"""
+
+    @staticmethod
+    def activate(actor):
+        """Define o autor (HttpRequest, User ou nome) e devolve o token para ``deactivate``"""
+        return _actor.set(actor)
+
+    @staticmethod
+    def deactivate(token):
+        _actor.reset(token)
+
+    @staticmethod
+    @contextmanager
+    def use(actor):
+        """Bloco com o autor informado (comandos, importações, tarefas)"""
+        token = _actor.set(actor)
+        try:
+            yield
+        finally:
+            _actor.reset(token)
+
+    @staticmethod
+    def get_user():
+        """Usuário autenticado do contexto, ou None"""
+        actor = _actor.get()
+        if isinstance(actor, HttpRequest):
+            # request.user é definido depois (AuthenticationMiddleware / DRF)
+            actor = getattr(actor, 'user', None)
+        if actor is None or isinstance(actor, str) or not actor.is_authenticated:
+            return None
+        return actor
+
+    @staticmethod
+    def get_username():
+        """Nome gravado nos campos de auditoria"""
+        actor = _actor.get()
+        if isinstance(actor, str):
+            return actor[:50]
+        user = AuditContext.get_user()
+        return user.username[:50] if user is not None else SYSTEM_USER
+
+class AuditQuerySet(models.QuerySet):
+    """QuerySet que carimba a auditoria em UPDATEs e upserts em lote"""
+
+    def update(self, **kwargs):
+        kwargs.setdefault('UsuarioAlteracao', AuditContext.get_username())
+        kwargs.setdefault('DataAlteracao', timezone.now())
+        return super().update(**kwargs)
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False, update_conflicts=False,
+                    update_fields=None, unique_fields=None):
+        if update_conflicts and update_fields:
+            update_fields = [*update_fields, *(
+                field for field in AUDIT_UPDATE_FIELDS if field not in update_fields
+            )]
+        return super().bulk_create(
+            objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts, update_conflicts=update_conflicts,
+            update_fields=update_fields, unique_fields=unique_fields,
+        )
+
+    bulk_create.alters_data = True
+
+class AuditManager(models.Manager.from_queryset(AuditQuerySet)):
+    """Manager padrão de BaseAuditModel"""
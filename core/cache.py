@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# core/cache.py
+"""
+Utilitários de cache: versões por tag e coalescência de misses
+
+Cada tag (ex.: ``orders``) tem um contador de versão no cache. Chaves que
+dependem de tags incluem as versões atuais; invalidar uma tag é apenas
+incrementar o contador, sem precisar conhecer as chaves afetadas.
+
+Tags com o nome de uma app da loja (``TENANT_SCHEMA`` em BRAVAManager)
+têm um contador por loja; as demais (``permissions``, ``translations``)
+descrevem dados do schema compartilhado e têm um contador global.
+"""
+import threading
+import time
+from django.core.cache import cache
+from .database.tenants import TenantManager
+from .database.transactions import commit_batch
+
+_MISSING = object()
+
+TAG_KEY_PREFIX = 'cache_tag'
+LOCK_TIMEOUT = 30  # segundos
+LOCK_POLL_INTERVAL = 0.05
+
+def _tenant_prefix():
+    # Lojas em schemas separados não compartilham entradas de cache
+    tenant = TenantManager.get_current()
+    return f'{tenant}:' if tenant else ''
+
+def is_tenant_tag(tag):
+    """Tag de dados da loja (app em TENANT_SCHEMA)"""
+    from .database.manager import BRAVAManager
+    return BRAVAManager.APP_SCHEMA_MAPPING.get(tag) == BRAVAManager.TENANT_SCHEMA
+
+def _tag_key(tag):
+    prefix = _tenant_prefix() if is_tenant_tag(tag) else ''
+    return f'{prefix}{TAG_KEY_PREFIX}:{tag}'
+
+def _initial_version():
+    # Versão inicial única: se o contador for descartado, entradas antigas não voltam a valer
+    return int(time.time() * 1000)
+
+def tag_versions(tags):
+    """Versões atuais das tags (uma ida ao cache)"""
+    keys = {tag: _tag_key(tag) for tag in tags}
+    found = cache.get_many(list(keys.values()))
+    versions = {}
+    for tag, key in keys.items():
+        version = found.get(key)
+        if version is None:
+            version = _initial_version()
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+        versions[tag] = version
+    return versions
+
+def versioned_key(prefix, tags, *parts):
+    """Chave que muda quando qualquer uma das tags é invalidada"""
+    versions = tag_versions(sorted(tags))
+    tag_part = '.'.join(f'{tag}{versions[tag]}' for tag in sorted(tags))
+    return _tenant_prefix() + ':'.join([prefix, *[str(part) for part in parts], tag_part])
+
+def _bump_keys(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
+
+def bump_tags(*tags):
+    """Invalida imediatamente tudo que depende das tags"""
+    _bump_keys(_tag_key(tag) for tag in tags)
+
+def bump_tags_on_commit(*tags, using=None):
+    """Invalida após o commit, para que ninguém recoloque no cache dados anteriores à escrita
+
+    Tags repetidas na mesma transação são incrementadas uma única vez; num
+    rollback o lote é descartado junto com a transação.
+    """
+    # Chaves resolvidas agora: a loja ativa no commit pode ser outra
+    keys = {_tag_key(tag) for tag in tags}
+    pending = commit_batch('cache_tags', _bump_keys, using=using)
+    if pending is None:
+        # Fora de um bloco atomic: invalida já
+        _bump_keys(keys)
+    else:
+        pending.update(keys)
+
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = _MISSING
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+def get_or_compute(key, compute, timeout):
+    """Retorna ``key`` do cache ou calcula uma única vez, mesmo com misses simultâneos
+
+    Dentro do processo as threads aguardam o cálculo em andamento; entre
+    processos um lock via ``cache.add`` faz os demais aguardarem o valor.
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        flight.event.wait(LOCK_TIMEOUT)
+        if flight.value is not _MISSING:
+            return flight.value
+        return compute()
+
+    lock_key = f'{key}:lock'
+    has_lock = False
+    try:
+        has_lock = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        if not has_lock:
+            # Outro processo está calculando: aguarda o valor aparecer no cache
+            deadline = time.monotonic() + LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+                value = cache.get(key, _MISSING)
+                if value is not _MISSING:
+                    flight.value = value
+                    return value
+
+        value = compute()
+        cache.set(key, value, timeout)
+        flight.value = value
+        return value
+    finally:
+        if has_lock:
+            cache.delete(lock_key)
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.event.set()
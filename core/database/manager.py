@@ -1,40 +1,61 @@
 # -*- coding: utf-8 -*-
+from .replicas import ReplicaManager
+from .tenants import TenantManager
+
 class BRAVAManager:
     """
     Router para gerenciar múltiplos schemas
+    
+    Apps mapeadas para ``TENANT_SCHEMA`` ficam no schema da loja ativa
+    (ver core/database/tenants.py); as demais no schema compartilhado.
+    Sem loja ativa tudo usa o schema compartilhado, como em loja única.
+    Leituras de dashboard/relatórios podem ir para a réplica (ver
+    core/database/replicas.py).
     """
     
     from decouple import config
     
     SCHEMA = config('DB_SCHEMA', default='BRAVA')
+    TENANT_SCHEMA = '__tenant__'
     
     # Mapeamento de apps para schemas
     
     APP_SCHEMA_MAPPING = {
         'users': SCHEMA,
-        'products': SCHEMA, 
-        'orders': SCHEMA,
-        'customers': SCHEMA,
+        'products': TENANT_SCHEMA, 
+        'orders': TENANT_SCHEMA,
+        'customers': TENANT_SCHEMA,
         'core': SCHEMA,
-        'dashboard': SCHEMA,
+        'dashboard': TENANT_SCHEMA,
         # Futuras expansões
-        'integrations': SCHEMA,
-        'reports': SCHEMA,
+        'integrations': TENANT_SCHEMA,
+        'reports': TENANT_SCHEMA,
     }
     
+    def _db_for_app(self, app_label):
+        schema = self.APP_SCHEMA_MAPPING.get(app_label)
+        if schema is None:
+            return None
+        if schema == self.TENANT_SCHEMA:
+            return TenantManager.get_alias()
+        return 'default'
+    
     def db_for_read(self, model, **hints):
         """Determina qual database usar para leitura"""
-        app_label = model._meta.app_label
-        if app_label in self.APP_SCHEMA_MAPPING:
-            return 'default'
-        return None
+        alias = self._db_for_app(model._meta.app_label)
+        if alias == 'default':
+            replica = ReplicaManager.db_for_read(model._meta.app_label)
+            if replica:
+                TenantManager.activate_schema(using=replica)
+                return replica
+        return alias
     
     def db_for_write(self, model, **hints):
         """Determina qual database usar para escrita"""
-        app_label = model._meta.app_label
-        if app_label in self.APP_SCHEMA_MAPPING:
-            return 'default'
-        return None
+        alias = self._db_for_app(model._meta.app_label)
+        if alias is not None:
+            ReplicaManager.mark_write()
+        return alias
     
     def allow_relation(self, obj1, obj2, **hints):
         """Permite relações entre objetos do mesmo schema"""
@@ -42,9 +63,15 @@ class BRAVAManager:
     
     def allow_migrate(self, db, app_label, model_name=None, **hints):
         """Controla em qual database fazer migrações"""
-        if app_label in self.APP_SCHEMA_MAPPING:
-            return db == 'default'
-        return None
+        tenant_app = self.APP_SCHEMA_MAPPING.get(app_label) == self.TENANT_SCHEMA
+        if db.startswith('tenant_') or TenantManager.get_current() is not None:
+            # Alias de loja dedicada ou provisionamento do schema da loja: apenas as tabelas por loja
+            return tenant_app
+        if app_label not in self.APP_SCHEMA_MAPPING:
+            return None
+        if db == ReplicaManager.get_alias():
+            return False
+        return db == 'default'
 
 # Mixin para aplicar schema nas models
 class SchemaModelMixin:
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# core/database/replicas.py
+"""
+Leituras em réplica para dashboard/relatórios
+
+Leituras das apps em ``DATABASE_REPLICA['APPS']`` e das views marcadas
+com ``ReplicaReadMixin`` vão para o alias da réplica, exceto quando:
+
+- o contexto atual já escreveu no primário (ler o que acabou de gravar);
+- o usuário escreveu há menos de ``STICKY_SECONDS`` (marca no cache);
+- o atraso da réplica passa de ``MAX_LAG_SECONDS`` ou ela não responde.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, DatabaseError
+
+_state = ContextVar('brava_replica_state', default=None)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+DEFAULT_REPLICA = {
+    'ALIAS': 'replica',
+    'APPS': ['dashboard', 'reports'],
+    'STICKY_SECONDS': 5,
+    'MAX_LAG_SECONDS': 10,
+    'LAG_CHECK_INTERVAL': 5,
+}
+
+# Atraso de replicação; 0 quando tudo que foi recebido já foi aplicado (ou não é réplica)
+LAG_SQL = '''
+    SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+           ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END
+'''
+
+class ReplicaManager:
+    """Decide, por contexto (request), se uma leitura pode ir para a réplica"""
+
+    _lag_lock = threading.Lock()
+    _lag_checked_at = {}
+    _healthy = {}
+
+    @staticmethod
+    def get_config():
+        return {**DEFAULT_REPLICA, **getattr(settings, 'DATABASE_REPLICA', {})}
+
+    @staticmethod
+    def get_alias():
+        """Alias da réplica, ou None se não houver réplica configurada"""
+        alias = ReplicaManager.get_config()['ALIAS']
+        return alias if alias in settings.DATABASES else None
+
+    @staticmethod
+    def _get_state():
+        state = _state.get()
+        if state is None:
+            state = {'request': None, 'replica': False, 'wrote': False, 'pinned': None}
+            _state.set(state)
+        return state
+
+    @staticmethod
+    def begin(request=None):
+        """Novo contexto de roteamento (início do request); devolve o token para ``end``"""
+        return _state.set({'request': request, 'replica': False, 'wrote': False, 'pinned': None})
+
+    @staticmethod
+    def end(token):
+        """Fim do request: se houve escrita, fixa as leituras do usuário no primário"""
+        state = _state.get()
+        _state.reset(token)
+        if not state or not state['wrote'] or state['request'] is None:
+            return
+        user = getattr(state['request'], 'user', None)
+        if user is not None and user.is_authenticated:
+            cache.set(ReplicaManager._pin_key(user.pk), 1, ReplicaManager.get_config()['STICKY_SECONDS'])
+
+    @staticmethod
+    def _pin_key(user_id):
+        return f'replica_pin:{user_id}'
+
+    @staticmethod
+    def use_replica():
+        """Marca o contexto atual como somente leitura (views marcadas)"""
+        ReplicaManager._get_state()['replica'] = True
+
+    @staticmethod
+    def mark_write():
+        """Escrita no primário: as próximas leituras do contexto também vão para o primário"""
+        ReplicaManager._get_state()['wrote'] = True
+
+    @staticmethod
+    def _is_pinned(state):
+        if state['pinned'] is None:
+            user = getattr(state['request'], 'user', None)
+            state['pinned'] = bool(
+                user is not None and user.is_authenticated
+                and cache.get(ReplicaManager._pin_key(user.pk))
+            )
+        return state['pinned']
+
+    @staticmethod
+    def is_healthy(alias):
+        """Atraso da réplica dentro do limite (verificado no máximo a cada LAG_CHECK_INTERVAL)"""
+        config = ReplicaManager.get_config()
+        now = time.monotonic()
+        if now - ReplicaManager._lag_checked_at.get(alias, 0) < config['LAG_CHECK_INTERVAL']:
+            return ReplicaManager._healthy.get(alias, False)
+
+        with ReplicaManager._lag_lock:
+            if now - ReplicaManager._lag_checked_at.get(alias, 0) >= config['LAG_CHECK_INTERVAL']:
+                try:
+                    with connections[alias].cursor() as cursor:
+                        cursor.execute(LAG_SQL)
+                        lag = float(cursor.fetchone()[0] or 0)
+                    ReplicaManager._healthy[alias] = lag <= config['MAX_LAG_SECONDS']
+                except DatabaseError:
+                    ReplicaManager._healthy[alias] = False
+                    connections[alias].close()
+                ReplicaManager._lag_checked_at[alias] = now
+        return ReplicaManager._healthy[alias]
+
+    @staticmethod
+    def db_for_read(app_label):
+        """Alias da réplica para a leitura, ou None para usar o primário"""
+        alias = ReplicaManager.get_alias()
+        if alias is None:
+            return None
+        state = ReplicaManager._get_state()
+        if not state['replica'] and app_label not in ReplicaManager.get_config()['APPS']:
+            return None
+        if state['wrote'] or ReplicaManager._is_pinned(state):
+            return None
+        return alias if ReplicaManager.is_healthy(alias) else None
+
+class ReplicaReadMixin:
+    """Views somente leitura: GET/HEAD/OPTIONS leem da réplica"""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            ReplicaManager.use_replica()
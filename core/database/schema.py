@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# core/database/schema.py
+"""
+search_path das conexões PostgreSQL
+
+O schema é aplicado quando a conexão é criada (``connection_created``) e
+só é trocado quando o schema pedido difere do último usado pela conexão;
+conexões persistentes (CONN_MAX_AGE) não repetem o SET a cada request.
+"""
+import re
+import threading
+from django.db import connections, DEFAULT_DB_ALIAS
+
+_SEARCH_PATH_OPTION = re.compile(r'search_path\s*=\s*([^\s]+)')
+_SCHEMA_NAME = re.compile(r'^\w+(,\w+)*$')
+
+class SchemaManager:
+    """Aplica e troca o search_path por conexão, contando os SET evitados"""
+
+    _lock = threading.Lock()
+    _stats = {'executed': 0, 'skipped': 0}
+
+    @staticmethod
+    def _count(name):
+        with SchemaManager._lock:
+            SchemaManager._stats[name] += 1
+
+    @staticmethod
+    def stats():
+        """SET search_path executados e evitados neste processo"""
+        with SchemaManager._lock:
+            return dict(SchemaManager._stats)
+
+    @staticmethod
+    def options_schema(settings_dict):
+        """Schemas aplicados pelo parâmetro de startup em OPTIONS ('-c search_path=...'), sem o public"""
+        match = _SEARCH_PATH_OPTION.search(settings_dict.get('OPTIONS', {}).get('options', ''))
+        if not match:
+            return None
+        return ','.join(schema for schema in match.group(1).split(',') if schema != 'public') or None
+
+    @staticmethod
+    def _set_search_path(connection, schema):
+        if not _SCHEMA_NAME.match(schema):
+            raise ValueError(f'Schema inválido: {schema}')
+        with connection.cursor() as cursor:
+            # Sem aspas, como no OPTIONS: o PostgreSQL normaliza para minúsculas
+            cursor.execute(f'SET search_path TO {schema}, public')
+        connection.brava_schema = schema
+        SchemaManager._count('executed')
+
+    @staticmethod
+    def connection_created(sender, connection, **kwargs):
+        """Receiver de ``connection_created``: aplica o schema pendente ou o configurado"""
+        if connection.vendor != 'postgresql':
+            return
+        from .manager import BRAVAManager
+
+        current = SchemaManager.options_schema(connection.settings_dict)
+        target = (
+            getattr(connection, 'brava_target_schema', None)
+            or connection.settings_dict.get('SCHEMA')
+            or current
+            or BRAVAManager.SCHEMA
+        )
+        if target == current:
+            # Já aplicado pelo parâmetro de startup da conexão
+            connection.brava_schema = target
+            SchemaManager._count('skipped')
+        else:
+            SchemaManager._set_search_path(connection, target)
+
+    @staticmethod
+    def current(using=DEFAULT_DB_ALIAS):
+        """Schema em uso (ou a ser aplicado) pela conexão do alias"""
+        connection = connections[using]
+        return (
+            getattr(connection, 'brava_target_schema', None)
+            or getattr(connection, 'brava_schema', None)
+            or connection.settings_dict.get('SCHEMA')
+            or SchemaManager.options_schema(connection.settings_dict)
+        )
+
+    @staticmethod
+    def activate(schema, using=DEFAULT_DB_ALIAS):
+        """Garante ``schema`` na conexão sem abri-la; SET apenas se for diferente do atual
+
+        ``schema`` pode ser uma lista separada por vírgulas (ex.: 'LOJA1,BRAVA').
+        """
+        connection = connections[using]
+        if connection.vendor != 'postgresql':
+            return
+        connection.brava_target_schema = schema
+        if connection.connection is None:
+            # Será aplicado pelo connection_created quando a conexão for aberta
+            return
+        if getattr(connection, 'brava_schema', None) == schema:
+            SchemaManager._count('skipped')
+        else:
+            SchemaManager._set_search_path(connection, schema)
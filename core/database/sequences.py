@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# core/database/sequences.py
+"""
+Geração de códigos sequenciais (número do pedido, código do cliente)
+
+Os valores vêm de blocos reservados em uma sequence PostgreSQL (hi/lo):
+cada ``nextval`` reserva ``INCREMENT BY`` números para o processo, que
+os consome em memória sem voltar ao banco até o bloco acabar.
+
+As sequences são criadas pelo ``migrate`` (post_migrate, ver
+``create_sequences``), nunca durante um request: DDL dentro da transação
+do request seria desfeita num rollback e exigiria CREATE no schema.
+"""
+import os
+import threading
+import uuid
+from datetime import datetime
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.utils.module_loading import import_string
+from .schema import SchemaManager
+
+DEFAULT_CODE_GENERATOR = {
+    'BACKEND': 'core.database.sequences.SequenceBackend',
+    'BLOCK_SIZE': 100,
+}
+
+class RandomBackend:
+    """Códigos aleatórios a partir de uuid4 (comportamento legado)"""
+
+    def __init__(self, **options):
+        pass
+
+    def allocate(self, generator, count, using=DEFAULT_DB_ALIAS):
+        return [
+            f"{generator.get_prefix()}{uuid.uuid4().hex[:generator.random_length].upper()}"
+            for _ in range(count)
+        ]
+
+class SequenceBackend:
+    """Blocos hi/lo reservados em sequences PostgreSQL"""
+
+    def __init__(self, BLOCK_SIZE=100, **options):
+        self.block_size = BLOCK_SIZE
+        self.fallback = RandomBackend()
+        self._lock = threading.Lock()
+        self._blocks = {}
+        self._increments = {}
+        self._pid = os.getpid()
+
+    def allocate(self, generator, count, using=DEFAULT_DB_ALIAS):
+        if connections[using].vendor != 'postgresql':
+            return self.fallback.allocate(generator, count, using)
+
+        with self._lock:
+            self._check_fork()
+            # Conexão compartilhada entre lojas: cada schema tem sua sequence
+            key = (using, SchemaManager.current(using), generator.sequence)
+            blocks = self._blocks.setdefault(key, [])
+
+            available = sum(end - start for start, end in blocks)
+            if available < count:
+                increment = self._get_increment(using, key)
+                missing = -(-(count - available) // increment)
+                blocks.extend(self._reserve(using, generator.sequence, missing, increment))
+
+            values = []
+            while len(values) < count:
+                start, end = blocks[0]
+                take = min(end - start, count - len(values))
+                values.extend(range(start, start + take))
+                if start + take >= end:
+                    blocks.pop(0)
+                else:
+                    blocks[0] = (start + take, end)
+
+        return [generator.format(value) for value in values]
+
+    def _check_fork(self):
+        """Blocos herdados de um fork (ex.: workers do gunicorn) são descartados"""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._blocks.clear()
+            self._increments.clear()
+
+    def _get_increment(self, using, key):
+        """INCREMENT BY real da sequence (uma vez por processo e schema)"""
+        sequence = key[-1]
+        if key not in self._increments:
+            with connections[using].cursor() as cursor:
+                cursor.execute(
+                    'SELECT seqincrement FROM pg_sequence WHERE seqrelid = to_regclass(%s)',
+                    [f'"{sequence}"']
+                )
+                row = cursor.fetchone()
+            if row is None:
+                raise ImproperlyConfigured(
+                    f'Sequence {sequence} não existe no schema {key[1]}: execute o migrate (ou setup_db)'
+                )
+            self._increments[key] = row[0]
+        return self._increments[key]
+
+    def _reserve(self, using, sequence, blocks, increment):
+        """Reserva ``blocks`` blocos em um único round-trip"""
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                'SELECT nextval(%s) FROM generate_series(1, %s)',
+                [f'"{sequence}"', blocks]
+            )
+            return [(row[0], row[0] + increment) for row in cursor.fetchall()]
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """Retorna o backend configurado em settings.CODE_GENERATOR"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                options = {**DEFAULT_CODE_GENERATOR, **getattr(settings, 'CODE_GENERATOR', {})}
+                backend_class = import_string(options.pop('BACKEND'))
+                _backend = backend_class(**options)
+    return _backend
+
+_generators = []
+
+def create_sequences(using=DEFAULT_DB_ALIAS, schemas=None, block_size=None):
+    """Cria as sequences dos CodeGenerator registrados (IF NOT EXISTS)
+
+    Sem ``schemas`` cria no schema da conexão; senão em cada schema existente
+    da lista (lojas que compartilham a conexão ``default``).
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql' or not _generators:
+        return 0
+    if block_size is None:
+        block_size = {**DEFAULT_CODE_GENERATOR, **getattr(settings, 'CODE_GENERATOR', {})}['BLOCK_SIZE']
+
+    created = 0
+    with connection.cursor() as cursor:
+        if schemas:
+            cursor.execute('SELECT nspname FROM pg_namespace WHERE nspname = ANY(%s)', [list(schemas)])
+            prefixes = [f'"{row[0]}".' for row in cursor.fetchall()]
+        else:
+            prefixes = ['']
+        for prefix in prefixes:
+            for generator in _generators:
+                cursor.execute(
+                    f'CREATE SEQUENCE IF NOT EXISTS {prefix}"{generator.sequence}" '
+                    f'INCREMENT BY {int(block_size)} MINVALUE 1 START WITH 1'
+                )
+                created += 1
+    return created
+
+class CodeGenerator:
+    """Gerador de códigos legíveis e monotônicos para uma sequence"""
+
+    def __init__(self, sequence, prefix='', width=8, random_length=8):
+        _generators.append(self)
+        self.sequence = sequence
+        self.prefix = prefix
+        self.width = width
+        self.random_length = random_length
+
+    def get_prefix(self):
+        return self.prefix() if callable(self.prefix) else self.prefix
+
+    def format(self, value):
+        return f"{self.get_prefix()}{value:0{self.width}d}"
+
+    def next(self, using=DEFAULT_DB_ALIAS):
+        """Próximo código"""
+        return self.allocate(1, using=using)[0]
+
+    def allocate(self, count, using=DEFAULT_DB_ALIAS):
+        """Reserva ``count`` códigos de uma vez (importações em lote)"""
+        if count <= 0:
+            return []
+        return get_backend().allocate(self, count, using=using)
+
+def current_year():
+    return str(datetime.now().year)
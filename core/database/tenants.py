@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# core/database/tenants.py
+"""
+Lojas (tenants) em schemas separados do mesmo cluster PostgreSQL
+
+Cada loja tem seu schema; as tabelas das apps marcadas como
+``BRAVAManager.TENANT_SCHEMA`` ficam nele e as demais no schema
+compartilhado (``DB_SCHEMA``), alcançado pelo search_path
+``<loja>, <compartilhado>, public``.
+
+Lojas pequenas usam a conexão ``default`` e apenas trocam o search_path
+quando necessário (SchemaManager); lojas ``dedicated`` têm um alias
+próprio (``tenant_<loja>``) com o search_path fixo na conexão.
+
+O schema de cada loja é criado e migrado por ``manage.py tenants``
+(TenantManager.provision), com um registro de migrações próprio. Loja sem
+schema provisionado não é ativada: as consultas cairiam nas tabelas do
+schema compartilhado, misturando os dados das lojas.
+"""
+import re
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+_current_tenant = ContextVar('brava_tenant', default=None)
+_SCHEMA_NAME = re.compile(r'^\w+$')
+
+def parse_tenants(value):
+    """Converte 'loja1:LOJA1,loja2:LOJA2:dedicated' em {slug: {'SCHEMA', 'DEDICATED'}}"""
+    tenants = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        slug, _, rest = item.partition(':')
+        schema, _, mode = rest.partition(':')
+        tenants[slug.lower()] = {
+            'SCHEMA': schema or slug.upper(),
+            'DEDICATED': mode == 'dedicated',
+        }
+    return tenants
+
+def tenant_alias(slug):
+    return f'tenant_{slug}'
+
+def tenant_databases(default, tenants, shared_schema):
+    """Aliases das lojas dedicadas, copiados do ``default`` com o search_path da loja"""
+    databases = {}
+    for slug, tenant in tenants.items():
+        if not tenant['DEDICATED']:
+            continue
+        options = dict(default.get('OPTIONS', {}))
+        options['options'] = f"-c search_path={tenant['SCHEMA']},{shared_schema},public"
+        databases[tenant_alias(slug)] = {**default, 'OPTIONS': options, 'SCHEMA': f"{tenant['SCHEMA']},{shared_schema}"}
+    return databases
+
+class TenantManager:
+    """Loja ativa no contexto atual (request, thread ou task)"""
+
+    _provisioned = set()
+
+    @staticmethod
+    def get_tenants():
+        return getattr(settings, 'TENANTS', {})
+
+    @staticmethod
+    def get_current():
+        """Slug da loja ativa ou None (instalação de loja única)"""
+        return _current_tenant.get()
+
+    @staticmethod
+    def activate(slug):
+        """Ativa a loja e devolve o token para ``deactivate``"""
+        if slug is not None and slug not in TenantManager.get_tenants():
+            raise LookupError(f'Loja não encontrada: {slug}')
+        if slug is not None and not TenantManager.is_provisioned(slug):
+            raise ImproperlyConfigured(f'Schema da loja não provisionado: {slug} (execute manage.py tenants)')
+        return _current_tenant.set(slug)
+
+    @staticmethod
+    def deactivate(token=None):
+        if token is not None:
+            _current_tenant.reset(token)
+        else:
+            _current_tenant.set(None)
+
+    @staticmethod
+    def resolve(request):
+        """Loja do request: cabeçalho TENANT_HEADER ou primeiro rótulo do host
+
+        O cabeçalho só vale quando o request vem de um proxy confiável
+        (TENANT_TRUSTED_PROXIES); nos demais casos é ignorado.
+        """
+        tenants = TenantManager.get_tenants()
+        if not tenants:
+            return None
+        slug = None
+        if request.META.get('REMOTE_ADDR') in getattr(settings, 'TENANT_TRUSTED_PROXIES', ()):
+            slug = request.headers.get(getattr(settings, 'TENANT_HEADER', 'X-Tenant'))
+        if not slug:
+            slug = request.get_host().split(':')[0].split('.')[0]
+            if slug not in tenants:
+                return getattr(settings, 'TENANT_DEFAULT', None)
+        slug = slug.lower()
+        if slug not in tenants:
+            raise LookupError(f'Loja não encontrada: {slug}')
+        return slug
+
+    @staticmethod
+    def has_access(user, slug):
+        """Usuário autenticado só acessa as lojas em ``User.Lojas`` (superusuário: todas)"""
+        if slug is None or user is None or not user.is_authenticated or user.is_superuser:
+            return True
+        return slug in (getattr(user, 'Lojas', None) or ())
+
+    @staticmethod
+    def search_path(slug):
+        """search_path (sem public) da loja, ou apenas o schema compartilhado"""
+        from .manager import BRAVAManager
+        if slug is None:
+            return BRAVAManager.SCHEMA
+        return f"{TenantManager.get_tenants()[slug]['SCHEMA']},{BRAVAManager.SCHEMA}"
+
+    @staticmethod
+    def activate_schema(slug=None, using='default'):
+        """Ajusta o search_path da conexão compartilhada para a loja (sem SQL se já for o atual)"""
+        from .schema import SchemaManager
+        slug = TenantManager.get_current() if slug is None else slug
+        if TenantManager.get_alias(slug) == 'default':
+            SchemaManager.activate(TenantManager.search_path(slug), using=using)
+
+    @staticmethod
+    def get_alias(slug=None):
+        """Alias de conexão da loja: dedicado ou o ``default`` compartilhado"""
+        slug = TenantManager.get_current() if slug is None else slug
+        if slug is not None and TenantManager.get_tenants()[slug]['DEDICATED']:
+            return tenant_alias(slug)
+        return 'default'
+
+    @staticmethod
+    def _migrations_table(slug):
+        from django.db.migrations.recorder import MigrationRecorder
+        schema = TenantManager.get_tenants()[slug]['SCHEMA']
+        if not _SCHEMA_NAME.match(schema):
+            raise ImproperlyConfigured(f'Schema inválido: {schema}')
+        # Sem aspas, como no search_path: o PostgreSQL normaliza para minúsculas
+        return schema, f'{schema}.{MigrationRecorder.Migration._meta.db_table}'
+
+    @staticmethod
+    def is_provisioned(slug):
+        """Schema da loja já criado por ``provision`` (só o resultado positivo fica em memória)"""
+        alias = TenantManager.get_alias(slug)
+        if (alias, slug) in TenantManager._provisioned:
+            return True
+        _, table = TenantManager._migrations_table(slug)
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT to_regclass(%s)', [table])
+            provisioned = cursor.fetchone()[0] is not None
+        if provisioned:
+            TenantManager._provisioned.add((alias, slug))
+        return provisioned
+
+    @staticmethod
+    def provision(slug, **options):
+        """Cria o schema da loja e aplica nele as migrações das apps por loja
+
+        O registro de migrações da loja fica no próprio schema: o do schema
+        compartilhado (visível pelo search_path) daria tudo como aplicado.
+        Com a loja ativa o router só migra as apps ``TENANT_SCHEMA``.
+        """
+        from django.core.management import call_command
+        from django.db.migrations.recorder import MigrationRecorder
+
+        alias = TenantManager.get_alias(slug)
+        schema, table = TenantManager._migrations_table(slug)
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {schema}')
+
+        token = _current_tenant.set(slug)
+        try:
+            TenantManager.activate_schema(slug, using=alias)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT to_regclass(%s)', [table])
+                exists = cursor.fetchone()[0] is not None
+            if not exists:
+                # Criado no primeiro schema do search_path: o da loja
+                with connection.schema_editor() as editor:
+                    editor.create_model(MigrationRecorder.Migration)
+            call_command('migrate', database=alias, **options)
+        finally:
+            _current_tenant.reset(token)
+            if alias == 'default':
+                TenantManager.activate_schema(using=alias)
+        TenantManager._provisioned.add((alias, slug))
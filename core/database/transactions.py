@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# core/database/transactions.py
+"""
+Lotes acumulados até o commit da transação
+
+O lote fica preso ao callback de ``on_commit``: um único callback por
+transação, e se a transação (ou o savepoint que registrou o callback) for
+desfeita o Django descarta o callback e o lote junto, sem deixar sobras
+para a próxima transação da thread.
+"""
+from django.db import transaction
+
+_BATCHES_ATTR = '_brava_commit_batches'
+
+def commit_batch(name, flush, factory=set, using=None):
+    """Lote ``name`` da transação atual, entregue a ``flush(lote)`` após o commit
+
+    Fora de um bloco atomic devolve None: não há transação para agrupar e o
+    chamador aplica a alteração imediatamente.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        return None
+
+    batches = connection.__dict__.setdefault(_BATCHES_ATTR, {})
+    entry = batches.get(name)
+    if entry is not None and any(func is entry[0] for _, func, _ in connection.run_on_commit):
+        return entry[1]
+
+    batch = factory()
+
+    def callback():
+        if batches.get(name, (None,))[0] is callback:
+            del batches[name]
+        flush(batch)
+
+    transaction.on_commit(callback, using=using)
+    batches[name] = (callback, batch)
+    return batch
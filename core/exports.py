@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+# core/exports.py
+"""
+Exportações CSV/NDJSON em streaming
+
+As linhas saem de ``values_list().iterator(chunk_size=...)``, que no
+PostgreSQL usa um cursor no servidor dentro de uma transação própria:
+a memória do processo fica constante, seja um dia ou um ano de pedidos.
+As linhas são agrupadas em blocos de ~64 KiB antes de cada envio.
+
+O gerador roda depois que os middlewares já devolveram a resposta (e
+restauraram loja/réplica do contexto), por isso o alias e a loja são
+capturados na view e reaplicados aqui.
+
+No ASGI a resposta recebe um iterador assíncrono: cada bloco é uma consulta
+por chave (a ordenação da exportação + pk) em ``sync_to_async``, sem
+transação aberta entre um ``await`` e outro. Os campos da ordenação não
+podem ser nulos.
+
+Células de texto iniciadas por ``= + - @`` (ou tab/CR) saem no CSV com um
+apóstrofo na frente, para a planilha não interpretá-las como fórmula.
+"""
+import csv
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import NotFound
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import IsAuthenticated
+from users.permissions import HasPermission
+from .database.tenants import TenantManager
+
+try:
+    import orjson
+except ImportError:  # dependência opcional
+    orjson = None
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+BUFFER_SIZE = 64 * 1024
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+def _value(value):
+    """Valor de coluna para CSV/NDJSON (datas no fuso local, Decimal exato)"""
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat() if timezone.is_aware(value) else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+def _csv_value(value):
+    """Valor de célula CSV: vazio para None e texto protegido contra fórmulas"""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return "'" + value if value.startswith(FORMULA_PREFIXES) else value
+    return _value(value)
+
+class _Echo:
+    """Arquivo para o csv.writer: devolve a linha em vez de gravar"""
+
+    def write(self, value):
+        return value
+
+class StreamingExport:
+    """Queryset -> linhas CSV/NDJSON geradas sob demanda
+
+    ``columns`` é uma lista de (cabeçalho, lookup de ``values_list``), ex.:
+    ``('Cliente', 'Cliente__Nome')``.
+    """
+
+    def __init__(self, queryset, columns, chunk_size=None):
+        self.queryset = queryset
+        self.headers = [header for header, _ in columns]
+        self.lookups = [lookup for _, lookup in columns]
+        self.chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+        # Ordenação total para os blocos por chave (ASGI)
+        self.ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if not any(field.lstrip('-') in ('pk', queryset.model._meta.pk.name) for field in self.ordering):
+            self.ordering.append('pk')
+        # Capturados no contexto da view (loja/réplica ainda ativas)
+        self.tenant = TenantManager.get_current()
+        self.using = queryset.db
+
+    def rows(self):
+        TenantManager.activate_schema(self.tenant, using=self.using)
+        # Cursor no servidor sem WITH HOLD: precisa de uma transação aberta
+        with transaction.atomic(using=self.using):
+            queryset = self.queryset.using(self.using).values_list(*self.lookups)
+            yield from queryset.iterator(chunk_size=self.chunk_size)
+
+    def _after(self, position):
+        """Q das linhas depois de ``position`` na ordenação (comparação de tuplas)"""
+        condition = None
+        for field, value in reversed(list(zip(self.ordering, position))):
+            name = field.lstrip('-')
+            after = Q(**{f"{name}__{'lt' if field.startswith('-') else 'gt'}": value})
+            condition = after if condition is None else after | (Q(**{name: value}) & condition)
+        return condition
+
+    def chunk(self, position=None):
+        """Próximo bloco de linhas (com os valores da ordenação ao final) depois de ``position``"""
+        TenantManager.activate_schema(self.tenant, using=self.using)
+        queryset = self.queryset.using(self.using)
+        if position is not None:
+            queryset = queryset.filter(self._after(position))
+        fields = [field.lstrip('-') for field in self.ordering]
+        return list(queryset.values_list(*self.lookups, *fields)[:self.chunk_size])
+
+    async def arows(self):
+        fetch = sync_to_async(self.chunk)
+        size, position = len(self.lookups), None
+        while True:
+            rows = await fetch(position)
+            yield [row[:size] for row in rows]
+            if len(rows) < self.chunk_size:
+                return
+            position = rows[-1][size:]
+
+    def header(self, fmt):
+        if fmt != 'csv':
+            return None
+        return csv.writer(_Echo()).writerow(self.headers).encode('utf-8-sig')  # BOM: acentos corretos no Excel
+
+    def csv(self, rows):
+        writer = csv.writer(_Echo())
+        for row in rows:
+            yield writer.writerow([_csv_value(value) for value in row]).encode('utf-8')
+
+    def ndjson(self, rows):
+        headers = self.headers
+        for row in rows:
+            values = dict(zip(headers, (_value(value) for value in row)))
+            if orjson is not None:
+                yield orjson.dumps(values) + b'\n'
+            else:
+                yield (json.dumps(values, ensure_ascii=False) + '\n').encode('utf-8')
+
+    def stream(self, fmt):
+        header = self.header(fmt)
+        if header:
+            yield header
+        yield from self._buffered(getattr(self, fmt)(self.rows()))
+
+    async def astream(self, fmt):
+        header = self.header(fmt)
+        if header:
+            yield header
+        async for rows in self.arows():
+            if rows:
+                yield b''.join(getattr(self, fmt)(rows))
+
+    @staticmethod
+    def _buffered(lines):
+        buffer, size = [], 0
+        for line in lines:
+            buffer.append(line)
+            size += len(line)
+            if size >= BUFFER_SIZE:
+                yield b''.join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield b''.join(buffer)
+
+    def response(self, fmt, filename, asynchronous=False):
+        if fmt not in CONTENT_TYPES:
+            raise NotFound(f'Formato não suportado: {fmt}')
+        content = self.astream(fmt) if asynchronous else self.stream(fmt)
+        response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+        response['Cache-Control'] = 'no-store'
+        return response
+
+class ExportView(GenericAPIView):
+    """GET ``<fmt>/`` (csv ou ndjson) com os filtros de ``filterset_fields``
+
+    Subclasses definem ``queryset``, ``export_columns``, ``export_name`` e
+    ``export_ordering`` (de preferência um índice, percorrido em ordem).
+    Exportar exige ``view_reports`` (dados de clientes em massa).
+    """
+
+    permission_classes = [IsAuthenticated, HasPermission]
+    required_permission = 'view_reports'
+    filter_backends = [DjangoFilterBackend]
+    pagination_class = None
+    export_columns = []
+    export_name = 'export'
+    export_ordering = ['pk']
+
+    def perform_content_negotiation(self, request, force=False):
+        # Accept: text/csv não deve virar 406: o formato vem da URL
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, fmt):
+        queryset = self.filter_queryset(self.get_queryset()).order_by(*self.export_ordering)
+        filename = f"{self.export_name}_{timezone.localdate():%Y%m%d}"
+        asynchronous = isinstance(request._request, ASGIRequest)
+        return StreamingExport(queryset, self.export_columns).response(fmt, filename, asynchronous)
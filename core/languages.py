@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# core/languages.py
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Versão dos idiomas ativos no cache compartilhado (removida em Language.save)
+ACTIVE_LANGUAGES_KEY = 'active_languages'
+
+class LanguageRegistry:
+    """Idiomas ativos em memória: por código, por id e o padrão
+
+    Carregado uma vez por processo e recarregado quando o token em
+    ``active_languages`` muda (conferido no máximo a cada
+    ``LANGUAGE_VERSION_CHECK_INTERVAL`` segundos), sem consultas por request.
+    """
+
+    _lock = threading.Lock()
+    _state = None  # (token, por código, por id, padrão)
+    _checked_at = 0.0
+
+    @staticmethod
+    def _load():
+        from .models import Language
+        languages = list(Language.objects.filter(Ativo=True))
+        by_code = {language.Codigo: language for language in languages}
+        by_id = {language.pk: language for language in languages}
+        default = next((language for language in languages if language.Padrao), None)
+        return by_code, by_id, default
+
+    @staticmethod
+    def _get_state():
+        state = LanguageRegistry._state
+        now = time.monotonic()
+        interval = getattr(settings, 'LANGUAGE_VERSION_CHECK_INTERVAL', 5)
+        if state is not None and now - LanguageRegistry._checked_at < interval:
+            return state
+
+        with LanguageRegistry._lock:
+            state = LanguageRegistry._state
+            if state is not None and now - LanguageRegistry._checked_at < interval:
+                return state
+            token = cache.get(ACTIVE_LANGUAGES_KEY)
+            if state is None or token is None or token != state[0]:
+                if token is None:
+                    token = uuid.uuid4().hex
+                    if not cache.add(ACTIVE_LANGUAGES_KEY, token, None):
+                        token = cache.get(ACTIVE_LANGUAGES_KEY, token)
+                state = (token, *LanguageRegistry._load())
+                LanguageRegistry._state = state
+            LanguageRegistry._checked_at = now
+        return state
+
+    @staticmethod
+    def invalidate(using=None):
+        """Recarrega os idiomas em todos os processos após o commit"""
+        def reset():
+            cache.delete(ACTIVE_LANGUAGES_KEY)
+            LanguageRegistry._state = None
+        transaction.on_commit(reset, using=using)
+
+    @staticmethod
+    def get_by_code(code):
+        return LanguageRegistry._get_state()[1].get(code)
+
+    @staticmethod
+    def get_by_id(language_id):
+        return LanguageRegistry._get_state()[2].get(language_id)
+
+    @staticmethod
+    def get_default():
+        return LanguageRegistry._get_state()[3]
+
+    @staticmethod
+    def get_active():
+        return list(LanguageRegistry._get_state()[1].values())
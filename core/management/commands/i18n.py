@@ -1,14 +1,146 @@
 # -*- coding: utf-8 -*-
-# core/management/commands/load_base_translations.py
-from django.core.management.base import BaseCommand
-from core.models import Language, Translation
+# core/management/commands/i18n.py
+import ast
+import json
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Language
+from core.translation import TranslationManager
+
+# Traduções base: chave -> {idioma: valor}
+BASE_TRANSLATIONS = {
+    # Comum
+    'common.save': {'pt-br': 'Salvar', 'en-us': 'Save'},
+    'common.cancel': {'pt-br': 'Cancelar', 'en-us': 'Cancel'},
+    'common.delete': {'pt-br': 'Excluir', 'en-us': 'Delete'},
+    'common.edit': {'pt-br': 'Editar', 'en-us': 'Edit'},
+    'common.view': {'pt-br': 'Visualizar', 'en-us': 'View'},
+    'common.add': {'pt-br': 'Adicionar', 'en-us': 'Add'},
+    'common.search': {'pt-br': 'Pesquisar', 'en-us': 'Search'},
+    'common.loading': {'pt-br': 'Carregando...', 'en-us': 'Loading...'},
+    'common.error': {'pt-br': 'Erro', 'en-us': 'Error'},
+    'common.success': {'pt-br': 'Sucesso', 'en-us': 'Success'},
+    'common.warning': {'pt-br': 'Atenção', 'en-us': 'Warning'},
+    'common.info': {'pt-br': 'Informação', 'en-us': 'Information'},
+    'common.language_changed': {'pt-br': 'Idioma alterado com sucesso', 'en-us': 'Language changed successfully'},
+    'common.error_changing_language': {'pt-br': 'Erro ao alterar idioma', 'en-us': 'Error changing language'},
+
+    # Autenticação
+    'auth.login': {'pt-br': 'Entrar', 'en-us': 'Login'},
+    'auth.logout': {'pt-br': 'Sair', 'en-us': 'Logout'},
+    'auth.email': {'pt-br': 'E-mail', 'en-us': 'Email'},
+    'auth.password': {'pt-br': 'Senha', 'en-us': 'Password'},
+    'auth.remember_me': {'pt-br': 'Lembrar-me', 'en-us': 'Remember me'},
+    'auth.forgot_password': {'pt-br': 'Esqueci minha senha', 'en-us': 'Forgot password'},
+    'auth.login_success': {'pt-br': 'Login realizado com sucesso', 'en-us': 'Login successful'},
+    'auth.login_error': {'pt-br': 'Credenciais inválidas', 'en-us': 'Invalid credentials'},
+
+    # Dashboard
+    'dashboard.title': {'pt-br': 'Dashboard', 'en-us': 'Dashboard'},
+    'dashboard.welcome': {'pt-br': 'Bem-vindo, {{name}}!', 'en-us': 'Welcome, {{name}}!'},
+    'dashboard.total_sales': {'pt-br': 'Vendas Totais', 'en-us': 'Total Sales'},
+    'dashboard.orders': {'pt-br': 'Pedidos', 'en-us': 'Orders'},
+    'dashboard.customers': {'pt-br': 'Clientes', 'en-us': 'Customers'},
+    'dashboard.products': {'pt-br': 'Produtos', 'en-us': 'Products'},
+
+    # Menu
+    'menu.dashboard': {'pt-br': 'Dashboard', 'en-us': 'Dashboard'},
+    'menu.products': {'pt-br': 'Produtos', 'en-us': 'Products'},
+    'menu.orders': {'pt-br': 'Pedidos', 'en-us': 'Orders'},
+    'menu.customers': {'pt-br': 'Clientes', 'en-us': 'Customers'},
+    'menu.settings': {'pt-br': 'Configurações', 'en-us': 'Settings'},
+
+    # Produtos
+    'products.title': {'pt-br': 'Produtos', 'en-us': 'Products'},
+    'products.add': {'pt-br': 'Adicionar Produto', 'en-us': 'Add Product'},
+    'products.name': {'pt-br': 'Nome', 'en-us': 'Name'},
+    'products.price': {'pt-br': 'Preço', 'en-us': 'Price'},
+    'products.stock': {'pt-br': 'Estoque', 'en-us': 'Stock'},
+    'products.category': {'pt-br': 'Categoria', 'en-us': 'Category'},
+
+    # Pedidos
+    'orders.title': {'pt-br': 'Pedidos', 'en-us': 'Orders'},
+    'orders.status': {'pt-br': 'Status', 'en-us': 'Status'},
+    'orders.total': {'pt-br': 'Total', 'en-us': 'Total'},
+    'orders.date': {'pt-br': 'Data', 'en-us': 'Date'},
+}
+
+
+def read_json(path, language=None):
+    """JSON ``{chave: {idioma: valor}}`` ou plano ``{chave: valor}`` (idioma pelo argumento ou nome do arquivo)"""
+    with open(path, encoding='utf-8') as handle:
+        data = json.load(handle)
+    if not isinstance(data, dict):
+        raise CommandError(f'{path}: esperado um objeto JSON')
+    for chave, value in data.items():
+        if isinstance(value, dict):
+            for lang_code, valor in value.items():
+                yield chave, lang_code, valor, ''
+        else:
+            yield chave, language or _language_from_filename(path), value, ''
+
+def read_po(path, language=None):
+    """Arquivo gettext .po: msgctxt -> Contexto, msgid -> Chave, msgstr -> Valor
+
+    Translation guarda um único Valor por chave: entradas com plural
+    (msgid_plural/msgstr[n]) interrompem a leitura em vez de serem descartadas.
+    """
+    entries, entry, field = [], {}, None
+    with open(path, encoding='utf-8') as handle:
+        for numero, line in enumerate(list(handle) + [''], start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                if entry:
+                    entries.append(entry)
+                    entry, field = {}, None
+                continue
+            if line.startswith('"') and field:
+                entry[field] += ast.literal_eval(line)
+                continue
+            field, _, value = line.partition(' ')
+            if field == 'msgid_plural' or field.startswith('msgstr['):
+                raise ValueError(
+                    f"linha {numero}: formas plurais não suportadas (msgid {entry.get('msgid', '')!r})"
+                )
+            if field in entry:
+                # Nova entrada sem linha em branco entre elas
+                entries.append(entry)
+                entry = {}
+            entry[field] = ast.literal_eval(value)
+
+    for entry in entries:
+        if entry.get('msgid') == '':
+            # Cabeçalho: "Language: en_US"
+            for header in entry.get('msgstr', '').splitlines():
+                name, _, value = header.partition(':')
+                if name.strip().lower() == 'language' and value.strip() and not language:
+                    language = value.strip().lower().replace('_', '-')
+            continue
+        if entry.get('msgid') and entry.get('msgstr'):
+            yield (
+                entry['msgid'], language or _language_from_filename(path),
+                entry['msgstr'], entry.get('msgctxt', '')
+            )
+
+def _language_from_filename(path):
+    return os.path.splitext(os.path.basename(path))[0].lower().replace('_', '-')
 
 class Command(BaseCommand):
     help = 'Reload all system language messages i18n'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*', help='Catálogos adicionais (.json ou .po)')
+        parser.add_argument('--language', help='Idioma dos arquivos planos (padrão: cabeçalho .po ou nome do arquivo)')
+        parser.add_argument('--overwrite', action='store_true', help='Atualiza valores já existentes')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Linhas por INSERT')
+        parser.add_argument('--skip-base', action='store_true', help='Não carrega as traduções base')
     
     def handle(self, *args, **options):
+        started = time.perf_counter()
+        
         # Criar idiomas padrão
-        pt_br, created = Language.objects.get_or_create(
+        Language.objects.get_or_create(
             Codigo='pt-br',
             defaults={
                 'Nome': 'Português Brasil',
@@ -19,7 +151,7 @@ class Command(BaseCommand):
             }
         )
         
-        en_us, created = Language.objects.get_or_create(
+        Language.objects.get_or_create(
             Codigo='en-us',
             defaults={
                 'Nome': 'English United States',
@@ -30,74 +162,34 @@ class Command(BaseCommand):
             }
         )
         
-        # Traduções base
-        base_translations = {
-            # Comum
-            'common.save': {'pt-br': 'Salvar', 'en-us': 'Save'},
-            'common.cancel': {'pt-br': 'Cancelar', 'en-us': 'Cancel'},
-            'common.delete': {'pt-br': 'Excluir', 'en-us': 'Delete'},
-            'common.edit': {'pt-br': 'Editar', 'en-us': 'Edit'},
-            'common.view': {'pt-br': 'Visualizar', 'en-us': 'View'},
-            'common.add': {'pt-br': 'Adicionar', 'en-us': 'Add'},
-            'common.search': {'pt-br': 'Pesquisar', 'en-us': 'Search'},
-            'common.loading': {'pt-br': 'Carregando...', 'en-us': 'Loading...'},
-            'common.error': {'pt-br': 'Erro', 'en-us': 'Error'},
-            'common.success': {'pt-br': 'Sucesso', 'en-us': 'Success'},
-            'common.warning': {'pt-br': 'Atenção', 'en-us': 'Warning'},
-            'common.info': {'pt-br': 'Informação', 'en-us': 'Information'},
-            'common.language_changed': {'pt-br': 'Idioma alterado com sucesso', 'en-us': 'Language changed successfully'},
-            'common.error_changing_language': {'pt-br': 'Erro ao alterar idioma', 'en-us': 'Error changing language'},
-            
-            # Autenticação
-            'auth.login': {'pt-br': 'Entrar', 'en-us': 'Login'},
-            'auth.logout': {'pt-br': 'Sair', 'en-us': 'Logout'},
-            'auth.email': {'pt-br': 'E-mail', 'en-us': 'Email'},
-            'auth.password': {'pt-br': 'Senha', 'en-us': 'Password'},
-            'auth.remember_me': {'pt-br': 'Lembrar-me', 'en-us': 'Remember me'},
-            'auth.forgot_password': {'pt-br': 'Esqueci minha senha', 'en-us': 'Forgot password'},
-            'auth.login_success': {'pt-br': 'Login realizado com sucesso', 'en-us': 'Login successful'},
-            'auth.login_error': {'pt-br': 'Credenciais inválidas', 'en-us': 'Invalid credentials'},
-            
-            # Dashboard
-            'dashboard.title': {'pt-br': 'Dashboard', 'en-us': 'Dashboard'},
-            'dashboard.welcome': {'pt-br': 'Bem-vindo, {{name}}!', 'en-us': 'Welcome, {{name}}!'},
-            'dashboard.total_sales': {'pt-br': 'Vendas Totais', 'en-us': 'Total Sales'},
-            'dashboard.orders': {'pt-br': 'Pedidos', 'en-us': 'Orders'},
-            'dashboard.customers': {'pt-br': 'Clientes', 'en-us': 'Customers'},
-            'dashboard.products': {'pt-br': 'Produtos', 'en-us': 'Products'},
-            
-            # Menu
-            'menu.dashboard': {'pt-br': 'Dashboard', 'en-us': 'Dashboard'},
-            'menu.products': {'pt-br': 'Produtos', 'en-us': 'Products'},
-            'menu.orders': {'pt-br': 'Pedidos', 'en-us': 'Orders'},
-            'menu.customers': {'pt-br': 'Clientes', 'en-us': 'Customers'},
-            'menu.settings': {'pt-br': 'Configurações', 'en-us': 'Settings'},
-            
-            # Produtos
-            'products.title': {'pt-br': 'Produtos', 'en-us': 'Products'},
-            'products.add': {'pt-br': 'Adicionar Produto', 'en-us': 'Add Product'},
-            'products.name': {'pt-br': 'Nome', 'en-us': 'Name'},
-            'products.price': {'pt-br': 'Preço', 'en-us': 'Price'},
-            'products.stock': {'pt-br': 'Estoque', 'en-us': 'Stock'},
-            'products.category': {'pt-br': 'Categoria', 'en-us': 'Category'},
-            
-            # Pedidos
-            'orders.title': {'pt-br': 'Pedidos', 'en-us': 'Orders'},
-            'orders.status': {'pt-br': 'Status', 'en-us': 'Status'},
-            'orders.total': {'pt-br': 'Total', 'en-us': 'Total'},
-            'orders.date': {'pt-br': 'Data', 'en-us': 'Date'},
-        }
+        entries = []
+        if not options['skip_base']:
+            entries.extend(
+                (chave, lang_code, valor, '')
+                for chave, translations in BASE_TRANSLATIONS.items()
+                for lang_code, valor in translations.items()
+            )
+        for path in options['files']:
+            reader = read_po if path.lower().endswith('.po') else read_json
+            try:
+                entries.extend(reader(path, options['language']))
+            except (OSError, ValueError, SyntaxError) as e:
+                raise CommandError(f'Erro ao ler {path}: {e}')
         
-        # Criar traduções
-        for key, translations in base_translations.items():
-            for lang_code, value in translations.items():
-                language = Language.objects.get(Codigo=lang_code)
-                Translation.objects.get_or_create(
-                    Chave=key,
-                    Idioma=language,
-                    defaults={'Valor': value}
-                )
+        # Idiomas resolvidos uma única vez
+        languages = Language.objects.in_bulk({lang_code for _, lang_code, _, _ in entries}, field_name='Codigo')
+        unknown = sorted({lang_code for _, lang_code, _, _ in entries} - set(languages))
+        if unknown:
+            raise CommandError(f"Idiomas não cadastrados: {', '.join(unknown)}")
+        
+        inserted, updated, unchanged = TranslationManager.bulk_upsert(
+            entries, languages, overwrite=options['overwrite'], batch_size=options['batch_size']
+        )
         
+        self.stdout.write(
+            f'{len(entries)} traduções lidas: {inserted} inseridas, {updated} atualizadas, '
+            f'{unchanged} inalteradas em {time.perf_counter() - started:.2f}s'
+        )
         self.stdout.write(
             self.style.SUCCESS('i18n reload with success!')
         )
@@ -32,6 +32,9 @@ class Command(BaseCommand):
             from django.core.management import call_command
             call_command('migrate')
             
+            # Schemas das lojas (TENANTS)
+            call_command('tenants')
+            
             self.stdout.write(
                 self.style.SUCCESS('BRAVA Lite database configurated successfuly!')
             )
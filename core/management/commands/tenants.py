@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# core/management/commands/tenants.py
+from django.core.management.base import BaseCommand, CommandError
+from core.database.tenants import TenantManager
+
+class Command(BaseCommand):
+    help = 'Cria e migra os schemas das lojas (TENANTS)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('lojas', nargs='*', help='Slugs das lojas (padrão: todas)')
+
+    def handle(self, *args, **options):
+        tenants = TenantManager.get_tenants()
+        slugs = options['lojas'] or list(tenants)
+        unknown = [slug for slug in slugs if slug not in tenants]
+        if unknown:
+            raise CommandError(f"Lojas não encontradas: {', '.join(unknown)}")
+
+        for slug in slugs:
+            self.stdout.write(f"[INFO] Provisioning {slug} ({tenants[slug]['SCHEMA']})")
+            TenantManager.provision(slug, verbosity=options['verbosity'], interactive=False)
+
+        self.stdout.write(
+            self.style.SUCCESS('[SUCCESS] Tenant schemas provisioning end successfuly!')
+        )
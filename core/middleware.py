@@ -1,11 +1,22 @@
 # -*- coding: utf-8 -*-
+import re
+from django.conf import settings
+from django.http import JsonResponse
+from django.middleware.gzip import GZipMiddleware
 from django.utils import translation
-from django.db import connection
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
+from .audit import AuditContext
 from .models import Language
-from threading import local
+from .database.replicas import ReplicaManager
+from .database.tenants import TenantManager
 
-_user = local()
+try:
+    import brotli
+except ImportError:  # dependência opcional
+    brotli = None
+
+re_accepts_brotli = re.compile(r'\bbr\b')
 
 class UserLanguageMiddleware(MiddlewareMixin):
     """Middleware para definir idioma baseado no usuário"""
@@ -24,24 +35,115 @@ class UserLanguageMiddleware(MiddlewareMixin):
                     request.LANGUAGE_CODE = default_lang.Codigo
 
 class DatabaseSchemaMiddleware(MiddlewareMixin):
-    """Middleware para garantir que o schema correto seja usado"""
+    """Middleware para garantir que o schema correto seja usado
+
+    Resolve a loja do request (TenantManager) e ajusta o search_path da
+    conexão compartilhada sem abri-la nem executar SQL quando o schema
+    já é o último usado (SchemaManager).
+    """
     
     def process_request(self, request):
         """Configura schema no início da requisição"""
-        with connection.cursor() as cursor:
-            cursor.execute('SET search_path TO BRAVA, public;')
+        try:
+            tenant = TenantManager.resolve(request)
+        except LookupError as e:
+            return JsonResponse({'error': str(e)}, status=404)
+        request.tenant = tenant
+        request._tenant_token = TenantManager.activate(tenant)
+        TenantManager.activate_schema(tenant)
+    
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Usuário da sessão sem acesso à loja: 403 (JWT: ClaimsJWTAuthentication)"""
+        if not TenantManager.has_access(getattr(request, 'user', None), getattr(request, 'tenant', None)):
+            return JsonResponse({'error': 'Usuário sem acesso a esta loja'}, status=403)
     
     def process_response(self, request, response):
         """Limpa configurações após a resposta"""
+        token = getattr(request, '_tenant_token', None)
+        if token is not None:
+            TenantManager.deactivate(token)
+            request._tenant_token = None
+        return response
+ 
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Contexto de roteamento para réplica por request (read-your-writes)"""
+    
+    def process_request(self, request):
+        request._replica_token = ReplicaManager.begin(request)
+    
+    def process_response(self, request, response):
+        token = getattr(request, '_replica_token', None)
+        if token is not None:
+            ReplicaManager.end(token)
+            request._replica_token = None
         return response
  
 class AuditMiddleware(MiddlewareMixin):
-    """Middleware para capturar usuário atual para auditoria"""
+    """Middleware para capturar usuário atual para auditoria
+
+    Guarda o request no contexto (ContextVar, seguro em ASGI); o usuário
+    é lido só quando algo é gravado, já autenticado pelo Django ou DRF.
+    """
     
     def process_request(self, request):
-        _user.value = getattr(request, 'user', None)
+        request._audit_token = AuditContext.activate(request)
+    
+    def process_response(self, request, response):
+        token = getattr(request, '_audit_token', None)
+        if token is not None:
+            AuditContext.deactivate(token)
+            request._audit_token = None
+        return response
+
+class CompressionMiddleware(GZipMiddleware):
+    """Compressão das respostas JSON/CSV/NDJSON da API
+
+    Brotli quando instalado e aceito pelo cliente, senão GZip (com o
+    preenchimento aleatório do Django contra BREACH). Respostas menores que
+    COMPRESSION_MIN_SIZE não compensam; exportações em streaming são
+    comprimidas bloco a bloco.
+    """
+    
+    content_types = ('application/json', 'application/x-ndjson', 'text/csv')
+    brotli_quality = 4  # conteúdo dinâmico: velocidade acima da taxa
+    
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in self.content_types or response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+            return response
+        
+        accepts_brotli = re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is None or not accepts_brotli or (response.streaming and response.is_async):
+            return super().process_response(request, response)
+        
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.streaming:
+            response.streaming_content = self._compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = brotli.compress(response.content, quality=self.brotli_quality)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+        
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+    
+    def _compress_sequence(self, sequence):
+        compressor = brotli.Compressor(quality=self.brotli_quality)
+        for chunk in sequence:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
 
 def get_current_user():
     """Retorna o usuário atual para uso nos models"""
-    return getattr(_user, 'value', None)
+    return AuditContext.get_user()
 
@@ -2,8 +2,9 @@
 import uuid
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from django.core.cache import cache
+from .audit import AUDIT_UPDATE_FIELDS, AuditContext, AuditManager
 from .database.manager import SchemaModelMixin
+from .languages import LanguageRegistry
 
 class BaseAuditModel(SchemaModelMixin, models.Model):
     """Model base com campos de auditoria"""
@@ -13,6 +14,7 @@ class BaseAuditModel(SchemaModelMixin, models.Model):
         max_length=50, 
         blank=True, 
         null=True, 
+        default=AuditContext.get_username,
         db_column="USUARIO_INCLUSAO"
     )
     UsuarioAlteracao = models.CharField(
@@ -20,6 +22,7 @@ class BaseAuditModel(SchemaModelMixin, models.Model):
         max_length=50, 
         blank=True, 
         null=True, 
+        default=AuditContext.get_username,
         db_column="USUARIO_ALTERACAO"
     )
     DataInclusao = models.DateTimeField(
@@ -33,8 +36,20 @@ class BaseAuditModel(SchemaModelMixin, models.Model):
         db_column="DATA_ALTERACAO"
     )
     
+    objects = AuditManager()
+    
     class Meta:
         abstract = True
+    
+    def save(self, *args, **kwargs):
+        # UsuarioInclusao vem do default na criação da instância (ver core/audit.py)
+        self.UsuarioAlteracao = AuditContext.get_username()
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            kwargs['update_fields'] = [*update_fields, *(
+                field for field in AUDIT_UPDATE_FIELDS if field not in update_fields
+            )]
+        super().save(*args, **kwargs)
 
 class Language(BaseAuditModel):
     """Modelo para idiomas do sistema"""
@@ -91,7 +106,27 @@ class Language(BaseAuditModel):
         if self.Padrao:
             Language.objects.exclude(pk=self.pk).update(Padrao=False)
         super().save(*args, **kwargs)
-        cache.delete('active_languages')
+        LanguageRegistry.invalidate(using=kwargs.get('using') or self._state.db)
+    
+    @classmethod
+    def get_active_languages(cls):
+        """Idiomas ativos (registro em memória)"""
+        return [
+            {
+                'IdiomaId': language.pk,
+                'Codigo': language.Codigo,
+                'Nome': language.Nome,
+                'NomeNativo': language.NomeNativo,
+                'Bandeira': language.Bandeira,
+                'Padrao': language.Padrao,
+            }
+            for language in LanguageRegistry.get_active()
+        ]
+    
+    @classmethod
+    def get_default_language(cls):
+        """Idioma padrão do sistema (registro em memória)"""
+        return LanguageRegistry.get_default()
 
 class Translation(BaseAuditModel):
     """Modelo para traduções customizadas"""
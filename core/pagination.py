@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# core/pagination.py
+"""
+Paginação por chave (keyset) para listas grandes
+
+A posição é o último registro entregue (campo de ordenação + pk como
+desempate), então cada página é uma faixa do índice do campo de ordenação
+em vez de OFFSET: a página 5.000 custa o mesmo que a primeira. A navegação
+é sequencial (``next``/``previous``); não há salto direto para a página N.
+
+O total é opcional (``?count=1``) e estimado: ``pg_class.reltuples`` sem
+filtros, ou COUNT(*) guardado no cache por CACHE_TTL['SHORT'] segundos.
+"""
+import base64
+import hashlib
+import json
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from .cache import versioned_key
+
+class KeysetPagination(BasePagination):
+    """Keyset em (``ordering``, pk), com ``ordering`` vindo da view ou do Meta.ordering do model
+
+    O campo de ordenação não pode ser nulo e deve ter índice próprio.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    max_page_size = 100
+    ordering = None
+
+    def get_page_size(self, request):
+        page_size = getattr(settings, 'REST_FRAMEWORK', {}).get('PAGE_SIZE') or 20
+        try:
+            requested = int(request.query_params.get(self.page_size_query_param, page_size))
+        except ValueError:
+            return page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def get_ordering(self, queryset, view):
+        """(nome do campo, descendente)"""
+        ordering = getattr(view, 'keyset_ordering', None) or self.ordering or queryset.model._meta.ordering[0]
+        return ordering.lstrip('-'), ordering.startswith('-')
+
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps([values[0], str(values[1]), int(reverse)], default=str)
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            value, pk, reverse = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            return value, pk, bool(reverse)
+        except (TypeError, ValueError):
+            raise NotFound('Cursor inválido')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        field, descending = self.get_ordering(queryset, view)
+        self.field = field
+        model_field = queryset.model._meta.get_field(field)
+        cursor = self.decode_cursor(request)
+        self.count = self.get_count(queryset) if self._wants_count(request) else None
+
+        # Página anterior: percorre o índice no sentido oposto e inverte o resultado
+        reverse = bool(cursor and cursor[2])
+        backwards = descending != reverse
+        if cursor is not None:
+            try:
+                value = model_field.to_python(cursor[0])
+                pk = queryset.model._meta.pk.to_python(cursor[1])
+            except ValidationError:
+                raise NotFound('Cursor inválido')
+            op = 'lt' if backwards else 'gt'
+            # Limite redundante no campo indexado: faixa do índice antes do desempate
+            queryset = queryset.filter(**{f'{field}__{op}e': value}).filter(
+                Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'pk__{op}': pk})
+            )
+        prefix = '-' if backwards else ''
+        rows = list(queryset.order_by(f'{prefix}{field}', f'{prefix}pk')[:self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+        self.has_next = has_more if not reverse else cursor is not None
+        self.has_previous = cursor is not None if not reverse else has_more
+        self.rows = rows
+        return rows
+
+    def _position(self, row):
+        return getattr(row, self.field), row.pk
+
+    def get_next_link(self):
+        if not self.has_next or not self.rows:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self._position(self.rows[-1]), False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.rows:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self._position(self.rows[0]), True))
+
+    def _wants_count(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+
+    @staticmethod
+    def estimate_rows(model, using):
+        """Estimativa de linhas da tabela pelas estatísticas do PostgreSQL (None se não houver)"""
+        connection = connections[using]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            # ::regclass resolve a tabela pelo search_path (schema da loja)
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                           [connection.ops.quote_name(model._meta.db_table)])
+            row = cursor.fetchone()
+        return row[0] if row and row[0] >= 0 else None
+
+    def get_count(self, queryset):
+        """Total estimado (sem ORDER BY/LIMIT)"""
+        queryset = queryset.order_by()
+        if not queryset.query.where:
+            estimate = self.estimate_rows(queryset.model, queryset.db)
+            if estimate is not None:
+                return estimate
+        sql, params = queryset.query.sql_with_params()
+        digest = hashlib.sha1(f'{sql}{params}'.encode('utf-8')).hexdigest()
+        key = versioned_key('keyset_count', [], queryset.model._meta.label_lower, digest)
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, settings.CACHE_TTL['SHORT'])
+        return count
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
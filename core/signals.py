@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# core/signals.py
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from .database.schema import SchemaManager
+from .database.sequences import create_sequences
+from .database.tenants import TenantManager
+from .languages import LanguageRegistry
+from .models import Language, Translation
+from .translation import TranslationManager
+
+def invalidate_translations(sender, instance, using, **kwargs):
+    """Traduções ou idiomas alterados: recarrega os catálogos em todos os processos"""
+    TranslationManager.invalidate(using=using)
+
+def create_code_sequences(sender, using, **kwargs):
+    """Sequences dos códigos (pedido, cliente) no schema da conexão e das lojas que a compartilham"""
+    create_sequences(using=using)
+    if using == 'default':
+        shared = [tenant['SCHEMA'] for tenant in TenantManager.get_tenants().values() if not tenant['DEDICATED']]
+        if shared:
+            create_sequences(using=using, schemas=shared)
+
+def invalidate_languages(sender, instance, using, **kwargs):
+    """Idioma removido: recarrega o registro de idiomas ativos"""
+    LanguageRegistry.invalidate(using=using)
+
+post_delete.connect(invalidate_languages, sender=Language, dispatch_uid='languages_delete')
+
+for model in (Language, Translation):
+    post_save.connect(invalidate_translations, sender=model, dispatch_uid=f'translations_{model.__name__}_save')
+    post_delete.connect(invalidate_translations, sender=model, dispatch_uid=f'translations_{model.__name__}_delete')
+
+connection_created.connect(SchemaManager.connection_created, dispatch_uid='brava_search_path')
@@ -1,4 +1,260 @@
 # -*- coding: utf-8 -*-
-from django.test import TestCase
+import json
+import os
+import tempfile
+import uuid
+from unittest import mock
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from api.renderers import ORJSONRenderer
+from users.models import User
+from .audit import AuditContext
+from .cache import bump_tags, bump_tags_on_commit, tag_versions
+from .database.manager import BRAVAManager
+from .database.schema import SchemaManager
+from .database.sequences import CodeGenerator, SequenceBackend, _generators, create_sequences
+from .database.tenants import TenantManager
+from .languages import LanguageRegistry
+from .management.commands.i18n import read_po
+from .models import Language, Translation
+from .translation import TranslationManager
+from .views import TranslationViewSet
 
-# Create your tests here.
+class SequenceBackendTests(TransactionTestCase):
+    """Blocos hi/lo das sequences de códigos (SequenceBackend)"""
+
+    def setUp(self):
+        self.generator = CodeGenerator('SEQ_TST_CODIGO', prefix='T', width=4)
+        self.addCleanup(_generators.remove, self.generator)
+        create_sequences(block_size=3)
+        self.addCleanup(self.drop_sequence, 'SEQ_TST_CODIGO')
+
+    @staticmethod
+    def drop_sequence(name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP SEQUENCE IF EXISTS "{name}"')
+
+    @staticmethod
+    def sequence_exists(name):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT to_regclass(%s)', [f'"{name}"'])
+            return cursor.fetchone()[0] is not None
+
+    def test_post_migrate_created_model_sequences(self):
+        for name in ('SEQ_PED_PEDIDO_NUMERO', 'SEQ_CSM_CLIENTE_CODIGO'):
+            self.assertTrue(self.sequence_exists(name), name)
+
+    def test_allocation_is_consecutive_across_blocks(self):
+        backend = SequenceBackend(BLOCK_SIZE=3)
+        codes = backend.allocate(self.generator, 4) + backend.allocate(self.generator, 3)
+        self.assertEqual(codes, [f'T{value:04d}' for value in range(1, 8)])
+
+    def test_processes_get_disjoint_blocks(self):
+        first, second = SequenceBackend(BLOCK_SIZE=3), SequenceBackend(BLOCK_SIZE=3)
+        codes = first.allocate(self.generator, 2) + second.allocate(self.generator, 2) + first.allocate(self.generator, 1)
+        self.assertEqual(codes, ['T0001', 'T0002', 'T0004', 'T0005', 'T0003'])
+
+    def test_rollback_keeps_backend_usable(self):
+        backend = SequenceBackend(BLOCK_SIZE=3)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                backend.allocate(self.generator, 1)
+                raise RuntimeError
+        self.assertEqual(backend.allocate(self.generator, 3), ['T0002', 'T0003', 'T0004'])
+
+    def test_missing_sequence_is_not_created_at_runtime(self):
+        generator = CodeGenerator('SEQ_TST_AUSENTE')
+        _generators.remove(generator)
+        with self.assertRaises(ImproperlyConfigured):
+            SequenceBackend().allocate(generator, 1)
+        self.assertFalse(self.sequence_exists('SEQ_TST_AUSENTE'))
+
+@override_settings(TENANTS={'tst': {'SCHEMA': 'LOJA_TST', 'DEDICATED': False}})
+class TenantProvisioningTests(TransactionTestCase):
+    """Schema da loja criado e migrado antes de ser ativado"""
+
+    def setUp(self):
+        self.addCleanup(TenantManager._provisioned.clear)
+        self.addCleanup(self.drop_schema)
+
+    @staticmethod
+    def drop_schema():
+        with connection.cursor() as cursor:
+            cursor.execute('DROP SCHEMA IF EXISTS LOJA_TST CASCADE')
+
+    def test_unprovisioned_tenant_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            TenantManager.activate('tst')
+
+    def test_command_provisions_schema(self):
+        call_command('tenants', stdout=StringIO(), verbosity=0)
+        self.assertIn(('default', 'tst'), TenantManager._provisioned)
+        TenantManager._provisioned.clear()
+        self.assertTrue(TenantManager.is_provisioned('tst'))
+
+        context = TenantManager.activate('tst')
+        try:
+            self.assertEqual(BRAVAManager().allow_migrate('default', 'orders'), True)
+            self.assertEqual(BRAVAManager().allow_migrate('default', 'users'), False)
+            self.assertEqual(BRAVAManager().allow_migrate('default', 'auth'), False)
+        finally:
+            TenantManager.deactivate(context)
+        self.assertIsNone(BRAVAManager().allow_migrate('default', 'auth'))
+        self.assertEqual(SchemaManager.current(), BRAVAManager.SCHEMA)
+
+class TranslationCatalogTests(TransactionTestCase):
+    """Catálogos em memória apenas para idiomas ativos"""
+
+    def setUp(self):
+        idioma = Language.objects.create(Codigo='pt-br', Nome='Português', NomeNativo='Português', Padrao=True)
+        Translation.objects.create(Chave='menu.inicio', Idioma=idioma, Valor='Início')
+        cache.clear()
+        LanguageRegistry._state = None
+        TranslationManager._reset()
+
+    def test_unknown_language_uses_default_without_caching(self):
+        for code in ('xx', 'zz-' + 'a' * 50, 'PT-BR'):
+            self.assertEqual(TranslationManager.translate('menu.inicio', code), 'Início')
+        self.assertEqual(list(TranslationManager._catalogs), ['pt-br'])
+
+    def test_resolve_language(self):
+        self.assertEqual(TranslationManager.resolve_language('PT-BR'), 'pt-br')
+        self.assertIsNone(TranslationManager.resolve_language('xx'))
+
+class CacheTagTests(TestCase):
+    """Contadores por loja só para tags de apps da loja"""
+
+    @override_settings(TENANTS={'loja1': {'SCHEMA': 'LOJA1', 'DEDICATED': False}})
+    @mock.patch.object(TenantManager, 'is_provisioned', return_value=True)
+    def test_shared_tags_are_global(self, is_provisioned):
+        before = tag_versions(['permissions', 'orders'])
+        context = TenantManager.activate('loja1')
+        try:
+            bump_tags('permissions', 'orders')
+            inside = tag_versions(['permissions', 'orders'])
+        finally:
+            TenantManager.deactivate(context)
+        after = tag_versions(['permissions', 'orders'])
+
+        self.assertEqual(after['permissions'], inside['permissions'])
+        self.assertEqual(after['permissions'], before['permissions'] + 1)
+        self.assertEqual(after['orders'], before['orders'])
+
+    def test_on_commit_bumps_once_and_drops_rolled_back_tags(self):
+        before = tag_versions(['orders', 'products'])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    bump_tags_on_commit('products')
+                    raise RuntimeError
+            with transaction.atomic():
+                for _ in range(3):
+                    bump_tags_on_commit('orders')
+        after = tag_versions(['orders', 'products'])
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(after['orders'], before['orders'] + 1)
+        self.assertEqual(after['products'], before['products'])
+
+class AuditFieldsTests(TestCase):
+    """UsuarioAlteracao/DataAlteracao em save(update_fields) e upserts em lote"""
+
+    def setUp(self):
+        with AuditContext.use('criador'):
+            self.idioma = Language.objects.create(Codigo='en', Nome='English', NomeNativo='English')
+        self.created_at = self.idioma.DataAlteracao
+
+    def test_save_with_update_fields_stamps_audit(self):
+        with AuditContext.use('editor'):
+            self.idioma.Nome = 'Inglês'
+            self.idioma.save(update_fields=['Nome'])
+        self.idioma.refresh_from_db()
+        self.assertEqual((self.idioma.Nome, self.idioma.UsuarioAlteracao), ('Inglês', 'editor'))
+        self.assertGreater(self.idioma.DataAlteracao, self.created_at)
+
+    def test_bulk_upsert_stamps_audit(self):
+        Translation.objects.create(Chave='menu.sair', Idioma=self.idioma, Valor='Exit')
+        with AuditContext.use('importador'):
+            Translation.objects.bulk_create(
+                [Translation(Chave='menu.sair', Idioma=self.idioma, Valor='Logout')],
+                update_conflicts=True, unique_fields=['Chave', 'Idioma'], update_fields=['Valor'],
+            )
+        translation = Translation.objects.get(Chave='menu.sair')
+        self.assertEqual((translation.Valor, translation.UsuarioAlteracao), ('Logout', 'importador'))
+        self.assertGreater(translation.DataAlteracao, translation.DataInclusao)
+
+class ORJSONRendererTests(SimpleTestCase):
+    """api.renderers.ORJSONRenderer com a mesma saída do JSONRenderer do DRF"""
+
+    def test_matches_drf_output(self):
+        data = {
+            1: 'chave inteira',
+            'data': datetime(2025, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc),
+            'valor': Decimal('10.50'),
+        }
+        rendered = ORJSONRenderer().render(data)
+        self.assertEqual(json.loads(rendered), json.loads(JSONRenderer().render(data)))
+        self.assertIn(b'"2025-01-02T03:04:05Z"', rendered)
+
+    def test_accepts_uuid_keys(self):
+        key = uuid.UUID('12345678-1234-5678-1234-567812345678')
+        self.assertEqual(json.loads(ORJSONRenderer().render({key: 1})), {str(key): 1})
+
+class ReadPoTests(TestCase):
+    """Leitura de catálogos .po pelo comando i18n"""
+
+    def write_po(self, content):
+        handle, path = tempfile.mkstemp(suffix='.po')
+        with os.fdopen(handle, 'w', encoding='utf-8') as po:
+            po.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_reads_context_and_header_language(self):
+        path = self.write_po(
+            'msgid ""\nmsgstr "Language: en_US\\n"\n\n'
+            'msgctxt "menu"\nmsgid "menu.orders"\nmsgstr ""\n"Orders"\n'
+        )
+        self.assertEqual(list(read_po(path)), [('menu.orders', 'en-us', 'Orders', 'menu')])
+
+    def test_plural_forms_fail_loudly(self):
+        path = self.write_po(
+            'msgid "orders.count"\nmsgid_plural "orders.count"\n'
+            'msgstr[0] "{{count}} order"\nmsgstr[1] "{{count}} orders"\n'
+        )
+        with self.assertRaisesRegex(CommandError, 'linha 2: formas plurais'):
+            call_command('i18n', path, language='en-us', skip_base=True, stdout=StringIO())
+
+@mock.patch.object(TranslationViewSet, 'throttle_classes', [])
+class TranslationCatalogApiTests(TestCase):
+    """GET /api/v1/core/translations/catalog/: revalidação com o ETag comprimido"""
+
+    def setUp(self):
+        idioma = Language.objects.create(Codigo='pt-br', Nome='Português', NomeNativo='Português', Padrao=True)
+        for index in range(100):
+            Translation.objects.create(Chave=f'menu.item{index}', Idioma=idioma, Valor=f'Item de menu {index}')
+        cache.clear()
+        LanguageRegistry._state = None
+        TranslationManager._reset()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            username='i18n', email='i18n@example.com', password='x'
+        ))
+
+    @override_settings(COMPRESSION_MIN_SIZE=200)
+    def test_gzip_weak_etag_revalidates(self):
+        url = '/api/v1/core/translations/catalog/?lang=pt-br'
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual((response.status_code, response['Content-Encoding']), (200, 'gzip'))
+        self.assertTrue(response['ETag'].startswith('W/"'))
+
+        revalidated = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
@@ -1,59 +1,195 @@
 # -*- coding: utf-8 -*-
 # core/translation.py
-from django.core.cache import cache
+import hashlib
+import json
+import threading
+import time
+from types import MappingProxyType
+from django.conf import settings
+from django.db import transaction
 from django.utils.translation import get_language
-from .models import Language, Translation
+from .cache import bump_tags_on_commit, tag_versions
+from .languages import LanguageRegistry
+from .models import Translation
+
+TRANSLATIONS_TAG = 'translations'
+
+class _Catalog:
+    """Traduções de um idioma: mapa plano (chave completa) e árvore aninhada, somente leitura"""
+
+    def __init__(self, version, flat):
+        self.version = version
+        self.flat = MappingProxyType(flat)
+        self._tree = None
+        self._compiled = None
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            tree = {}
+            for chave, valor in self.flat.items():
+                # Criar estrutura aninhada baseada na chave
+                keys = chave.split('.')
+                current = tree
+                for key in keys[:-1]:
+                    node = current.get(key)
+                    if not isinstance(node, dict):
+                        node = current[key] = {}
+                    current = node
+                current[keys[-1]] = valor
+            self._tree = tree
+        return self._tree
+
+    @property
+    def compiled(self):
+        """Catálogo plano serializado em JSON (bytes) e seu ETag, gerados uma vez por versão"""
+        if self._compiled is None:
+            content = json.dumps(dict(self.flat), ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+            self._compiled = (f'"{hashlib.sha1(content).hexdigest()}"', content)
+        return self._compiled
 
 class TranslationManager:
-    """Gerenciador de traduções customizadas"""
-    
+    """Gerenciador de traduções customizadas
+
+    Os catálogos ficam na memória do processo e são validados contra a versão
+    da tag ``translations`` no cache compartilhado, consultada no máximo a
+    cada ``TRANSLATION_VERSION_CHECK_INTERVAL`` segundos. Alterações em
+    ``Translation``/``Language`` incrementam a versão (ver core/signals.py).
+    """
+
+    _catalogs = {}
+    _lock = threading.Lock()
+    _version = None
+    _version_checked_at = 0.0
+
+    @staticmethod
+    def current_version():
+        """Versão das traduções (cache compartilhado, com intervalo mínimo entre leituras)"""
+        now = time.monotonic()
+        interval = getattr(settings, 'TRANSLATION_VERSION_CHECK_INTERVAL', 5)
+        if TranslationManager._version is None or now - TranslationManager._version_checked_at >= interval:
+            TranslationManager._version = tag_versions([TRANSLATIONS_TAG])[TRANSLATIONS_TAG]
+            TranslationManager._version_checked_at = now
+        return TranslationManager._version
+
+    @staticmethod
+    def invalidate(using=None):
+        """Invalida os catálogos de todos os processos após o commit"""
+        bump_tags_on_commit(TRANSLATIONS_TAG, using=using)
+        transaction.on_commit(TranslationManager._reset, using=using)
+
+    @staticmethod
+    def _reset():
+        TranslationManager._catalogs = {}
+        TranslationManager._version = None
+
+    @staticmethod
+    def load_catalog(language_code):
+        """Lê as traduções do idioma no banco (mapa plano chave -> valor)"""
+        return dict(
+            Translation.objects.filter(
+                Idioma__Codigo=language_code, Idioma__Ativo=True
+            ).values_list('Chave', 'Valor')
+        )
+
+    @staticmethod
+    def resolve_language(language_code):
+        """Código de um idioma ativo (LanguageRegistry) ou None"""
+        if not language_code:
+            return None
+        for code in (language_code, language_code.lower()):
+            if LanguageRegistry.get_by_code(code) is not None:
+                return code
+        return None
+
+    @staticmethod
+    def get_catalog(language_code=None):
+        """Catálogo do idioma; recarrega do banco apenas quando a versão muda
+
+        Só idiomas ativos têm catálogo em memória: códigos desconhecidos usam
+        o idioma padrão (ou um catálogo vazio, sem cache).
+        """
+        language_code = TranslationManager.resolve_language(language_code or get_language())
+        if language_code is None:
+            default = LanguageRegistry.get_default()
+            if default is None:
+                return _Catalog(None, {})
+            language_code = default.Codigo
+
+        version = TranslationManager.current_version()
+        catalog = TranslationManager._catalogs.get(language_code)
+        if catalog is not None and catalog.version == version:
+            return catalog
+
+        with TranslationManager._lock:
+            catalog = TranslationManager._catalogs.get(language_code)
+            if catalog is None or catalog.version != version:
+                catalog = _Catalog(version, TranslationManager.load_catalog(language_code))
+                # Substitui o dicionário inteiro: leitores sem lock nunca veem um estado parcial
+                TranslationManager._catalogs = {**TranslationManager._catalogs, language_code: catalog}
+        return catalog
+
     @staticmethod
     def get_translations(language_code=None):
         """Retorna todas as traduções para um idioma"""
-        if not language_code:
-            language_code = get_language() or 'pt-br'
-        
-        # Tentar buscar no cache
-        cache_key = f'translations_{language_code}'
-        translations = cache.get(cache_key)
-        
-        if translations is None:
-            try:
-                language = Language.objects.get(Codigo=language_code, Ativo=True)
-                translations = {}
-                
-                for trans in Translation.objects.filter(Idioma=language):
-                    # Criar estrutura aninhada baseada na chave
-                    keys = trans.Chave.split('.')
-                    current = translations
-                    
-                    for key in keys[:-1]:
-                        if key not in current:
-                            current[key] = {}
-                        current = current[key]
-                    
-                    current[keys[-1]] = trans.Valor
-                
-                cache.set(cache_key, translations, 3600)
-                
-            except Language.DoesNotExist:
-                translations = {}
-        
-        return translations
-    
+        return TranslationManager.get_catalog(language_code).tree
+
     @staticmethod
     def translate(key, language_code=None, context=None, default=None):
         """Traduz uma chave específica"""
-        translations = TranslationManager.get_translations(language_code)
-        
-        # Navegar pela estrutura aninhada
-        keys = key.split('.')
-        current = translations
-        
+        catalog = TranslationManager.get_catalog(language_code)
+        value = catalog.flat.get(key)
+        if value is not None:
+            return value
+
+        # Prefixo de chave: retorna o ramo da estrutura aninhada
+        current = catalog.tree
         try:
-            for k in keys:
+            for k in key.split('.'):
                 current = current[k]
             return current
         except (KeyError, TypeError):
             return default or key
 
+    @staticmethod
+    def bulk_upsert(entries, languages, overwrite=False, batch_size=1000):
+        """Grava traduções em lote a partir de (chave, idioma, valor, contexto)
+
+        ``languages`` mapeia código -> Language. As linhas existentes são lidas
+        em uma consulta; apenas chaves novas (e, com ``overwrite``, valores
+        alterados) são gravadas com INSERT ... ON CONFLICT DO UPDATE.
+        Retorna (inseridas, atualizadas, inalteradas).
+        """
+        existing = {
+            (chave, idioma_id): (valor, contexto)
+            for chave, idioma_id, valor, contexto in Translation.objects.filter(
+                Idioma__in=list(languages.values())
+            ).values_list('Chave', 'Idioma_id', 'Valor', 'Contexto')
+        }
+
+        rows, inserted, updated, unchanged = {}, 0, 0, 0
+        for chave, language_code, valor, contexto in entries:
+            idioma = languages[language_code]
+            key = (chave, idioma.pk)
+            current = existing.get(key)
+            if current is None:
+                inserted += key not in rows
+            elif not overwrite or current == (valor, contexto or ''):
+                unchanged += 1
+                continue
+            else:
+                updated += key not in rows
+            # Entradas repetidas: vale a última
+            rows[key] = Translation(Chave=chave, Idioma=idioma, Valor=valor, Contexto=contexto or '')
+
+        if rows:
+            with transaction.atomic():
+                Translation.objects.bulk_create(
+                    list(rows.values()),
+                    batch_size=batch_size,
+                    update_conflicts=True,
+                    unique_fields=['Chave', 'Idioma'],
+                    update_fields=['Valor', 'Contexto', 'DataAlteracao'],
+                )
+                TranslationManager.invalidate()
+        return inserted, updated, unchanged
@@ -1,14 +1,18 @@
 # -*- coding: utf-8 -*-
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
 from django.utils.translation import get_language
 from .models import Language, Translation
+from api.dynamic import DynamicFieldsViewMixin
 from api.serializers import LanguageSerializer, TranslationSerializer
 from .translation import TranslationManager
 
-class LanguageViewSet(viewsets.ReadOnlyModelViewSet):
+class LanguageViewSet(DynamicFieldsViewMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Language.objects.filter(Ativo=True)
     serializer_class = LanguageSerializer
     permission_classes = [IsAuthenticated]
@@ -28,18 +32,44 @@ class LanguageViewSet(viewsets.ReadOnlyModelViewSet):
         return Response({'error': 'Nenhum idioma padrão configurado'}, 
                        status=status.HTTP_404_NOT_FOUND)
 
-class TranslationViewSet(viewsets.ReadOnlyModelViewSet):
+class TranslationViewSet(DynamicFieldsViewMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Translation.objects.all()
     serializer_class = TranslationSerializer
     permission_classes = [IsAuthenticated]
     
+    @staticmethod
+    def _language_code(request):
+        """?lang= precisa ser um idioma ativo; sem ele, o idioma do request"""
+        language_code = request.query_params.get('lang')
+        if language_code is None:
+            return get_language()
+        language_code = TranslationManager.resolve_language(language_code)
+        if language_code is None:
+            raise NotFound('Idioma não encontrado')
+        return language_code
+    
     @action(detail=False, methods=['get'])
     def by_language(self, request):
         """Retorna todas as traduções para um idioma"""
-        language_code = request.query_params.get('lang', get_language())
+        language_code = self._language_code(request)
         translations = TranslationManager.get_translations(language_code)
         return Response(translations)
     
+    @action(detail=False, methods=['get'])
+    def catalog(self, request):
+        """Catálogo plano (chave completa -> valor) pré-serializado, com ETag"""
+        language_code = self._language_code(request)
+        etag, content = TranslationManager.get_catalog(language_code).compiled
+        
+        # Comparação fraca: a compressão (CompressionMiddleware) devolve o ETag como W/"..."
+        response = get_conditional_response(request._request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type='application/json; charset=utf-8')
+        response['ETag'] = etag
+        # Sempre revalida: o ETag muda assim que as traduções mudam
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+    
     @action(detail=False, methods=['post'])
     def change_user_language(self, request):
         """Altera idioma do usuário logado"""
@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
 import uuid
-from django.db import models
+from django.db import models, router
 from django.utils.translation import gettext_lazy as _
 from core.models import BaseAuditModel
+from core.database.sequences import CodeGenerator
+
+CUSTOMER_CODES = CodeGenerator('SEQ_CSM_CLIENTE_CODIGO', prefix='CLI', width=6, random_length=6)
 
 class Customer(BaseAuditModel):
     """Clientes"""
@@ -122,15 +125,17 @@ class Customer(BaseAuditModel):
     
     def save(self, *args, **kwargs):
         if not self.Codigo:
-            self.Codigo = self.generate_customer_code()
+            self.Codigo = self.generate_customer_code(using=kwargs.get('using'))
         super().save(*args, **kwargs)
     
-    def generate_customer_code(self):
+    def generate_customer_code(self, using=None):
         """Gera código único do cliente"""
-        import uuid
-        prefix = 'CLI'
-        uuid_short = str(uuid.uuid4())[:6].upper()
-        return f"{prefix}{uuid_short}"
+        return CUSTOMER_CODES.next(using=using or router.db_for_write(type(self), instance=self))
+    
+    @staticmethod
+    def allocate_customer_codes(count, using=None):
+        """Reserva códigos de cliente em lote"""
+        return CUSTOMER_CODES.allocate(count, using=using or router.db_for_write(Customer))
 
 class CustomerAddress(BaseAuditModel):
     """Endereços dos clientes"""
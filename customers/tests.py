@@ -1,4 +1,59 @@
 # -*- coding: utf-8 -*-
+import csv
+import io
+from unittest import mock
+from asgiref.sync import async_to_sync
 from django.test import TestCase
+from rest_framework.test import APIClient
+from core.exports import StreamingExport
+from users.models import User
+from .models import Customer
+from .views import CustomerExportView
 
-# Create your tests here.
+@mock.patch.object(CustomerExportView, 'throttle_classes', [])
+class CustomerExportTests(TestCase):
+    """GET /api/v1/customers/export/<fmt>/"""
+
+    url = '/api/v1/customers/export/csv/'
+
+    def setUp(self):
+        Customer.objects.create(Codigo='C1', Nome='=HYPERLINK("http://x")', Documento='1')
+        Customer.objects.create(Codigo='C2', Nome='Cliente Dois', Documento='2', Email='@dois')
+        Customer.objects.create(Codigo='C3', Nome='-Três', Documento='3')
+        self.client = APIClient()
+
+    def login(self, papel):
+        self.client.force_authenticate(User.objects.create_user(
+            username=papel.lower(), email=f'{papel.lower()}@example.com', password='x', Papel=papel
+        ))
+
+    @staticmethod
+    def read_csv(content):
+        return list(csv.DictReader(io.StringIO(content.decode('utf-8-sig'))))
+
+    def test_requires_reports_permission(self):
+        self.login('SELLER')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_csv_escapes_formulas(self):
+        self.login('MANAGER')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        rows = self.read_csv(b''.join(response.streaming_content))
+        self.assertEqual([row['Nome'] for row in rows], ["'=HYPERLINK(\"http://x\")", 'Cliente Dois', "'-Três"])
+        self.assertEqual(rows[1]['Email'], "'@dois")
+        self.assertEqual(rows[0]['LimiteCredito'], '0.00')
+
+    def test_async_stream_fetches_keyset_chunks(self):
+        queryset = Customer.objects.order_by('Codigo')
+        export = StreamingExport(queryset, CustomerExportView.export_columns, chunk_size=2)
+
+        async def collect():
+            return [part async for part in export.astream('csv')]
+
+        with mock.patch.object(StreamingExport, 'chunk', autospec=True, side_effect=StreamingExport.chunk) as chunk:
+            parts = async_to_sync(collect)()
+        self.assertEqual(chunk.call_count, 2)
+        rows = self.read_csv(b''.join(parts))
+        self.assertEqual([row['Codigo'] for row in rows], ['C1', 'C2', 'C3'])
+        self.assertEqual(b''.join(parts), b''.join(export.stream('csv')))
@@ -6,5 +6,6 @@ from .views import *
 router = DefaultRouter()
 
 urlpatterns = [
+    path('export/<str:fmt>/', CustomerExportView.as_view(), name='customer-export'),
     path('', include(router.urls)),
 ]
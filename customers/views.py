@@ -1,4 +1,25 @@
 # -*- coding: utf-8 -*-
-from django.shortcuts import render
+from core.exports import ExportView
+from .models import Customer
 
-# Create your views here.
+class CustomerExportView(ExportView):
+    """Exportação de clientes (CSV/NDJSON em streaming)"""
+    queryset = Customer.objects.all()
+    filterset_fields = ['Ativo', 'TipoPessoa', 'Vip']
+    export_name = 'clientes'
+    export_ordering = ['Codigo']
+    export_columns = [
+        ('Codigo', 'Codigo'),
+        ('TipoPessoa', 'TipoPessoa'),
+        ('Nome', 'Nome'),
+        ('NomeFantasia', 'NomeFantasia'),
+        ('Documento', 'Documento'),
+        ('Email', 'Email'),
+        ('Telefone', 'Telefone'),
+        ('Celular', 'Celular'),
+        ('DataNascimento', 'DataNascimento'),
+        ('Ativo', 'Ativo'),
+        ('Vip', 'Vip'),
+        ('LimiteCredito', 'LimiteCredito'),
+        ('DataInclusao', 'DataInclusao'),
+    ]
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+# dashboard/metrics.py
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+from django.db import connections, router, transaction
+from django.db.models import Count, Q, Sum, Value, DecimalField
+from django.db.models.functions import Coalesce, TruncDay, TruncHour
+from django.utils import timezone
+from core.audit import AuditContext
+from core.database.transactions import commit_batch
+from .models import NO_SELLER, DashboardMetric
+
+class DashboardMetricsManager:
+    """Rollups incrementais de pedidos, clientes e produtos (DSH_METRICA)
+
+    As variações são acumuladas no lote da transação (descartado junto num
+    rollback) e aplicadas no commit com um único INSERT ... ON CONFLICT DO
+    UPDATE, que soma as variações à linha do bucket (UNQ_DSH_MET_BUCKET, com o
+    vendedor nulo indexado como NO_SELLER).
+    """
+
+    GRANULARITIES = ['HOUR', 'DAY']
+    SALES_EXCLUDED_STATUSES = ['CANCELLED', 'RETURNED']
+    BUCKET_FIELDS = ['Metrica', 'Granularidade', 'Periodo', 'Status', 'FormaPagamento', 'Vendedor']
+    UPSERT_BATCH_SIZE = 500
+
+    @staticmethod
+    def period_start(value, granularity):
+        """Início da hora/dia de ``value`` no fuso local"""
+        local_value = timezone.localtime(value) if timezone.is_aware(value) else value
+        if granularity == 'DAY':
+            return local_value.replace(hour=0, minute=0, second=0, microsecond=0)
+        return local_value.replace(minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def _new_deltas():
+        return defaultdict(lambda: [0, Decimal('0')])
+
+    @staticmethod
+    def _alias(using):
+        """Banco de escrita das métricas (loja dedicada pelo router)"""
+        return using or router.db_for_write(DashboardMetric)
+
+    @staticmethod
+    @contextmanager
+    def _deltas(using):
+        """Variações da transação atual (aplicadas no commit); em autocommit, aplicadas na saída"""
+        using = DashboardMetricsManager._alias(using)
+        deltas = commit_batch(
+            'dashboard_metrics', lambda pending: DashboardMetricsManager.flush(pending, using=using),
+            factory=DashboardMetricsManager._new_deltas, using=using
+        )
+        if deltas is not None:
+            yield deltas
+            return
+        deltas = DashboardMetricsManager._new_deltas()
+        yield deltas
+        DashboardMetricsManager.flush(deltas, using=using)
+
+    @staticmethod
+    def _accumulate(deltas, metric, when, quantity, value, status, forma_pagamento, vendedor_id):
+        if when is None:
+            when = timezone.now()
+        for granularity in DashboardMetricsManager.GRANULARITIES:
+            key = (
+                metric, granularity, DashboardMetricsManager.period_start(when, granularity),
+                status or '', forma_pagamento or '', vendedor_id
+            )
+            deltas[key][0] += quantity
+            deltas[key][1] += Decimal(value or 0)
+
+    @staticmethod
+    def _accumulate_order(deltas, snapshot, sign):
+        DashboardMetricsManager._accumulate(
+            deltas, 'ORDERS', snapshot['DataPedido'], sign, sign * (snapshot['Total'] or 0),
+            snapshot['Status'], snapshot['FormaPagamento'], snapshot['Vendedor_id']
+        )
+
+    @staticmethod
+    def add(metric, when, quantity, value=0, status='', forma_pagamento='', vendedor_id=None,
+            using=None):
+        """Acumula uma variação para as granularidades hora e dia"""
+        with DashboardMetricsManager._deltas(using) as deltas:
+            DashboardMetricsManager._accumulate(deltas, metric, when, quantity, value, status, forma_pagamento, vendedor_id)
+
+    @staticmethod
+    def add_orders(snapshots, sign=1, using=None):
+        """Soma (sign=1) ou subtrai (sign=-1) pedidos dos seus buckets"""
+        with DashboardMetricsManager._deltas(using) as deltas:
+            for snapshot in snapshots:
+                DashboardMetricsManager._accumulate_order(deltas, snapshot, sign)
+
+    @staticmethod
+    def orders_changed(changes, using=None):
+        """Move pedidos de bucket quando status/forma/vendedor/total mudam"""
+        keys = ['Status', 'FormaPagamento', 'Vendedor_id', 'Total']
+        with DashboardMetricsManager._deltas(using) as deltas:
+            for before, after in changes:
+                if all(before.get(key) == after.get(key) for key in keys):
+                    continue
+                DashboardMetricsManager._accumulate_order(deltas, before, -1)
+                DashboardMetricsManager._accumulate_order(deltas, after, 1)
+
+    @staticmethod
+    def flush(deltas, using=None):
+        """Soma as variações aos buckets (INSERT ... ON CONFLICT DO UPDATE)"""
+        # Ordem fixa das chaves: transações concorrentes travam as linhas na mesma ordem
+        pending = sorted(
+            ((key, delta) for key, delta in deltas.items() if delta[0] or delta[1]),
+            key=lambda item: (*item[0][:5], str(item[0][5] or ''))
+        )
+        if not pending:
+            return
+
+        using = DashboardMetricsManager._alias(using)
+        meta = DashboardMetric._meta
+        quote = connections[using].ops.quote_name
+        column = lambda name: quote(meta.get_field(name).column)
+        table = quote(meta.db_table)
+        insert = [
+            'MetricaId', *DashboardMetricsManager.BUCKET_FIELDS, 'Quantidade', 'Valor',
+            'UsuarioInclusao', 'UsuarioAlteracao', 'DataInclusao', 'DataAlteracao',
+        ]
+        # Mesmas expressões de UNQ_DSH_MET_BUCKET (vendedor nulo = NO_SELLER)
+        conflict = ', '.join(
+            column(name) for name in DashboardMetricsManager.BUCKET_FIELDS if name != 'Vendedor'
+        ) + f", COALESCE({column('Vendedor')}, '{NO_SELLER}'::uuid)"
+        increments = ', '.join(
+            f'{column(name)} = {table}.{column(name)} + EXCLUDED.{column(name)}' for name in ('Quantidade', 'Valor')
+        )
+        sql = (
+            f"INSERT INTO {table} ({', '.join(column(name) for name in insert)}) VALUES {{values}} "
+            f"ON CONFLICT ({conflict}) "
+            f"DO UPDATE SET {increments}, "
+            f"{column('UsuarioAlteracao')} = EXCLUDED.{column('UsuarioAlteracao')}, "
+            f"{column('DataAlteracao')} = EXCLUDED.{column('DataAlteracao')}"
+        )
+        placeholder = f"({', '.join(['%s'] * len(insert))})"
+
+        now, username = timezone.now(), AuditContext.get_username()
+        size = DashboardMetricsManager.UPSERT_BATCH_SIZE
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            for start in range(0, len(pending), size):
+                batch = pending[start:start + size]
+                params = []
+                for key, (quantity, value) in batch:
+                    params.extend([uuid.uuid4(), *key, quantity, value, username, username, now, now])
+                cursor.execute(sql.format(values=', '.join([placeholder] * len(batch))), params)
+
+    @staticmethod
+    def rebuild(since=None, using=None):
+        """Recalcula os rollups a partir das tabelas de origem"""
+        from orders.models import Order
+        from customers.models import Customer
+        from products.models import Product
+
+        using = DashboardMetricsManager._alias(using)
+        tz = timezone.get_current_timezone()
+        truncs = {'HOUR': TruncHour, 'DAY': TruncDay}
+        rows = []
+
+        with transaction.atomic(using=using):
+            existing = DashboardMetric.objects.using(using)
+            if since:
+                # Período parcial: começa no início do dia para manter os rollups diários completos
+                since = DashboardMetricsManager.period_start(since, 'DAY')
+                existing = existing.filter(Periodo__gte=since)
+            existing.delete()
+
+            for granularity, trunc in truncs.items():
+                orders = Order.objects.using(using).order_by()
+                if since:
+                    orders = orders.filter(DataPedido__gte=since)
+                # Forma vazia e nula caem no mesmo bucket (UNQ_DSH_MET_BUCKET)
+                for row in orders.annotate(
+                    periodo=trunc('DataPedido', tzinfo=tz), forma=Coalesce('FormaPagamento', Value(''))
+                ).values(
+                    'periodo', 'Status', 'forma', 'Vendedor_id'
+                ).annotate(quantidade=Count('pk'), valor=Sum('Total')):
+                    rows.append(DashboardMetric(
+                        Metrica='ORDERS',
+                        Granularidade=granularity,
+                        Periodo=row['periodo'],
+                        Status=row['Status'],
+                        FormaPagamento=row['forma'],
+                        Vendedor_id=row['Vendedor_id'],
+                        Quantidade=row['quantidade'],
+                        Valor=row['valor'] or 0,
+                    ))
+
+                for metric, model in [('CUSTOMERS', Customer), ('PRODUCTS', Product)]:
+                    queryset = model.objects.using(using).order_by()
+                    if since:
+                        queryset = queryset.filter(DataInclusao__gte=since)
+                    for row in queryset.annotate(periodo=trunc('DataInclusao', tzinfo=tz)).values(
+                        'periodo'
+                    ).annotate(quantidade=Count('pk')):
+                        rows.append(DashboardMetric(
+                            Metrica=metric,
+                            Granularidade=granularity,
+                            Periodo=row['periodo'],
+                            Quantidade=row['quantidade'],
+                        ))
+
+            DashboardMetric.objects.using(using).bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+    @staticmethod
+    def _filters(start=None, end=None):
+        """Filtros de pedidos e de vendas (pedidos sem cancelados/devolvidos) no período"""
+        orders = Q(Metrica='ORDERS')
+        if start:
+            orders &= Q(Periodo__gte=start)
+        if end:
+            orders &= Q(Periodo__lt=end)
+        return orders, orders & ~Q(Status__in=DashboardMetricsManager.SALES_EXCLUDED_STATUSES)
+
+    @staticmethod
+    def _metrics(granularity, using):
+        # using=None: o router decide (réplica para leituras do dashboard)
+        return DashboardMetric.objects.using(using).filter(Granularidade=granularity).order_by()
+
+    @staticmethod
+    def totals(start=None, end=None, granularity='DAY', using=None):
+        """Totais de vendas, pedidos, clientes e produtos (uma consulta)"""
+        orders, sales = DashboardMetricsManager._filters(start, end)
+        money = DecimalField(max_digits=14, decimal_places=2)
+        return DashboardMetricsManager._metrics(granularity, using).aggregate(
+            total_vendas=Coalesce(Sum('Valor', filter=sales), Value(Decimal('0')), output_field=money),
+            total_pedidos=Coalesce(Sum('Quantidade', filter=orders), 0),
+            total_clientes=Coalesce(Sum('Quantidade', filter=Q(Metrica='CUSTOMERS')), 0),
+            total_produtos=Coalesce(Sum('Quantidade', filter=Q(Metrica='PRODUCTS')), 0),
+        )
+
+    @staticmethod
+    def breakdown(field, start=None, end=None, granularity='DAY', using=None):
+        """Pedidos agrupados por ``field`` (Status, FormaPagamento ou Vendedor)"""
+        orders, _ = DashboardMetricsManager._filters(start, end)
+        return list(
+            DashboardMetricsManager._metrics(granularity, using).filter(orders).values(field).annotate(
+                quantidade=Sum('Quantidade'), valor=Sum('Valor')
+            ).order_by(field)
+        )
+
+    @staticmethod
+    def series(start=None, end=None, granularity='DAY', using=None):
+        """Vendas por período"""
+        _, sales = DashboardMetricsManager._filters(start, end)
+        return list(
+            DashboardMetricsManager._metrics(granularity, using).filter(sales).values('Periodo').annotate(
+                quantidade=Sum('Quantidade'), valor=Sum('Valor')
+            ).order_by('Periodo')
+        )
+
+    @staticmethod
+    def summary(start=None, end=None, granularity='DAY', using=None):
+        """Totais e quebras por status, forma de pagamento e vendedor"""
+        period = {'start': start, 'end': end, 'granularity': granularity, 'using': using}
+        summary = DashboardMetricsManager.totals(**period)
+        summary.update({
+            'por_status': DashboardMetricsManager.breakdown('Status', **period),
+            'por_forma_pagamento': DashboardMetricsManager.breakdown('FormaPagamento', **period),
+            'por_vendedor': DashboardMetricsManager.breakdown('Vendedor', **period),
+            'vendas_por_periodo': DashboardMetricsManager.series(**period),
+        })
+        return summary
@@ -2,9 +2,13 @@
 # dashboard/models.py
 import uuid
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from core.models import BaseAuditModel
 
+# Vendedor nulo no índice único de DSH_METRICA: NULLS NOT DISTINCT só existe no PostgreSQL 15+
+NO_SELLER = uuid.UUID(int=0)
+
 class DashboardWidget(BaseAuditModel):
     """Widgets do dashboard"""
     
@@ -124,3 +128,89 @@ class DashboardUserWidget(BaseAuditModel):
     
     def __str__(self):
         return f"{self.Usuario.username} - {self.Widget.Nome}"
+
+class DashboardMetric(BaseAuditModel):
+    """Métricas pré-agregadas por período (rollup por hora e por dia)"""
+    
+    METRIC_CHOICES = [
+        ('ORDERS', _('Pedidos')),
+        ('CUSTOMERS', _('Clientes')),
+        ('PRODUCTS', _('Produtos')),
+    ]
+    
+    GRANULARITY_CHOICES = [
+        ('HOUR', _('Hora')),
+        ('DAY', _('Dia')),
+    ]
+    
+    MetricaId = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        db_column='ID_METRICA'
+    )
+    Metrica = models.CharField(
+        _('Métrica'),
+        max_length=20,
+        choices=METRIC_CHOICES,
+        db_column='METRICA'
+    )
+    Granularidade = models.CharField(
+        _('Granularidade'),
+        max_length=10,
+        choices=GRANULARITY_CHOICES,
+        db_column='GRANULARIDADE'
+    )
+    Periodo = models.DateTimeField(
+        _('Período'),
+        help_text=_('Início da hora/dia no fuso local'),
+        db_column='PERIODO'
+    )
+    Status = models.CharField(
+        _('Status'),
+        max_length=20,
+        blank=True,
+        db_column='STATUS'
+    )
+    FormaPagamento = models.CharField(
+        _('Forma pagamento'),
+        max_length=20,
+        blank=True,
+        db_column='FORMA_PAGAMENTO'
+    )
+    Vendedor = models.ForeignKey(
+        'users.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_('Vendedor'),
+        db_column='ID_VENDEDOR'
+    )
+    Quantidade = models.BigIntegerField(
+        _('Quantidade'),
+        default=0,
+        db_column='QUANTIDADE'
+    )
+    Valor = models.DecimalField(
+        _('Valor'),
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        db_column='VALOR'
+    )
+    
+    class Meta:
+        db_table = 'DSH_METRICA'
+        verbose_name = _('Métrica')
+        verbose_name_plural = _('Métricas')
+        constraints = [
+            # Alvo do ON CONFLICT em DashboardMetricsManager.flush; também atende os filtros por período
+            models.UniqueConstraint(
+                models.F('Metrica'), models.F('Granularidade'), models.F('Periodo'), models.F('Status'),
+                models.F('FormaPagamento'), Coalesce('Vendedor', models.Value(NO_SELLER)),
+                name='UNQ_DSH_MET_BUCKET',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.Metrica} {self.Granularidade} {self.Periodo:%Y-%m-%d %H:%M}"
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# dashboard/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.cache import bump_tags_on_commit
+from customers.models import Customer
+from orders.models import Order, OrderItem, OrderPayment
+from orders.signals import order_totals_changed, orders_bulk_created
+from products.models import Product, ProductVariation
+from .metrics import DashboardMetricsManager
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, using, update_fields=None, **kwargs):
+    if created:
+        DashboardMetricsManager.add_orders([instance.snapshot()], using=using)
+        return
+    
+    before, after = getattr(instance, '_original', None), instance.snapshot()
+    if not before:
+        return
+    if not update_fields or 'Total' not in update_fields:
+        # Order.save não grava o Total; o valor vigente é o do banco
+        if all(before[key] == after[key] for key in ['Status', 'FormaPagamento', 'Vendedor_id']):
+            return
+        total = sender.objects.using(using).filter(pk=instance.pk).values_list('Total', flat=True).first()
+        before, after = {**before, 'Total': total}, {**after, 'Total': total}
+    DashboardMetricsManager.orders_changed([(before, after)], using=using)
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, using, **kwargs):
+    DashboardMetricsManager.add_orders([getattr(instance, '_original', None) or instance.snapshot()], -1, using=using)
+
+@receiver(order_totals_changed, sender=Order)
+def order_totals_updated(sender, changes, using, **kwargs):
+    DashboardMetricsManager.orders_changed(changes, using=using)
+
+@receiver(orders_bulk_created, sender=Order)
+def orders_imported(sender, orders, using, **kwargs):
+    DashboardMetricsManager.add_orders([order.snapshot() for order in orders], using=using)
+
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Product)
+def entity_saved(sender, instance, created, using, **kwargs):
+    if created:
+        metric = 'CUSTOMERS' if sender is Customer else 'PRODUCTS'
+        DashboardMetricsManager.add(metric, instance.DataInclusao, 1, using=using)
+
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Product)
+def entity_deleted(sender, instance, using, **kwargs):
+    metric = 'CUSTOMERS' if sender is Customer else 'PRODUCTS'
+    DashboardMetricsManager.add(metric, instance.DataInclusao, -1, using=using)
+
+# Invalidação do cache de widgets (conectados após os rollups, para rodar depois do flush)
+WIDGET_TAGS = {
+    Order: 'orders',
+    OrderItem: 'orders',
+    OrderPayment: 'orders',
+    Customer: 'customers',
+    Product: 'products',
+    ProductVariation: 'products',
+}
+
+def invalidate_widgets(sender, using=None, **kwargs):
+    bump_tags_on_commit(WIDGET_TAGS[sender], using=using)
+
+for model in WIDGET_TAGS:
+    post_save.connect(invalidate_widgets, sender=model, dispatch_uid=f'widgets_save_{model.__name__}')
+    post_delete.connect(invalidate_widgets, sender=model, dispatch_uid=f'widgets_delete_{model.__name__}')
+order_totals_changed.connect(invalidate_widgets, sender=Order, dispatch_uid='widgets_order_totals')
+orders_bulk_created.connect(invalidate_widgets, sender=Order, dispatch_uid='widgets_orders_bulk')
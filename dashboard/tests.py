@@ -1,4 +1,87 @@
 # -*- coding: utf-8 -*-
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from orders.tests import create_order
+from users.models import User
+from .metrics import DashboardMetricsManager
+from .models import DashboardMetric, DashboardUserWidget, DashboardWidget
+from .widgets import WidgetRenderer, get_executor
 
-# Create your tests here.
+class DashboardMetricsTests(TransactionTestCase):
+    """Rollups aplicados no commit (DashboardMetricsManager)"""
+
+    def orders_total(self):
+        return DashboardMetricsManager.totals()['total_pedidos']
+
+    def test_rollback_then_commit(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                create_order(Total=Decimal('50.00'))
+                raise RuntimeError
+        self.assertEqual(self.orders_total(), 0)
+
+        with transaction.atomic():
+            create_order(Total=Decimal('20.00'))
+        self.assertEqual(self.orders_total(), 1)
+        self.assertEqual(
+            DashboardMetric.objects.filter(Metrica='ORDERS', Granularidade='DAY').get().Quantidade, 1
+        )
+
+    def test_flushes_once_per_transaction(self):
+        with mock.patch.object(DashboardMetricsManager, 'flush', wraps=DashboardMetricsManager.flush) as flush:
+            with transaction.atomic():
+                for _ in range(3):
+                    create_order()
+                flush.assert_not_called()
+        flush.assert_called_once()
+        self.assertEqual(self.orders_total(), 3)
+
+    def test_upsert_adds_to_existing_bucket(self):
+        now = timezone.now()
+        for _ in range(2):
+            DashboardMetricsManager.add('ORDERS', now, 2, value=Decimal('5.00'), status='PENDING')
+        metric = DashboardMetric.objects.get(Metrica='ORDERS', Granularidade='HOUR')
+        self.assertEqual((metric.Quantidade, metric.Valor), (4, Decimal('10.00')))
+        self.assertIsNone(metric.Vendedor_id)
+        self.assertEqual(DashboardMetric.objects.count(), 2)
+
+    def test_seller_buckets_are_separate_from_null_seller(self):
+        seller = User.objects.create_user(username='vend', email='vend@example.com', password='x')
+        now = timezone.now()
+        for vendedor_id in (seller.pk, None, seller.pk):
+            DashboardMetricsManager.add('ORDERS', now, 1, status='PENDING', vendedor_id=vendedor_id)
+        self.assertEqual(
+            sorted(DashboardMetric.objects.filter(Granularidade='DAY').values_list('Quantidade', flat=True)), [1, 2]
+        )
+
+class WidgetRendererTests(TransactionTestCase):
+    """Layout de widgets renderizado no pool do processo"""
+
+    def test_layout_uses_shared_bounded_pool(self):
+        user = User.objects.create_user(username='dash', email='dash@example.com', password='x')
+        for posicao in range(3):
+            DashboardWidget.objects.create(
+                Nome=f'Widget {posicao}', Tipo='COUNTER', Posicao=posicao, Configuracao={'fonte': 'inexistente'}
+            )
+        with override_settings(DASHBOARD_LAYOUT_WORKERS=2):
+            first = WidgetRenderer.render_layout(user)
+            executor = get_executor()
+            second = WidgetRenderer.render_layout(user)
+        self.assertIs(get_executor(), executor)
+        self.assertEqual([widget['Posicao'] for widget in first], [0, 1, 2])
+        self.assertEqual(first, second)
+
+    @override_settings(DASHBOARD_LAYOUT_WORKERS=1)  # sem conexões presas às threads do pool
+    def test_invalid_user_config_only_fails_its_widget(self):
+        user = User.objects.create_user(username='dash2', email='dash2@example.com', password='x')
+        for posicao, limite in enumerate([None, 'dez', 5]):
+            widget = DashboardWidget.objects.create(
+                Nome=f'Recentes {posicao}', Tipo='TABLE', Posicao=posicao, Configuracao={'fonte': 'pedidos_recentes'}
+            )
+            DashboardUserWidget.objects.create(Usuario=user, Widget=widget, ConfiguracaoCustom={'limite': limite})
+        layout = WidgetRenderer.render_layout(user)
+        self.assertEqual([('erro' in widget) for widget in layout], [True, True, False])
+        self.assertEqual(layout[2]['dados'], [])
@@ -4,6 +4,7 @@ from rest_framework.routers import DefaultRouter
 from .views import *
 
 router = DefaultRouter()
+router.register(r'', DashboardViewSet, basename='dashboard')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,4 +1,53 @@
 # -*- coding: utf-8 -*-
-from django.shortcuts import render
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.generics import get_object_or_404
+from core.database.replicas import ReplicaReadMixin
+from .metrics import DashboardMetricsManager
+from .models import DashboardWidget, DashboardUserWidget
+from .widgets import WidgetRenderer
 
-# Create your views here.
+class DashboardViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
+    permission_classes = [IsAuthenticated]
+    
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Totais do dashboard a partir dos rollups (DSH_METRICA)"""
+        granularity = request.query_params.get('granularidade', 'DAY').upper()
+        if granularity not in DashboardMetricsManager.GRANULARITIES:
+            return Response({'error': 'Granularidade inválida'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        period = {}
+        for param in ['inicio', 'fim']:
+            value = request.query_params.get(param)
+            if value:
+                day = parse_date(value)
+                if day is None:
+                    return Response({'error': f'Data inválida: {param}'}, status=status.HTTP_400_BAD_REQUEST)
+                period[param] = timezone.make_aware(datetime.combine(day, time.min))
+        
+        # 'fim' é inclusivo: soma até o início do dia seguinte
+        end = period.get('fim')
+        if end:
+            end += timedelta(days=1)
+        
+        return Response(DashboardMetricsManager.summary(
+            start=period.get('inicio'), end=end, granularity=granularity
+        ))
+    
+    @action(detail=False, methods=['get'])
+    def layout(self, request):
+        """Todos os widgets visíveis do usuário, com dados, em uma única chamada"""
+        return Response(WidgetRenderer.render_layout(request.user))
+    
+    @action(detail=False, methods=['get'], url_path=r'widgets/(?P<widget_id>[^/.]+)')
+    def widget(self, request, widget_id=None):
+        """Dados de um widget com a configuração do usuário"""
+        widget = get_object_or_404(DashboardWidget, pk=widget_id, Ativo=True)
+        user_widget = DashboardUserWidget.objects.filter(Usuario=request.user, Widget=widget).first()
+        return Response(WidgetRenderer.render(widget, user_widget))
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# dashboard/widgets.py
+import contextvars
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Sum
+from django.utils import timezone
+from core.cache import get_or_compute, versioned_key
+from core.database.tenants import TenantManager
+from .metrics import DashboardMetricsManager
+
+# Fontes de dados disponíveis para widgets: nome -> definição
+WIDGET_SOURCES = {}
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """Pool do processo para os widgets (DASHBOARD_LAYOUT_WORKERS threads no total)"""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            # Processo filho (fork) não herda as threads do pool do pai
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.DASHBOARD_LAYOUT_WORKERS, thread_name_prefix='brava-widgets'
+                )
+                _executor_pid = os.getpid()
+    return _executor
+
+def widget_source(name, depends_on, params=None, ttl='SHORT'):
+    """Registra uma fonte de dados de widget
+
+    ``depends_on`` são as tags (orders, products, customers) cujas alterações
+    invalidam o resultado; ``params`` são as chaves da configuração usadas
+    pela fonte, com seus valores padrão.
+    """
+    def decorator(func):
+        WIDGET_SOURCES[name] = {
+            'func': func,
+            'depends_on': list(depends_on),
+            'params': params or {},
+            'ttl': ttl,
+        }
+        return func
+    return decorator
+
+def _since(days):
+    today = DashboardMetricsManager.period_start(timezone.now(), 'DAY')
+    return today - timedelta(days=int(days) - 1) if days else None
+
+@widget_source('resumo', depends_on=['orders', 'customers', 'products'], params={'dias': None})
+def resumo(config):
+    return DashboardMetricsManager.totals(start=_since(config['dias']))
+
+@widget_source('vendas_por_periodo', depends_on=['orders'], params={'dias': 30, 'granularidade': 'DAY'})
+def vendas_por_periodo(config):
+    return DashboardMetricsManager.series(start=_since(config['dias']), granularity=config['granularidade'])
+
+@widget_source('pedidos_por_status', depends_on=['orders'], params={'dias': 30})
+def pedidos_por_status(config):
+    return DashboardMetricsManager.breakdown('Status', start=_since(config['dias']))
+
+@widget_source('pedidos_por_forma_pagamento', depends_on=['orders'], params={'dias': 30})
+def pedidos_por_forma_pagamento(config):
+    return DashboardMetricsManager.breakdown('FormaPagamento', start=_since(config['dias']))
+
+@widget_source('pedidos_por_vendedor', depends_on=['orders'], params={'dias': 30})
+def pedidos_por_vendedor(config):
+    return DashboardMetricsManager.breakdown('Vendedor', start=_since(config['dias']))
+
+@widget_source('pedidos_recentes', depends_on=['orders', 'customers'], params={'limite': 10})
+def pedidos_recentes(config):
+    from orders.models import Order
+    return list(
+        Order.objects.order_by('-DataPedido').values(
+            'PedidoId', 'Numero', 'Status', 'Total', 'DataPedido', ClienteNome=F('Cliente__Nome')
+        )[:int(config['limite'])]
+    )
+
+@widget_source('top_produtos', depends_on=['orders', 'products'], params={'dias': 30, 'limite': 10})
+def top_produtos(config):
+    from orders.models import OrderItem
+    items = OrderItem.objects.exclude(Pedido__Status__in=DashboardMetricsManager.SALES_EXCLUDED_STATUSES)
+    since = _since(config['dias'])
+    if since:
+        items = items.filter(Pedido__DataPedido__gte=since)
+    return list(
+        items.values('Produto', 'Produto__Codigo', 'Produto__Nome').annotate(
+            quantidade=Sum('Quantidade'), valor=Sum('ValorTotal')
+        ).order_by('-quantidade')[:int(config['limite'])]
+    )
+
+@widget_source('estoque_baixo', depends_on=['products', 'orders'], params={'limite': 10})
+def estoque_baixo(config):
+    from products.models import Product
+    return list(
+        Product.objects.filter(
+            Status='ACTIVE', QuantidadeEstoque__lte=F('EstoqueMinimo')
+        ).order_by('QuantidadeEstoque').values(
+            'ProdutoId', 'Codigo', 'Nome', 'QuantidadeEstoque', 'EstoqueMinimo'
+        )[:int(config['limite'])]
+    )
+
+class WidgetRenderer:
+    """Calcula os dados dos widgets com cache por configuração normalizada
+
+    A configuração do widget (``Configuracao``) é mesclada com a do usuário
+    (``ConfiguracaoCustom``) e reduzida aos parâmetros da fonte; usuários com
+    a mesma configuração efetiva compartilham a mesma entrada de cache.
+    """
+
+    @staticmethod
+    def merge_config(widget, user_widget=None):
+        config = dict(widget.Configuracao or {})
+        if user_widget is not None and user_widget.ConfiguracaoCustom:
+            config.update(user_widget.ConfiguracaoCustom)
+        return config
+
+    @staticmethod
+    def normalize(source, config):
+        return {param: config.get(param, default) for param, default in source['params'].items()}
+
+    @staticmethod
+    def get_data(source_name, config):
+        """Dados da fonte para a configuração (via cache)"""
+        source = WIDGET_SOURCES.get(source_name)
+        if source is None:
+            raise ValueError(f'Fonte de widget desconhecida: {source_name}')
+
+        normalized = WidgetRenderer.normalize(source, config)
+        digest = hashlib.md5(
+            json.dumps(normalized, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        key = versioned_key('widget', source['depends_on'], source_name, digest)
+        ttl = settings.CACHE_TTL.get(config.get('cache', source['ttl']), settings.CACHE_TTL['SHORT'])
+        return get_or_compute(key, lambda: source['func'](normalized), ttl)
+
+    @staticmethod
+    def render(widget, user_widget=None):
+        """Widget com layout e dados"""
+        config = WidgetRenderer.merge_config(widget, user_widget)
+        result = {
+            'WidgetId': widget.pk,
+            'Nome': widget.Nome,
+            'Tipo': widget.Tipo,
+            'Tamanho': widget.Tamanho,
+            'Posicao': widget.Posicao,
+            'Configuracao': config,
+            'dados': None,
+        }
+        if user_widget is not None and user_widget.PosicaoCustom is not None:
+            result['Posicao'] = user_widget.PosicaoCustom
+        try:
+            result['dados'] = WidgetRenderer.get_data(config.get('fonte'), config)
+        except (TypeError, ValueError) as e:
+            # Configuração inválida (ex.: ConfiguracaoCustom com limite nulo): só este widget falha
+            result['erro'] = str(e)
+        return result
+
+    @staticmethod
+    def _render_in_thread(widget, user_widget):
+        # As threads do pool são reaproveitadas: a conexão fica aberta entre
+        # tarefas e é descartada, como num request, se expirou ou quebrou
+        close_old_connections()
+        try:
+            # Conexão própria da thread: aplica o schema da loja do request
+            TenantManager.activate_schema()
+            return WidgetRenderer.render(widget, user_widget)
+        finally:
+            close_old_connections()
+
+    @staticmethod
+    def render_layout(user):
+        """Layout completo do usuário com os dados de todos os widgets visíveis
+
+        Duas consultas carregam widgets e personalizações; os dados são
+        calculados em paralelo no pool do processo (DASHBOARD_LAYOUT_WORKERS
+        threads compartilhadas por todos os requests), em geral direto do cache.
+        """
+        from .models import DashboardWidget, DashboardUserWidget
+
+        user_widgets = {
+            user_widget.Widget_id: user_widget
+            for user_widget in DashboardUserWidget.objects.filter(Usuario=user)
+        }
+        layout = [
+            (widget, user_widgets.get(widget.pk))
+            for widget in DashboardWidget.objects.filter(Ativo=True)
+        ]
+        layout = [(widget, user_widget) for widget, user_widget in layout
+                  if user_widget is None or user_widget.Visivel]
+
+        if settings.DASHBOARD_LAYOUT_WORKERS <= 1 or len(layout) <= 1:
+            rendered = [WidgetRenderer.render(widget, user_widget) for widget, user_widget in layout]
+        else:
+            executor = get_executor()
+            # Cada tarefa roda com uma cópia do contexto do request (loja ativa)
+            futures = [
+                executor.submit(contextvars.copy_context().run, WidgetRenderer._render_in_thread, widget, user_widget)
+                for widget, user_widget in layout
+            ]
+            rendered = [future.result() for future in futures]
+
+        return sorted(rendered, key=lambda item: item['Posicao'])
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# orders/events.py
+"""
+Histórico de pedidos via outbox transacional
+
+As mudanças de status do pedido, dos pagamentos e as movimentações de
+estoque do pedido gravam um OrderEvent compacto (sem FK) na mesma
+transação; o comando ``order_events`` converte os eventos em lote para
+PED_PEDIDO_HISTORICO. Como o evento só existe se a transação confirmar, a
+entrega ocorre exatamente uma vez após o commit.
+"""
+from django.db import router, transaction
+from django.utils import timezone
+from core.audit import AuditContext
+from .models import Order, OrderEvent, OrderHistory
+
+STOCK_DESCRIPTIONS = {
+    'RESERVED': 'Estoque reservado',
+    'COMMITTED': 'Baixa de estoque',
+    'RELEASED': 'Estoque devolvido',
+}
+
+class OrderEvents:
+    """Emissão e consumo dos eventos de pedido"""
+
+    @staticmethod
+    def _event(order_id, tipo, anterior, novo, descricao):
+        user = AuditContext.get_user()
+        return OrderEvent(
+            Pedido_id=order_id,
+            Tipo=tipo,
+            StatusAnterior=anterior or '',
+            StatusNovo=novo or '',
+            Descricao=descricao,
+            IdUsuario=user.pk if user is not None else None,
+            Usuario=AuditContext.get_username(),
+        )
+
+    @staticmethod
+    def for_status_change(order, previous_status, stock=None):
+        """Eventos da mudança de status (e do estoque movimentado por ela)"""
+        if previous_status is None:
+            descricao = 'Pedido criado'
+        else:
+            descricao = f'Status alterado de {previous_status} para {order.Status}'
+        events = [OrderEvents._event(order.pk, 'STATUS', previous_status, order.Status, descricao)]
+        if stock is not None:
+            operation, count = stock
+            events.append(OrderEvents._event(
+                order.pk, 'STOCK', order.Status, order.Status,
+                f'{STOCK_DESCRIPTIONS[operation]}: {count} itens'
+            ))
+        return events
+
+    @staticmethod
+    def for_import(order, stock=None, user=None, username=None):
+        """Eventos do pedido importado em lote (autor do importador)"""
+        events = [OrderEvent(
+            Pedido_id=order.pk,
+            Tipo='STATUS',
+            StatusAnterior='',
+            StatusNovo=order.Status,
+            Descricao='Pedido importado em lote',
+            IdUsuario=user.pk if user is not None else None,
+            Usuario=username or AuditContext.get_username(),
+        )]
+        if stock is not None:
+            operation, count = stock
+            events.append(OrderEvent(
+                Pedido_id=order.pk,
+                Tipo='STOCK',
+                StatusAnterior=order.Status,
+                StatusNovo=order.Status,
+                Descricao=f'{STOCK_DESCRIPTIONS[operation]}: {count} itens',
+                IdUsuario=events[0].IdUsuario,
+                Usuario=events[0].Usuario,
+            ))
+        return events
+
+    @staticmethod
+    def for_payment(payment, previous_status):
+        """Evento da criação ou mudança de status de um pagamento"""
+        if previous_status is None:
+            descricao = f'Pagamento registrado: {payment.FormaPagamento} {payment.Valor} ({payment.Status})'
+        else:
+            descricao = f'Pagamento {payment.FormaPagamento} {payment.Valor}: {previous_status} para {payment.Status}'
+        return OrderEvents._event(payment.Pedido_id, 'PAYMENT', previous_status, payment.Status, descricao)
+
+    @staticmethod
+    def emit(events, using=None):
+        """Grava os eventos na transação atual (um INSERT)"""
+        if events:
+            OrderEvent.objects.using(using).bulk_create(events)
+
+    @staticmethod
+    def drain(batch_size=500, using=None):
+        """Converte até ``batch_size`` eventos em OrderHistory
+
+        Devolve (eventos consumidos, atraso do evento mais antigo em segundos).
+        Vários processos podem drenar ao mesmo tempo (SKIP LOCKED).
+        """
+        using = using or router.db_for_write(OrderEvent)
+        with transaction.atomic(using=using):
+            events = list(
+                OrderEvent.objects.using(using).select_for_update(skip_locked=True).order_by('pk')[:batch_size]
+            )
+            if not events:
+                return 0, None
+
+            # Pedidos excluídos antes do consumo são descartados
+            existing = set(
+                Order.objects.using(using).filter(pk__in={event.Pedido_id for event in events})
+                .values_list('pk', flat=True)
+            )
+            now = timezone.now()
+            # DataInclusao = data do evento (o histórico é ordenado por ela)
+            histories = [
+                OrderHistory(
+                    Pedido_id=event.Pedido_id,
+                    StatusAnterior=event.StatusAnterior,
+                    StatusNovo=event.StatusNovo,
+                    Descricao=event.Descricao,
+                    IdUsuario_id=event.IdUsuario,
+                    UsuarioInclusao=event.Usuario,
+                    UsuarioAlteracao=event.Usuario,
+                    DataInclusao=event.DataEvento,
+                )
+                for event in events if event.Pedido_id in existing
+            ]
+            OrderHistory.objects.using(using).bulk_create(histories, batch_size=batch_size)
+            OrderEvent.objects.using(using).filter(pk__in=[event.pk for event in events]).delete()
+
+        return len(events), (now - events[0].DataEvento).total_seconds()
+
+    @staticmethod
+    def pending(using=None):
+        """(eventos pendentes, atraso do mais antigo em segundos)"""
+        using = using or router.db_for_write(OrderEvent)
+        queryset = OrderEvent.objects.using(using)
+        oldest = queryset.order_by('pk').values_list('DataEvento', flat=True).first()
+        if oldest is None:
+            return 0, 0.0
+        return queryset.count(), (timezone.now() - oldest).total_seconds()
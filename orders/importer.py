@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+# orders/importer.py
+import csv
+import json
+import time
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from django.db import router, transaction, DatabaseError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from customers.models import Customer
+from products.models import Product, ProductVariation
+from products.stock import InsufficientStockError, StockManager
+from .events import OrderEvents
+from .models import Order, OrderItem, OrderPayment
+from .signals import orders_bulk_created
+
+class ImportReport:
+    """Resultado de uma importação em lote"""
+
+    def __init__(self):
+        self.total = 0
+        self.imported = 0
+        self.errors = []
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    def add_error(self, linha, mensagem):
+        self.errors.append({'linha': linha, 'erro': str(mensagem)})
+
+    def finish(self):
+        self.elapsed = time.monotonic() - self.started
+        return self
+
+    @property
+    def rate(self):
+        """Pedidos importados por segundo"""
+        return self.imported / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'total': self.total,
+            'importados': self.imported,
+            'erros': len(self.errors),
+            'tempo_segundos': round(self.elapsed, 3),
+            'pedidos_por_segundo': round(self.rate, 1),
+            'detalhes_erros': self.errors,
+        }
+
+class OrderBulkImporter:
+    """Importação de pedidos em lote (NDJSON/CSV) com bulk_create por bloco"""
+
+    # Colunas do CSV: uma linha por item, agrupadas por Referencia (ou Numero)
+    CSV_ORDER_FIELDS = [
+        'Numero', 'Cliente', 'Status', 'StatusPagamento', 'FormaPagamento',
+        'Desconto', 'Frete', 'Observacoes',
+    ]
+    CSV_ITEM_FIELDS = {
+        'Produto': 'Produto',
+        'ProdutoVariante': 'ProdutoVariante',
+        'Quantidade': 'Quantidade',
+        'ValorUnitario': 'ValorUnitario',
+        'ItemDesconto': 'Desconto',
+    }
+    CSV_PAYMENT_FIELDS = {
+        'TipoPagamento': 'TipoPagamento',
+        'PagamentoValor': 'Valor',
+        'PagamentoStatus': 'Status',
+        'TransacaoId': 'TransacaoId',
+        'DataPagamento': 'DataPagamento',
+    }
+    MAX_CHUNK_SIZE = 5000
+
+    def __init__(self, user=None, chunk_size=500, using=None):
+        self.user = user if user and user.is_authenticated else None
+        self.username = self.user.username if self.user else 'BRAVA'
+        # Limite do bulk_create por transação (chunk_size vem do request)
+        self.chunk_size = min(max(chunk_size, 1), self.MAX_CHUNK_SIZE)
+        # Banco da loja ativa (router): loja dedicada grava no próprio alias
+        self.using = using or router.db_for_write(Order)
+        self.report = ImportReport()
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def read_ndjson(self, lines):
+        """Um pedido JSON por linha"""
+        for linha, line in enumerate(lines, start=1):
+            if isinstance(line, bytes):
+                line = line.decode('utf-8-sig')
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                self.report.total += 1
+                self.report.add_error(linha, f'JSON inválido: {e}')
+                continue
+            if not isinstance(record, dict):
+                self.report.total += 1
+                self.report.add_error(linha, 'Registro deve ser um objeto JSON')
+                continue
+            yield linha, record
+
+    def read_csv(self, lines):
+        """Uma linha por item; linhas consecutivas com a mesma Referencia formam um pedido
+
+        O arquivo precisa vir agrupado (ordenado) por Referencia/Numero: o
+        leitor não guarda o arquivo em memória. Uma linha de um pedido já
+        encerrado vira erro da linha em vez de um segundo pedido.
+        """
+        decoded = (line.decode('utf-8-sig') if isinstance(line, bytes) else line for line in lines)
+        reader = csv.DictReader(decoded)
+
+        current_key, current, first_line, closed = None, None, None, set()
+        for linha, row in enumerate(reader, start=2):
+            key = row.get('Referencia') or row.get('Numero') or f'__linha_{linha}'
+            if key != current_key:
+                if key in closed:
+                    self.report.total += 1
+                    self.report.add_error(
+                        linha, f'Pedido {key} fora de ordem: as linhas do pedido devem ser consecutivas'
+                    )
+                    continue
+                if current is not None:
+                    closed.add(current_key)
+                    yield first_line, current
+                current_key, first_line = key, linha
+                current = self._csv_order(row)
+            current['itens'].append({
+                target: row[source] for source, target in self.CSV_ITEM_FIELDS.items()
+                if row.get(source) not in (None, '')
+            })
+        if current is not None:
+            yield first_line, current
+
+    def _csv_order(self, row):
+        record = {field: row[field] for field in self.CSV_ORDER_FIELDS if row.get(field) not in (None, '')}
+        record['itens'] = []
+        payment = {
+            target: row[source] for source, target in self.CSV_PAYMENT_FIELDS.items()
+            if row.get(source) not in (None, '')
+        }
+        if payment:
+            record['pagamentos'] = [payment]
+        return record
+
+    # ------------------------------------------------------------------
+    # Importação
+    # ------------------------------------------------------------------
+
+    def run(self, records):
+        """Importa os registros em blocos; erros por linha não interrompem o lote"""
+        chunk = []
+        for linha, record in records:
+            self.report.total += 1
+            chunk.append((linha, record))
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk)
+        return self.report.finish()
+
+    def _import_chunk(self, chunk):
+        clientes, produtos, variacoes = self._resolve_lookups(chunk)
+
+        built = []
+        for linha, record in chunk:
+            try:
+                built.append((linha, self._build(record, clientes, produtos, variacoes)))
+            except (ValueError, TypeError, KeyError, AttributeError, InvalidOperation) as e:
+                self.report.add_error(linha, e)
+
+        built = self._assign_numbers(built)
+        if not built:
+            return
+
+        try:
+            with transaction.atomic(using=self.using):
+                self._write([objects for _, objects in built])
+            self.report.imported += len(built)
+        except (DatabaseError, InsufficientStockError):
+            # Isola o(s) pedido(s) com problema sem descartar o restante do bloco
+            for linha, objects in built:
+                try:
+                    with transaction.atomic(using=self.using):
+                        self._write([objects])
+                    self.report.imported += 1
+                except InsufficientStockError as e:
+                    self.report.add_error(linha, e.detail[0])
+                except DatabaseError as e:
+                    self.report.add_error(linha, e)
+
+    def _resolve_lookups(self, chunk):
+        """Busca clientes, produtos e variações do bloco com consultas IN"""
+        cliente_keys, produto_keys, sku_keys = set(), set(), set()
+        for _, record in chunk:
+            if record.get('Cliente'):
+                cliente_keys.add(str(record['Cliente']).strip())
+            for item in record.get('itens') or []:
+                if isinstance(item, dict):
+                    if item.get('ProdutoVariante'):
+                        sku_keys.add(str(item['ProdutoVariante']).strip())
+                    elif item.get('Produto'):
+                        produto_keys.add(str(item['Produto']).strip())
+
+        clientes = {}
+        if cliente_keys:
+            for cliente in Customer.objects.using(self.using).filter(
+                Q(Codigo__in=cliente_keys) | Q(Documento__in=cliente_keys),
+                Ativo=True
+            ).only('ClienteId', 'Codigo', 'Documento'):
+                clientes[cliente.Codigo] = cliente
+                clientes[cliente.Documento] = cliente
+
+        produtos = {}
+        if produto_keys:
+            produtos = {
+                produto.Codigo: produto
+                for produto in Product.objects.using(self.using).filter(
+                    Codigo__in=produto_keys
+                ).only('ProdutoId', 'Codigo', 'Preco')
+            }
+
+        variacoes = {}
+        if sku_keys:
+            variacoes = {
+                variacao.CodigoSku: variacao
+                for variacao in ProductVariation.objects.using(self.using).filter(
+                    CodigoSku__in=sku_keys, Ativo=True
+                ).select_related('Produto').only(
+                    'ProdutoVarianteId', 'CodigoSku', 'PrecoAdicional',
+                    'Produto__ProdutoId', 'Produto__Codigo', 'Produto__Preco'
+                )
+            }
+
+        return clientes, produtos, variacoes
+
+    def _build(self, record, clientes, produtos, variacoes):
+        """Monta Order, itens e pagamentos de um registro"""
+        cliente = clientes.get(str(record.get('Cliente', '')).strip())
+        if cliente is None:
+            raise ValueError(f"Cliente não encontrado: {record.get('Cliente')}")
+
+        order = Order(
+            Numero=str(record.get('Numero') or '').strip(),
+            Cliente=cliente,
+            Status=self._choice(record, 'Status', Order.STATUS_CHOICES, 'PENDING'),
+            StatusPagamento=self._choice(record, 'StatusPagamento', Order.PAYMENT_STATUS_CHOICES, 'PENDING'),
+            FormaPagamento=self._choice(record, 'FormaPagamento', Order.PAYMENT_METHOD_CHOICES, None),
+            Desconto=self._decimal(record.get('Desconto', 0)),
+            Frete=self._decimal(record.get('Frete', 0)),
+            Observacoes=record.get('Observacoes') or '',
+            UsuarioInclusao=self.username,
+            UsuarioAlteracao=self.username,
+        )
+
+        items = []
+        for item in record.get('itens') or []:
+            variacao = None
+            if item.get('ProdutoVariante'):
+                variacao = variacoes.get(str(item['ProdutoVariante']).strip())
+                if variacao is None:
+                    raise ValueError(f"Variação não encontrada: {item['ProdutoVariante']}")
+                produto = variacao.Produto
+            else:
+                produto = produtos.get(str(item.get('Produto', '')).strip())
+                if produto is None:
+                    raise ValueError(f"Produto não encontrado: {item.get('Produto')}")
+
+            quantidade = int(item.get('Quantidade', 1))
+            if quantidade <= 0:
+                raise ValueError(f'Quantidade inválida para {produto.Codigo}: {quantidade}')
+
+            if item.get('ValorUnitario') not in (None, ''):
+                valor_unitario = self._decimal(item['ValorUnitario'])
+            else:
+                valor_unitario = produto.Preco + (variacao.PrecoAdicional if variacao else 0)
+
+            order_item = OrderItem(
+                Pedido=order,
+                Produto=produto,
+                ProdutoVariante=variacao,
+                Quantidade=quantidade,
+                ValorUnitario=valor_unitario,
+                Desconto=self._decimal(item.get('Desconto', 0)),
+                UsuarioInclusao=self.username,
+                UsuarioAlteracao=self.username,
+            )
+            order_item.calculate_total()
+            items.append(order_item)
+
+        if not items:
+            raise ValueError('Pedido sem itens')
+
+        order.Subtotal = sum(item.ValorTotal for item in items)
+        order.calculate_total()
+
+        payments = []
+        for payment in record.get('pagamentos') or []:
+            payments.append(OrderPayment(
+                Pedido=order,
+                TipoPagamento=self._choice(payment, 'TipoPagamento', OrderPayment.PAYMENT_TYPE_CHOICES, 'FULL'),
+                FormaPagamento=self._choice(
+                    payment, 'FormaPagamento', Order.PAYMENT_METHOD_CHOICES, order.FormaPagamento
+                ) or 'MONEY',
+                Valor=self._decimal(payment.get('Valor', order.Total)),
+                Status=self._choice(payment, 'Status', OrderPayment.STATUS_CHOICES, 'PENDING'),
+                TransacaoId=payment.get('TransacaoId') or '',
+                DataPagamento=parse_datetime(payment['DataPagamento']) if payment.get('DataPagamento') else None,
+                UsuarioInclusao=self.username,
+                UsuarioAlteracao=self.username,
+            ))
+
+        return order, items, payments
+
+    def _assign_numbers(self, built):
+        """Valida números informados e gera os demais antes da gravação"""
+        informed = [objects[0].Numero for _, objects in built if objects[0].Numero]
+        existing = set()
+        if informed:
+            existing = set(
+                Order.objects.using(self.using).filter(Numero__in=informed).values_list('Numero', flat=True)
+            )
+
+        valid, seen = [], set()
+        for linha, objects in built:
+            order = objects[0]
+            if order.Numero:
+                if order.Numero in existing or order.Numero in seen:
+                    self.report.add_error(linha, f'Número de pedido já existe: {order.Numero}')
+                    continue
+                seen.add(order.Numero)
+            valid.append((linha, objects))
+
+        pending = [objects[0] for _, objects in valid if not objects[0].Numero]
+        while pending:
+            for order, numero in zip(pending, Order.allocate_order_numbers(len(pending), using=self.using)):
+                order.Numero = numero
+            numbers = [order.Numero for order in pending]
+            taken = set(
+                Order.objects.using(self.using).filter(Numero__in=numbers).values_list('Numero', flat=True)
+            ) | seen
+            retry = []
+            for order in pending:
+                if order.Numero in taken:
+                    retry.append(order)
+                else:
+                    seen.add(order.Numero)
+            pending = retry
+
+        return valid
+
+    def _write(self, built):
+        orders, items, payments = [], [], []
+        for order, order_items, order_payments in built:
+            orders.append(order)
+            items.extend(order_items)
+            payments.extend(order_payments)
+
+        Order.objects.using(self.using).bulk_create(orders, batch_size=self.chunk_size)
+        OrderItem.objects.using(self.using).bulk_create(items, batch_size=self.chunk_size)
+        # Pedidos já confirmados/enviados reservam/baixam o estoque do bloco de uma vez
+        reserved = Counter(
+            reservation.Pedido_id for reservation in StockManager.apply_bulk(items, using=self.using)
+        )
+        if payments:
+            OrderPayment.objects.using(self.using).bulk_create(payments, batch_size=self.chunk_size)
+
+        # Histórico via outbox, como nas demais alterações de pedido (comando order_events)
+        events = []
+        for order in orders:
+            stock = None
+            if reserved[order.pk]:
+                operation = 'RESERVED' if order.Status in StockManager.RESERVE_STATUSES else 'COMMITTED'
+                stock = (operation, reserved[order.pk])
+            events.extend(OrderEvents.for_import(order, stock, self.user, self.username))
+        OrderEvents.emit(events, using=self.using)
+        orders_bulk_created.send(sender=Order, orders=orders, using=self.using)
+
+    @staticmethod
+    def _decimal(value):
+        return Decimal(str(value).strip()) if value not in (None, '') else Decimal('0')
+
+    @staticmethod
+    def _choice(record, field, choices, default):
+        value = record.get(field)
+        if value in (None, ''):
+            return default
+        value = str(value).strip().upper()
+        if value not in dict(choices):
+            raise ValueError(f'{field} inválido: {value}')
+        return value
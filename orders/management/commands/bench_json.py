@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# orders/management/commands/bench_json.py
+import io
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from api.renderers import ORJSONParser, ORJSONRenderer, orjson
+from api.serializers import OrderSerializer
+from customers.models import Customer
+from orders.models import Order
+
+class Command(BaseCommand):
+    help = 'Benchmark JSON rendering/parsing of an order list payload (stdlib json vs orjson)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Pedidos no payload')
+        parser.add_argument('--repeat', type=int, default=50, help='Repetições medidas por backend')
+        parser.add_argument('--warmup', type=int, default=5, help='Repetições descartadas por backend')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson não instalado: ORJSONRenderer usa o json do stdlib'))
+
+        data = {'count': options['rows'], 'next': None, 'previous': None, 'results': self._payload(options['rows'])}
+        self.stdout.write(f"{options['rows']} pedidos, {options['repeat']} repetições")
+
+        results = {}
+        for name, renderer, parser in (
+            ('json', JSONRenderer(), JSONParser()),
+            ('orjson', ORJSONRenderer(), ORJSONParser()),
+        ):
+            body = renderer.render(data)
+            results[name] = (
+                self._measure(lambda: renderer.render(data), options),
+                self._measure(lambda: parser.parse(io.BytesIO(body)), options),
+                len(body),
+            )
+            render, parse, size = results[name]
+            self.stdout.write(
+                f'{name:<7} render média {statistics.mean(render) * 1000:>7.2f}ms  '
+                f'p95 {render[int(len(render) * 0.95) - 1] * 1000:>7.2f}ms  '
+                f'parse média {statistics.mean(parse) * 1000:>7.2f}ms  {size / 1024:.0f} KiB'
+            )
+
+        baseline, fast = results['json'], results['orjson']
+        self.stdout.write(
+            f'orjson: render {statistics.mean(baseline[0]) / statistics.mean(fast[0]):.1f}x, '
+            f'parse {statistics.mean(baseline[1]) / statistics.mean(fast[1]):.1f}x mais rápido'
+        )
+        self.stdout.write(self.style.SUCCESS('[SUCCESS] JSON benchmark end successfuly!'))
+
+    @staticmethod
+    def _payload(rows):
+        """Lista serializada de pedidos em memória (sem banco), como em GET /orders/"""
+        now = timezone.now()
+        customer = Customer(ClienteId=uuid.uuid4(), Nome='Cliente Benchmark')
+        orders = [
+            Order(
+                PedidoId=uuid.uuid4(),
+                Numero=f'{now.year}{index:08d}',
+                Cliente=customer,
+                Vendedor_id=uuid.uuid4(),
+                Status='CONFIRMED',
+                StatusPagamento='PAID',
+                FormaPagamento='PIX',
+                Subtotal=Decimal('199.90') + index,
+                Desconto=Decimal('10.00'),
+                Frete=Decimal('15.50'),
+                Total=Decimal('205.40') + index,
+                DataPedido=now - timedelta(minutes=index),
+                DataEntregaPrevista=now + timedelta(days=7),
+            )
+            for index in range(rows)
+        ]
+        return OrderSerializer(orders, many=True).data
+
+    @staticmethod
+    def _measure(function, options):
+        timings = []
+        for run in range(options['warmup'] + options['repeat']):
+            started = time.perf_counter()
+            function()
+            if run >= options['warmup']:
+                timings.append(time.perf_counter() - started)
+        return sorted(timings)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# orders/management/commands/import_orders.py
+from django.core.management.base import BaseCommand, CommandError
+from core.database.tenants import TenantManager
+from users.models import User
+from orders.importer import OrderBulkImporter
+
+class Command(BaseCommand):
+    help = 'Import orders in bulk from NDJSON or CSV files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo .ndjson/.jsonl ou .csv (CSV agrupado por Referencia)')
+        parser.add_argument('--format', choices=['ndjson', 'csv'], help='Formato do arquivo (padrão: pela extensão)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Pedidos por transação (máximo 5000)')
+        parser.add_argument('--user', help='E-mail do usuário registrado na auditoria')
+        parser.add_argument('--tenant', help='Slug da loja (padrão: schema compartilhado)')
+
+    def handle(self, *args, **options):
+        try:
+            token = TenantManager.activate(options['tenant'])
+        except LookupError as e:
+            raise CommandError(str(e))
+        try:
+            TenantManager.activate_schema(options['tenant'])
+            self.import_file(options)
+        finally:
+            TenantManager.deactivate(token)
+
+    def import_file(self, options):
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"Usuário não encontrado: {options['user']}")
+
+        importer = OrderBulkImporter(user=user, chunk_size=options['chunk_size'])
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as handle:
+                reader = importer.read_csv if file_format == 'csv' else importer.read_ndjson
+                report = importer.run(reader(handle))
+        except OSError as e:
+            raise CommandError(f'Erro ao abrir {path}: {e}')
+
+        for error in report.errors:
+            self.stdout.write(self.style.ERROR(f"[ERROR] Linha {error['linha']}: {error['erro']}"))
+
+        self.stdout.write(
+            f'{report.imported}/{report.total} pedidos importados em {report.elapsed:.2f}s '
+            f'({report.rate:.1f} pedidos/s), {len(report.errors)} erros'
+        )
+        self.stdout.write(self.style.SUCCESS('[SUCCESS] Order import end successfuly!'))
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# orders/management/commands/order_events.py
+import logging
+import time
+from django.core.management.base import BaseCommand
+from core.database.tenants import TenantManager
+from orders.events import OrderEvents
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Drain order events (PED_PEDIDO_EVENTO) into the order history in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Eventos por transação')
+        parser.add_argument('--interval', type=float, default=1.0, help='Segundos entre verificações sem eventos')
+        parser.add_argument('--once', action='store_true', help='Drena o que estiver pendente e encerra')
+        parser.add_argument('--stats', action='store_true', help='Mostra pendências e atraso por loja e encerra')
+
+    def handle(self, *args, **options):
+        # None: schema compartilhado (loja única ou requests sem loja)
+        tenants = [None, *TenantManager.get_tenants()]
+
+        if options['stats']:
+            for slug in tenants:
+                count, lag = self._in_tenant(slug, OrderEvents.pending)
+                self.stdout.write(f'{slug or "default"}: {count} eventos pendentes, atraso {lag:.1f}s')
+            return
+
+        total, max_lag, started = 0, 0.0, time.perf_counter()
+        try:
+            while True:
+                drained = 0
+                for slug in tenants:
+                    try:
+                        count, lag = self._in_tenant(slug, OrderEvents.drain, options['batch_size'])
+                    except Exception as e:
+                        # Uma loja com problema (schema ausente, banco fora) não para as demais
+                        logger.exception('Erro ao drenar os eventos da loja %s', slug or 'default')
+                        self.stderr.write(f'{slug or "default"}: erro ao drenar eventos: {e}')
+                        continue
+                    if count:
+                        drained += count
+                        max_lag = max(max_lag, lag)
+                        if not options['once']:
+                            self.stdout.write(f'{slug or "default"}: {count} eventos gravados, atraso {lag:.2f}s')
+                total += drained
+                if drained:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            f'{total} eventos gravados em {time.perf_counter() - started:.2f}s, atraso máximo {max_lag:.2f}s'
+        )
+        self.stdout.write(self.style.SUCCESS('[SUCCESS] Order events end successfuly!'))
+
+    @staticmethod
+    def _in_tenant(slug, function, *args):
+        """Executa na loja (schema/alias) informada"""
+        token = TenantManager.activate(slug)
+        try:
+            TenantManager.activate_schema(slug)
+            return function(*args, using=TenantManager.get_alias(slug))
+        finally:
+            TenantManager.deactivate(token)
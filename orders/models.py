@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 import uuid
-from django.db import models
+from django.db import models, router, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from core.models import BaseAuditModel
+from core.database.sequences import CodeGenerator, current_year
+
+ORDER_NUMBERS = CodeGenerator('SEQ_PED_PEDIDO_NUMERO', prefix=current_year, width=8)
 
 class Order(BaseAuditModel):
     """Pedidos"""
@@ -148,24 +152,71 @@ class Order(BaseAuditModel):
     def __str__(self):
         return f"Pedido {self.Numero}"
     
+    # Campos cujo valor carregado do banco é guardado para detectar mudanças
+    TRACKED_FIELDS = ['DataPedido', 'Status', 'FormaPagamento', 'Vendedor_id', 'Desconto', 'Frete', 'Total']
+    
+    # Mantidos pelo OrderTotalsManager a partir dos itens
+    DERIVED_FIELDS = ['Subtotal', 'Total']
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._original = instance.snapshot()
+        return instance
+    
+    def snapshot(self):
+        """Valores atuais dos campos monitorados"""
+        return {field: self.__dict__.get(field) for field in self.TRACKED_FIELDS}
+    
     def save(self, *args, **kwargs):
         if not self.Numero:
-            self.Numero = self.generate_order_number()
-        self.calculate_total()
-        super().save(*args, **kwargs)
+            self.Numero = self.generate_order_number(using=kwargs.get('using'))
+        
+        original = getattr(self, '_original', {})
+        if self._state.adding:
+            self.calculate_total()
+        elif kwargs.get('update_fields') is None:
+            # Subtotal/Total da instância podem estar desatualizados em relação aos itens
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        
+        status_anterior = original.get('Status')
+        if status_anterior == self.Status:
+            super().save(*args, **kwargs)
+        else:
+            # Mudança de status reserva/baixa/libera o estoque na mesma transação
+            from products.stock import StockManager
+            from .events import OrderEvents
+            with transaction.atomic(using=kwargs.get('using') or router.db_for_write(type(self), instance=self)):
+                super().save(*args, **kwargs)
+                stock = StockManager.apply_status_change(self, status_anterior, self.Status)
+                # Histórico gravado depois pelo comando order_events (outbox na mesma transação)
+                OrderEvents.emit(OrderEvents.for_status_change(self, status_anterior, stock), using=self._state.db)
+        
+        if original and (original['Desconto'] != self.Desconto or original['Frete'] != self.Frete):
+            from .totals import OrderTotalsManager
+            OrderTotalsManager.mark_dirty(self.pk, using=self._state.db)
+        self._original = self.snapshot()
     
-    def generate_order_number(self):
+    def generate_order_number(self, using=None):
         """Gera número único do pedido"""
-        import uuid
-        from datetime import datetime
-        
-        year = datetime.now().year
-        uuid_short = str(uuid.uuid4())[:8].upper()
-        return f"{year}{uuid_short}"
+        return ORDER_NUMBERS.next(using=using or router.db_for_write(type(self), instance=self))
+    
+    @staticmethod
+    def allocate_order_numbers(count, using=None):
+        """Reserva números de pedido em lote"""
+        return ORDER_NUMBERS.allocate(count, using=using or router.db_for_write(Order))
     
     def calculate_total(self):
         """Calcula o total do pedido"""
         self.Total = self.Subtotal - self.Desconto + self.Frete
+    
+    def add_items(self, items, using=None):
+        """Adiciona itens em lote com um único recálculo do total"""
+        from .totals import OrderTotalsManager
+        return OrderTotalsManager.bulk_add_items(self, items, using=using)
 
 class OrderItem(BaseAuditModel):
     """Itens do pedido"""
@@ -236,12 +287,23 @@ class OrderItem(BaseAuditModel):
         ]
     
     def save(self, *args, **kwargs):
-        self.ValorTotal = (self.Quantidade * self.ValorUnitario) - self.Desconto
+        self.calculate_total()
         super().save(*args, **kwargs)
         
-        # Atualizar total do pedido
-        self.Pedido.calculate_total()
-        self.Pedido.save()
+        # Total do pedido é recalculado uma vez no commit da transação
+        from .totals import OrderTotalsManager
+        OrderTotalsManager.mark_dirty(self.Pedido_id, using=self._state.db)
+    
+    def delete(self, *args, **kwargs):
+        pedido_id = self.Pedido_id
+        result = super().delete(*args, **kwargs)
+        from .totals import OrderTotalsManager
+        OrderTotalsManager.mark_dirty(pedido_id, using=self._state.db)
+        return result
+    
+    def calculate_total(self):
+        """Calcula o valor total do item"""
+        self.ValorTotal = (self.Quantidade * self.ValorUnitario) - self.Desconto
     
     def __str__(self):
         return f"{self.Produto.Nome} x{self.Quantidade}"
@@ -336,6 +398,20 @@ class OrderPayment(BaseAuditModel):
     
     def __str__(self):
         return f"Pagamento {self.Pedido.Numero} - {self.Valor}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._original_status = instance.__dict__.get('Status')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        status_anterior = getattr(self, '_original_status', None)
+        super().save(*args, **kwargs)
+        if status_anterior != self.Status:
+            from .events import OrderEvents
+            OrderEvents.emit([OrderEvents.for_payment(self, status_anterior)], using=self._state.db)
+        self._original_status = self.Status
 
 class OrderHistory(BaseAuditModel):
     """Histórico de alterações do pedido"""
@@ -375,6 +451,12 @@ class OrderHistory(BaseAuditModel):
         verbose_name=_('Usuário'),
         db_column='ID_USUARIO'
     )
+    # Sem auto_now_add: o comando order_events grava a data do evento, não a do consumo
+    DataInclusao = models.DateTimeField(
+        _('Criado em'),
+        default=timezone.now,
+        db_column='DATA_INCLUSAO'
+    )
     
     class Meta:
         db_table = 'PED_PEDIDO_HISTORICO'
@@ -388,3 +470,72 @@ class OrderHistory(BaseAuditModel):
     
     def __str__(self):
         return f"Histórico {self.Pedido.Numero} - {self.StatusNovo}"
+
+class OrderEvent(models.Model):
+    """Eventos de pedido aguardando gravação no histórico (outbox transacional)
+
+    Gravados na mesma transação da alteração e convertidos em OrderHistory
+    em lote pelo comando ``order_events`` (ver orders/events.py).
+    """
+    TYPE_CHOICES = [
+        ('STATUS', _('Status')),
+        ('PAYMENT', _('Pagamento')),
+        ('STOCK', _('Estoque')),
+    ]
+    
+    # Sequencial: o comando consome os eventos na ordem de gravação
+    PedidoEventoId = models.BigAutoField(
+        primary_key=True,
+        db_column='ID_PEDIDO_EVENTO'
+    )
+    # Sem FK no banco: o INSERT não trava a linha do pedido
+    Pedido = models.ForeignKey(
+        Order,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name=_('Pedido'),
+        db_column='ID_PEDIDO'
+    )
+    Tipo = models.CharField(
+        _('Tipo'),
+        max_length=10,
+        choices=TYPE_CHOICES,
+        db_column='TIPO'
+    )
+    StatusAnterior = models.CharField(
+        _('Status anterior'),
+        max_length=20,
+        blank=True,
+        db_column='STATUS_ANTERIOR'
+    )
+    StatusNovo = models.CharField(
+        _('Status novo'),
+        max_length=20,
+        db_column='STATUS_NOVO'
+    )
+    Descricao = models.TextField(
+        _('Descrição'),
+        db_column='DESCRICAO'
+    )
+    IdUsuario = models.UUIDField(
+        _('Usuário'),
+        null=True,
+        blank=True,
+        db_column='ID_USUARIO'
+    )
+    Usuario = models.CharField(
+        _('Nome do usuário'),
+        max_length=50,
+        db_column='USUARIO'
+    )
+    DataEvento = models.DateTimeField(
+        _('Data do evento'),
+        default=timezone.now,
+        db_column='DATA_EVENTO'
+    )
+    
+    class Meta:
+        db_table = 'PED_PEDIDO_EVENTO'
+        verbose_name = _('Evento do pedido')
+        verbose_name_plural = _('Eventos do pedido')
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+# orders/signals.py
+from django.dispatch import Signal
+
+# Totais recalculados via UPDATE (sem Order.save)
+# kwargs: changes = [(snapshot_anterior, snapshot_novo), ...], using
+order_totals_changed = Signal()
+
+# Pedidos gravados via bulk_create (sem Order.save)
+# kwargs: orders = [Order, ...], using
+orders_bulk_created = Signal()
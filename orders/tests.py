@@ -1,4 +1,277 @@
 # -*- coding: utf-8 -*-
-from django.test import TestCase
+import uuid
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from datetime import timedelta
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.database.tenants import TenantManager
+from users.models import User
+from customers.models import Customer
+from products.models import Category, Product
+from .events import OrderEvents
+from .importer import OrderBulkImporter
+from .models import ORDER_NUMBERS, Order, OrderEvent, OrderHistory, OrderItem
+from .totals import OrderTotalsManager
+from .views import OrderImportView, OrderViewSet
 
-# Create your tests here.
+def create_product(codigo='P1', preco='10.00', estoque=100):
+    categoria, _ = Category.objects.get_or_create(Nome='Geral')
+    return Product.objects.create(
+        Codigo=codigo, Nome=f'Produto {codigo}', Categoria=categoria,
+        Preco=Decimal(preco), QuantidadeEstoque=estoque, Status='ACTIVE'
+    )
+
+def create_order(**kwargs):
+    customer = Customer.objects.filter(Codigo='C1').first() or Customer.objects.create(
+        Codigo='C1', Nome='Cliente', Documento='1'
+    )
+    return Order.objects.create(Cliente=customer, **kwargs)
+
+class OrderTotalsTests(TransactionTestCase):
+    """Recálculo dos totais no commit (OrderTotalsManager)"""
+
+    def setUp(self):
+        self.product = create_product()
+        self.order = create_order()
+
+    def add_item(self, order, quantidade=1):
+        return OrderItem.objects.create(
+            Pedido=order, Produto=self.product, Quantidade=quantidade, ValorUnitario=Decimal('10.00')
+        )
+
+    def test_recalculates_once_per_transaction(self):
+        with mock.patch.object(OrderTotalsManager, 'recalculate', wraps=OrderTotalsManager.recalculate) as recalculate:
+            with transaction.atomic():
+                for _ in range(3):
+                    self.add_item(self.order)
+                recalculate.assert_not_called()
+        recalculate.assert_called_once_with([self.order.pk], using='default')
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.Total, Decimal('30.00'))
+
+    def test_rollback_discards_pending_orders(self):
+        other = create_order()
+        with mock.patch.object(OrderTotalsManager, 'recalculate', wraps=OrderTotalsManager.recalculate) as recalculate:
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.add_item(self.order)
+                    raise RuntimeError
+            with transaction.atomic():
+                self.add_item(other)
+        recalculate.assert_called_once_with([other.pk], using='default')
+
+    def test_outside_atomic_recalculates_immediately(self):
+        self.add_item(self.order, quantidade=2)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.Total, Decimal('20.00'))
+
+    def test_bulk_add_items_accepts_generator(self):
+        items = (
+            OrderItem(Produto=self.product, Quantidade=quantidade, ValorUnitario=Decimal('10.00'))
+            for quantidade in (1, 2)
+        )
+        created = self.order.add_items(items)
+        self.assertEqual(len(created), 2)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.Total, Decimal('30.00'))
+
+class TenantAliasTests(SimpleTestCase):
+    """Gravações em lote seguem o banco da loja ativa (router), não o 'default'"""
+
+    @mock.patch.object(TenantManager, 'get_alias', return_value='tenant_loja1')
+    def test_importer_and_allocations_use_router(self, get_alias):
+        self.assertEqual(OrderBulkImporter().using, 'tenant_loja1')
+        with mock.patch.object(ORDER_NUMBERS, 'allocate', return_value=['1']) as allocate:
+            Order.allocate_order_numbers(1)
+        allocate.assert_called_once_with(1, using='tenant_loja1')
+
+    def test_items_follow_order_database(self):
+        order = Order()
+        order._state.db = 'tenant_loja1'
+        with mock.patch.object(OrderItem.objects, 'using', side_effect=RuntimeError) as using, \
+                mock.patch('orders.totals.transaction.atomic'), self.assertRaises(RuntimeError):
+            order.add_items([])
+        using.assert_called_once_with('tenant_loja1')
+
+class OrderEventsTests(TransactionTestCase):
+    """Histórico via outbox (OrderEvent -> OrderHistory)"""
+
+    def setUp(self):
+        self.product = create_product()
+
+    @staticmethod
+    def created_order():
+        """Pedido já com o evento 'Pedido criado' consumido"""
+        order = create_order()
+        OrderEvents.drain()
+        OrderHistory.objects.all().delete()
+        return order
+
+    def test_status_change_is_drained_once_with_event_date(self):
+        order = self.created_order()
+        OrderItem.objects.create(Pedido=order, Produto=self.product, Quantidade=1, ValorUnitario=Decimal('10.00'))
+        with transaction.atomic():
+            order.Status = 'CONFIRMED'
+            order.save()
+        self.assertFalse(OrderHistory.objects.exists())
+        events = list(OrderEvent.objects.order_by('pk'))
+        self.assertEqual([event.Tipo for event in events], ['STATUS', 'STOCK'])
+
+        self.assertEqual(OrderEvents.drain()[0], 2)
+        self.assertEqual(OrderEvents.drain(), (0, None))
+        self.assertFalse(OrderEvent.objects.exists())
+        histories = OrderHistory.objects.order_by('DataInclusao')
+        self.assertEqual([history.DataInclusao for history in histories], [event.DataEvento for event in events])
+        self.assertEqual(histories[0].StatusNovo, 'CONFIRMED')
+
+    def test_rolled_back_change_emits_nothing(self):
+        order = self.created_order()
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                order.Status = 'CANCELLED'
+                order.save()
+                raise RuntimeError
+        self.assertFalse(OrderEvent.objects.exists())
+
+    def test_import_writes_history_through_outbox(self):
+        self.created_order()  # cliente C1
+        report = OrderBulkImporter().run([
+            (1, {'Cliente': 'C1', 'Status': 'CONFIRMED', 'itens': [{'Produto': 'P1', 'Quantidade': 2}]}),
+        ])
+        self.assertEqual(report.imported, 1)
+        self.assertFalse(OrderHistory.objects.exists())
+        OrderEvents.drain()
+        self.assertEqual(
+            sorted(OrderHistory.objects.values_list('Descricao', flat=True)),
+            ['Estoque reservado: 1 itens', 'Pedido importado em lote']
+        )
+
+    def test_command_keeps_draining_after_tenant_error(self):
+        create_order()
+        drain, calls = OrderEvents.drain, []
+
+        def failing_once(*args, **kwargs):
+            calls.append(kwargs['using'])
+            if len(calls) == 1:
+                raise DatabaseError('schema')
+            return drain(*args, **kwargs)
+
+        stderr = StringIO()
+        tenants = {'loja1': {'SCHEMA': 'LOJA1', 'DEDICATED': False}}
+        with override_settings(TENANTS=tenants), mock.patch.object(OrderEvents, 'drain', side_effect=failing_once), \
+                mock.patch.object(TenantManager, 'is_provisioned', return_value=True), \
+                self.assertLogs('orders.management.commands.order_events', 'ERROR'):
+            call_command('order_events', once=True, stdout=StringIO(), stderr=stderr)
+        self.assertIn('erro ao drenar eventos: schema', stderr.getvalue())
+        self.assertFalse(OrderEvent.objects.exists())
+
+@mock.patch.object(OrderViewSet, 'throttle_classes', [])
+class OrderListApiTests(TestCase):
+    """GET /api/v1/orders/: paginação por chave"""
+
+    url = '/api/v1/orders/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            username='api', email='api@example.com', password='x'
+        ))
+        now = timezone.now()
+        # Datas repetidas: o desempate pelo pk precisa manter a ordem estável
+        for minutes in (0, 1, 1, 1, 2, 3, 3):
+            order = create_order()
+            Order.objects.filter(pk=order.pk).update(DataPedido=now - timedelta(minutes=minutes))
+        self.expected = [str(pk) for pk in Order.objects.order_by('-DataPedido', '-pk').values_list('pk', flat=True)]
+
+    def pages(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([order['PedidoId'] for order in response.data['results']])
+            url = response.data[link]
+        return pages
+
+    def test_cursor_round_trip(self):
+        forward = self.pages(f'{self.url}?page_size=3', 'next')
+        self.assertEqual([len(page) for page in forward], [3, 3, 1])
+        self.assertEqual(sum(forward, []), self.expected)
+
+        last = self.client.get(f'{self.url}?page_size=3').data['next']
+        last = self.client.get(last).data['next']
+        backward = self.pages(self.client.get(last).data['previous'], 'previous')
+        self.assertEqual(backward, forward[-2::-1])
+
+    def test_invalid_cursor_is_404(self):
+        self.assertEqual(self.client.get(f'{self.url}?cursor=invalido').status_code, 404)
+
+    def test_list_not_modified_until_page_changes(self):
+        url = f'{self.url}?page_size=3'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Fora da página: mesmo ETag
+        Order.objects.filter(pk=self.expected[-1]).update(Observacoes='fora da página')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        order = Order.objects.get(pk=self.expected[0])
+        order.Status = 'CONFIRMED'
+        order.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['results'][0]['Status'], 'CONFIRMED')
+
+    def test_sparse_fields_keep_validator_loaded(self):
+        url = f'{self.url}?page_size=3&fields=Numero'
+        response = self.client.get(url)
+        self.assertEqual(list(response.data['results'][0]), ['Numero'])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        # Só a página (ATOMIC_REQUESTS soma o SAVEPOINT/RELEASE)
+        selects = [query['sql'] for query in queries if query['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 1)
+        self.assertIn('LIMIT 4', selects[0])
+
+    def test_detail_not_modified_and_last_modified(self):
+        url = f'{self.url}{self.expected[0]}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        Order.objects.filter(pk=self.expected[0]).update(Observacoes='alterado')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+        self.assertEqual(self.client.get(f'{self.url}{uuid.uuid4()}/').status_code, 404)
+
+@mock.patch.object(OrderImportView, 'throttle_classes', [])
+class OrderImportApiTests(TestCase):
+    """POST /api/v1/orders/import/ exige manage_orders"""
+
+    def test_requires_manage_orders(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(
+            username='operador', email='operador@example.com', password='x', Papel='OPERATOR'
+        ))
+        response = client.post('/api/v1/orders/import/', b'{}', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 403)
+
+    def test_chunk_size_is_clamped(self):
+        self.assertEqual(OrderBulkImporter(chunk_size=10 ** 9).chunk_size, OrderBulkImporter.MAX_CHUNK_SIZE)
+        self.assertEqual(OrderBulkImporter(chunk_size=0).chunk_size, 1)
+
+    def test_csv_rows_out_of_order_are_reported(self):
+        importer = OrderBulkImporter()
+        records = list(importer.read_csv([
+            'Referencia,Cliente,Produto,Quantidade\n',
+            'A,C1,P1,1\n', 'A,C1,P2,1\n', 'B,C1,P1,1\n', 'A,C1,P3,1\n', 'B,C1,P2,1\n',
+        ]))
+        self.assertEqual([linha for linha, _ in records], [2, 4])
+        self.assertEqual([len(record['itens']) for _, record in records], [2, 2])
+        self.assertEqual([error['linha'] for error in importer.report.errors], [5])
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# orders/totals.py
+from decimal import Decimal
+from django.db import router, transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from core.database.transactions import commit_batch
+from .signals import order_totals_changed
+
+class OrderTotalsManager:
+    """Recalcula Subtotal/Total dos pedidos a partir dos itens (PED_PEDIDO_ITEM)"""
+
+    @staticmethod
+    def mark_dirty(order_id, using=None):
+        """Agenda o recálculo do pedido para o commit da transação atual (um callback por transação)"""
+        from .models import Order
+        using = using or router.db_for_write(Order)
+        pending = commit_batch(
+            'order_totals', lambda order_ids: OrderTotalsManager.recalculate(list(order_ids), using=using),
+            using=using,
+        )
+        if pending is None:
+            # Fora de um bloco atomic: recalcula já
+            OrderTotalsManager.recalculate([order_id], using=using)
+        else:
+            pending.add(order_id)
+
+    @staticmethod
+    def recalculate(order_ids, using=None):
+        """Atualiza Subtotal e Total com uma agregação sobre os itens"""
+        from .models import Order, OrderItem
+        using = using or router.db_for_write(Order)
+
+        money = DecimalField(max_digits=10, decimal_places=2)
+        items_total = (
+            OrderItem.objects.using(using)
+            .filter(Pedido=OuterRef('pk'))
+            .order_by()
+            .values('Pedido')
+            .annotate(soma=Sum('ValorTotal'))
+            .values('soma')
+        )
+        subtotal = Coalesce(Subquery(items_total, output_field=money), Value(Decimal('0')), output_field=money)
+
+        orders = Order.objects.using(using).filter(pk__in=order_ids)
+        total = subtotal - F('Desconto') + F('Frete')
+
+        # Totais antes/depois para quem acompanha os valores (métricas do dashboard)
+        changes = []
+        if order_totals_changed.has_listeners(Order):
+            for row in orders.order_by().values(*Order.TRACKED_FIELDS).annotate(novo_total=total):
+                novo_total = row.pop('novo_total')
+                if novo_total != row['Total']:
+                    changes.append((row, {**row, 'Total': novo_total}))
+
+        # F() referencia os valores anteriores ao UPDATE, por isso o Total repete a subquery
+        updated = orders.update(
+            Subtotal=subtotal,
+            Total=total,
+            DataAlteracao=timezone.now(),
+        )
+        if changes:
+            order_totals_changed.send(sender=Order, changes=changes, using=using)
+        return updated
+
+    @staticmethod
+    def bulk_add_items(order, items, using=None, batch_size=500):
+        """Insere os itens do pedido com bulk_create e recalcula o total uma única vez"""
+        from .models import OrderItem
+        # Mesmo banco do pedido (loja dedicada)
+        using = using or order._state.db or router.db_for_write(OrderItem, instance=order)
+
+        items = list(items)
+        for item in items:
+            item.Pedido = order
+            item.calculate_total()
+
+        with transaction.atomic(using=using):
+            created = OrderItem.objects.using(using).bulk_create(items, batch_size=batch_size)
+            OrderTotalsManager.mark_dirty(order.pk, using=using)
+        return created
@@ -4,7 +4,11 @@ from rest_framework.routers import DefaultRouter
 from .views import *
 
 router = DefaultRouter()
+router.register(r'', OrderViewSet, basename='order')
 
 urlpatterns = [
+    path('import/', OrderImportView.as_view(), name='order-import'),
+    path('export/<str:fmt>/', OrderExportView.as_view(), name='order-export'),
+    path('items/export/<str:fmt>/', OrderItemExportView.as_view(), name='order-item-export'),
     path('', include(router.urls)),
 ]
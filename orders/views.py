@@ -1,4 +1,116 @@
 # -*- coding: utf-8 -*-
-from django.shortcuts import render
+from django.db import transaction
+from django.utils.decorators import method_decorator
+from rest_framework import filters, status, viewsets
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django_filters.rest_framework import DjangoFilterBackend
+from api.conditional import ConditionalGetMixin
+from api.dynamic import DynamicFieldsViewMixin
+from api.serializers import OrderSerializer
+from core.exports import ExportView
+from core.pagination import KeysetPagination
+from users.permissions import HasPermission
+from .importer import OrderBulkImporter
+from .models import Order, OrderItem
 
-# Create your views here.
+class OrderViewSet(ConditionalGetMixin, DynamicFieldsViewMixin, viewsets.ReadOnlyModelViewSet):
+    """Pedidos, paginados por chave em (DataPedido, PedidoId)"""
+    queryset = Order.objects.all()
+    serializer_class = OrderSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = '-DataPedido'
+    # Sem OrderingFilter: a ordenação é a chave da paginação
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_fields = ['Status', 'StatusPagamento', 'Cliente', 'Vendedor']
+    search_fields = ['Numero', 'Cliente__Nome']
+
+class OrderExportView(ExportView):
+    """Exportação de pedidos (CSV/NDJSON em streaming), ex.: ?DataPedido__gte=2025-01-01"""
+    queryset = Order.objects.all()
+    filterset_fields = {
+        'DataPedido': ['gte', 'lt'],
+        'Status': ['exact'],
+        'StatusPagamento': ['exact'],
+        'Cliente': ['exact'],
+        'Vendedor': ['exact'],
+    }
+    export_name = 'pedidos'
+    export_ordering = ['DataPedido', 'pk']
+    export_columns = [
+        ('Numero', 'Numero'),
+        ('DataPedido', 'DataPedido'),
+        ('ClienteCodigo', 'Cliente__Codigo'),
+        ('Cliente', 'Cliente__Nome'),
+        ('Vendedor', 'Vendedor__username'),
+        ('Status', 'Status'),
+        ('StatusPagamento', 'StatusPagamento'),
+        ('FormaPagamento', 'FormaPagamento'),
+        ('Subtotal', 'Subtotal'),
+        ('Desconto', 'Desconto'),
+        ('Frete', 'Frete'),
+        ('Total', 'Total'),
+        ('DataEntregaPrevista', 'DataEntregaPrevista'),
+        ('DataEntrega', 'DataEntrega'),
+    ]
+
+class OrderItemExportView(ExportView):
+    """Exportação dos itens de pedido (CSV/NDJSON em streaming), filtrada pelo pedido"""
+    queryset = OrderItem.objects.all()
+    filterset_fields = {
+        'Pedido__DataPedido': ['gte', 'lt'],
+        'Pedido__Status': ['exact'],
+        'Pedido': ['exact'],
+        'Produto': ['exact'],
+    }
+    export_name = 'pedidos_itens'
+    export_ordering = ['Pedido__DataPedido', 'Pedido', 'pk']
+    export_columns = [
+        ('Pedido', 'Pedido__Numero'),
+        ('DataPedido', 'Pedido__DataPedido'),
+        ('ProdutoCodigo', 'Produto__Codigo'),
+        ('Produto', 'Produto__Nome'),
+        ('Quantidade', 'Quantidade'),
+        ('ValorUnitario', 'ValorUnitario'),
+        ('Desconto', 'Desconto'),
+        ('ValorTotal', 'ValorTotal'),
+    ]
+
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+class OrderImportView(APIView):
+    """Importação de pedidos em lote (NDJSON ou CSV)
+    
+    Aceita o arquivo no campo multipart ``file`` ou o corpo bruto com
+    Content-Type ``application/x-ndjson`` / ``text/csv``. Cada bloco de
+    pedidos é gravado em sua própria transação.
+    """
+    permission_classes = [IsAuthenticated, HasPermission]
+    required_permission = 'manage_orders'
+    
+    def post(self, request):
+        content_type = request.content_type or ''
+        
+        if content_type.startswith('multipart/form-data'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({'error': 'Arquivo não enviado'}, status=status.HTTP_400_BAD_REQUEST)
+            is_csv = upload.name.lower().endswith('.csv')
+            lines = upload
+        elif content_type.startswith(('text/csv', 'application/x-ndjson', 'application/jsonl')):
+            is_csv = content_type.startswith('text/csv')
+            lines = request._request
+        else:
+            return Response({'error': 'Formato não suportado, use NDJSON ou CSV'},
+                           status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        
+        try:
+            chunk_size = int(request.query_params.get('chunk_size', 500))
+        except ValueError:
+            chunk_size = 500
+        
+        importer = OrderBulkImporter(user=request.user, chunk_size=chunk_size)
+        reader = importer.read_csv if is_csv else importer.read_ndjson
+        report = importer.run(reader(lines))
+        return Response(report.as_dict())
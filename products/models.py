@@ -366,3 +366,63 @@ class ProductVariation(BaseAuditModel):
     
     def __str__(self):
         return f"{self.Produto.Nome} - {self.TipoVariacao}: {self.ValorVariacao}"
+
+class StockReservation(BaseAuditModel):
+    """Reservas de estoque por pedido (ledger de movimentação)"""
+    
+    STATUS_CHOICES = [
+        ('RESERVED', _('Reservado')),
+        ('COMMITTED', _('Baixado')),
+        ('RELEASED', _('Liberado')),
+    ]
+    
+    ReservaId = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        db_column='ID_RESERVA'
+    )
+    Pedido = models.ForeignKey(
+        'orders.Order',
+        on_delete=models.CASCADE,
+        related_name='reservas_estoque',
+        verbose_name=_('Pedido'),
+        db_column='ID_PEDIDO'
+    )
+    Produto = models.ForeignKey(
+        Product,
+        on_delete=models.PROTECT,
+        verbose_name=_('Produto'),
+        db_column='ID_PRODUTO'
+    )
+    ProdutoVariante = models.ForeignKey(
+        ProductVariation,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_('Variação'),
+        db_column='ID_VARIACAO'
+    )
+    Quantidade = models.PositiveIntegerField(
+        _('Quantidade'),
+        db_column='QUANTIDADE'
+    )
+    Status = models.CharField(
+        _('Status'),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='RESERVED',
+        db_column='STATUS'
+    )
+    
+    class Meta:
+        db_table = 'PRD_ESTOQUE_RESERVA'
+        verbose_name = _('Reserva de estoque')
+        verbose_name_plural = _('Reservas de estoque')
+        indexes = [
+            models.Index(fields=['Pedido', 'Status'], name='IDX_PRD_RES_PED_ST'),
+            models.Index(fields=['Produto'], name='IDX_PRD_RES_PRO'),
+        ]
+    
+    def __str__(self):
+        return f"{self.Produto_id} x{self.Quantidade} ({self.Status})"
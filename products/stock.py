@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+# products/stock.py
+from collections import defaultdict
+from django.db import transaction, router
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from .models import Product, ProductVariation, StockReservation
+
+class InsufficientStockError(ValidationError):
+    """Estoque insuficiente para reservar os itens do pedido (HTTP 400 na API)"""
+
+    default_code = 'insufficient_stock'
+
+class _Shortage(Exception):
+    """UPDATE condicional não atingiu todas as linhas (convertido após o rollback)"""
+
+    def __init__(self, model, field, quantities):
+        super().__init__(model, field, quantities)
+        self.model, self.field, self.quantities = model, field, quantities
+
+class StockManager:
+    """Reserva, baixa e liberação de estoque ligadas ao Status do pedido
+
+    Itens com variação consomem ``ProductVariation.EstoqueVariacao``; os demais
+    consomem ``Product.QuantidadeEstoque``. Cada operação executa um UPDATE
+    condicional por tabela para todos os itens do pedido.
+    """
+
+    RESERVE_STATUSES = {'CONFIRMED', 'PROCESSING'}
+    COMMIT_STATUSES = {'SHIPPED', 'DELIVERED'}
+    RELEASE_STATUSES = {'CANCELLED', 'RETURNED'}
+
+    @staticmethod
+    def apply_status_change(order, previous_status, new_status):
+        """Aplica a transição de estoque correspondente à mudança de status
+
+        Devolve (operação, quantidade de itens) ou None se o estoque não mudou.
+        """
+        if new_status in StockManager.RESERVE_STATUSES:
+            operation, count = 'RESERVED', len(StockManager.reserve(order))
+        elif new_status in StockManager.COMMIT_STATUSES:
+            operation, count = 'COMMITTED', StockManager.commit(order)
+        elif new_status in StockManager.RELEASE_STATUSES:
+            operation, count = 'RELEASED', StockManager.release(order)
+        else:
+            return None
+        return (operation, count) if count else None
+
+    @staticmethod
+    def reserve(order):
+        """Reserva o estoque de todos os itens; nada é reservado se faltar algum"""
+        using = router.db_for_write(StockReservation, instance=order)
+        active = StockReservation.objects.using(using).filter(
+            Pedido=order, Status__in=['RESERVED', 'COMMITTED']
+        )
+        if active.exists():
+            return []
+
+        reservations = [
+            StockReservation(
+                Pedido=order,
+                Produto_id=produto_id,
+                ProdutoVariante_id=variante_id,
+                Quantidade=quantidade,
+                Status='RESERVED',
+            )
+            for produto_id, variante_id, quantidade in order.itens.using(using).values_list(
+                'Produto_id', 'ProdutoVariante_id', 'Quantidade'
+            )
+        ]
+        return StockManager._consume(reservations, using)
+
+    @staticmethod
+    def apply_bulk(items, using):
+        """Estoque de pedidos gravados em lote já no status final (importação)
+
+        ``items`` são os OrderItem dos pedidos: reserva (CONFIRMED/PROCESSING) ou
+        baixa (SHIPPED/DELIVERED) com um UPDATE por tabela para o lote inteiro.
+        """
+        reservations = []
+        for item in items:
+            status = item.Pedido.Status
+            if status in StockManager.RESERVE_STATUSES:
+                reservation_status = 'RESERVED'
+            elif status in StockManager.COMMIT_STATUSES:
+                reservation_status = 'COMMITTED'
+            else:
+                continue
+            reservations.append(StockReservation(
+                Pedido=item.Pedido,
+                Produto_id=item.Produto_id,
+                ProdutoVariante_id=item.ProdutoVariante_id,
+                Quantidade=item.Quantidade,
+                Status=reservation_status,
+                UsuarioInclusao=item.UsuarioInclusao,
+                UsuarioAlteracao=item.UsuarioAlteracao,
+            ))
+        return StockManager._consume(reservations, using)
+
+    @staticmethod
+    def _consume(reservations, using):
+        """Desconta as quantidades das reservas e as grava; nada muda se faltar algum item"""
+        if not reservations:
+            return []
+        products, variations = defaultdict(int), defaultdict(int)
+        for reservation in reservations:
+            if reservation.ProdutoVariante_id:
+                variations[reservation.ProdutoVariante_id] += reservation.Quantidade
+            else:
+                products[reservation.Produto_id] += reservation.Quantidade
+
+        try:
+            with transaction.atomic(using=using):
+                StockManager._decrement(Product, 'QuantidadeEstoque', products, using)
+                StockManager._decrement(ProductVariation, 'EstoqueVariacao', variations, using)
+                return StockReservation.objects.using(using).bulk_create(reservations)
+        except _Shortage as e:
+            raise InsufficientStockError(StockManager._shortage_message(e.model, e.field, e.quantities, using))
+
+    @staticmethod
+    def commit(order):
+        """Confirma a baixa das reservas (reserva antes se ainda não houver)"""
+        using = router.db_for_write(StockReservation, instance=order)
+        with transaction.atomic(using=using):
+            StockManager.reserve(order)
+            return StockReservation.objects.using(using).filter(
+                Pedido=order, Status='RESERVED'
+            ).update(Status='COMMITTED', DataAlteracao=timezone.now())
+
+    @staticmethod
+    def release(order):
+        """Devolve ao estoque as quantidades reservadas ou baixadas"""
+        using = router.db_for_write(StockReservation, instance=order)
+        with transaction.atomic(using=using):
+            active = StockReservation.objects.using(using).select_for_update().filter(
+                Pedido=order, Status__in=['RESERVED', 'COMMITTED']
+            )
+            products, variations, ids = defaultdict(int), defaultdict(int), []
+            for reserva_id, produto_id, variante_id, quantidade in active.values_list(
+                'ReservaId', 'Produto_id', 'ProdutoVariante_id', 'Quantidade'
+            ):
+                ids.append(reserva_id)
+                if variante_id:
+                    variations[variante_id] += quantidade
+                else:
+                    products[produto_id] += quantidade
+            if not ids:
+                return 0
+
+            StockManager._increment(Product, 'QuantidadeEstoque', products, using)
+            StockManager._increment(ProductVariation, 'EstoqueVariacao', variations, using)
+            return StockReservation.objects.using(using).filter(pk__in=ids).update(
+                Status='RELEASED', DataAlteracao=timezone.now()
+            )
+
+    @staticmethod
+    def _quantity_case(quantities):
+        return Case(
+            *[When(pk=pk, then=Value(quantidade)) for pk, quantidade in quantities.items()],
+            output_field=IntegerField()
+        )
+
+    @staticmethod
+    def _decrement(model, field, quantities, using):
+        """UPDATE ... SET estoque = estoque - qtd WHERE estoque >= qtd para todos os itens"""
+        if not quantities:
+            return
+        amount = StockManager._quantity_case(quantities)
+        updated = model.objects.using(using).filter(
+            pk__in=list(quantities), **{f'{field}__gte': amount}
+        ).update(**{field: F(field) - amount, 'DataAlteracao': timezone.now()})
+        if updated != len(quantities):
+            raise _Shortage(model, field, quantities)
+
+    @staticmethod
+    def _increment(model, field, quantities, using):
+        if not quantities:
+            return
+        amount = StockManager._quantity_case(quantities)
+        model.objects.using(using).filter(pk__in=list(quantities)).update(
+            **{field: F(field) + amount, 'DataAlteracao': timezone.now()}
+        )
+
+    @staticmethod
+    def _shortage_message(model, field, quantities, using):
+        """Monta a mensagem com os itens sem estoque (após o rollback)"""
+        code_field = 'CodigoSku' if model is ProductVariation else 'Codigo'
+        missing = [
+            f'{codigo} (disponível: {estoque}, solicitado: {quantities[pk]})'
+            for pk, codigo, estoque in model.objects.using(using).filter(
+                pk__in=list(quantities)
+            ).values_list('pk', code_field, field)
+            if estoque < quantities[pk]
+        ]
+        return 'Estoque insuficiente: ' + ', '.join(missing or [str(model._meta.verbose_name)])
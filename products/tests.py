@@ -1,4 +1,87 @@
 # -*- coding: utf-8 -*-
-from django.test import TestCase
+import threading
+from decimal import Decimal
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.views import exception_handler
+from orders.importer import OrderBulkImporter
+from orders.models import OrderItem
+from orders.tests import create_order, create_product
+from .models import StockReservation
+from .stock import InsufficientStockError, StockManager
 
-# Create your tests here.
+class StockManagerTests(TransactionTestCase):
+    """Reserva/baixa de estoque (StockManager)"""
+
+    def setUp(self):
+        self.product = create_product(estoque=1)
+
+    def order_with_item(self, quantidade=1):
+        order = create_order()
+        OrderItem.objects.create(
+            Pedido=order, Produto=self.product, Quantidade=quantidade, ValorUnitario=Decimal('10.00')
+        )
+        return order
+
+    def test_concurrent_reservations_do_not_oversell(self):
+        orders = [self.order_with_item(), self.order_with_item()]
+        barrier, results = threading.Barrier(len(orders)), []
+
+        def confirm(order):
+            try:
+                barrier.wait()
+                order.Status = 'CONFIRMED'
+                order.save()
+                results.append('ok')
+            except InsufficientStockError:
+                results.append('insufficient')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=confirm, args=(order,)) for order in orders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), ['insufficient', 'ok'])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.QuantidadeEstoque, 0)
+        self.assertEqual(StockReservation.objects.count(), 1)
+
+    def test_insufficient_stock_is_a_400(self):
+        order = self.order_with_item(quantidade=2)
+        with self.assertRaises(InsufficientStockError) as raised:
+            StockManager.reserve(order)
+        self.assertIsInstance(raised.exception, ValidationError)
+        self.assertIn('P1 (disponível: 1, solicitado: 2)', raised.exception.detail[0])
+
+        response = exception_handler(raised.exception, {})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.QuantidadeEstoque, 1)
+
+    def test_import_reserves_and_commits_stock_in_bulk(self):
+        self.product.QuantidadeEstoque = 5
+        self.product.save()
+        create_order()  # cliente C1
+        importer = OrderBulkImporter()
+        records = [
+            (1, {'Cliente': 'C1', 'Status': 'CONFIRMED', 'itens': [{'Produto': 'P1', 'Quantidade': 2}]}),
+            (2, {'Cliente': 'C1', 'Status': 'SHIPPED', 'itens': [{'Produto': 'P1', 'Quantidade': 1}]}),
+            (3, {'Cliente': 'C1', 'Status': 'PENDING', 'itens': [{'Produto': 'P1', 'Quantidade': 4}]}),
+            (4, {'Cliente': 'C1', 'Status': 'CONFIRMED', 'itens': [{'Produto': 'P1', 'Quantidade': 3}]}),
+        ]
+        report = importer.run(records)
+
+        self.assertEqual(report.imported, 3)
+        self.assertEqual([error['linha'] for error in report.errors], [4])
+        self.assertIn('Estoque insuficiente', report.errors[0]['erro'])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.QuantidadeEstoque, 2)
+        self.assertEqual(
+            sorted(StockReservation.objects.values_list('Status', 'Quantidade')),
+            [('COMMITTED', 1), ('RESERVED', 2)]
+        )
@@ -1,4 +1,21 @@
 # -*- coding: utf-8 -*-
-from django.shortcuts import render
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters, viewsets
+from rest_framework.permissions import IsAuthenticated
+from api.conditional import ConditionalGetMixin
+from api.dynamic import DynamicFieldsViewMixin
+from api.serializers import ProductSerializer
+from core.pagination import KeysetPagination
+from .models import Product
 
-# Create your views here.
+class ProductViewSet(ConditionalGetMixin, DynamicFieldsViewMixin, viewsets.ReadOnlyModelViewSet):
+    """Produtos, paginados por chave em (DataInclusao, ProdutoId)"""
+    queryset = Product.objects.all()
+    serializer_class = ProductSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = '-DataInclusao'
+    # Sem OrderingFilter: a ordenação é a chave da paginação
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_fields = ['Status', 'Categoria', 'Marca', 'Destaque']
+    search_fields = ['Codigo', 'Nome']
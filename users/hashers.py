@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# users/hashers.py
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, must_update_salt
+
+class BRAVAPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 com iterações configuráveis (PASSWORD_HASH_ITERATIONS)
+
+    O custo do hash domina o tempo do login. A configuração só aumenta o
+    padrão do Django, nunca o reduz, e senhas gravadas com menos iterações
+    são regravadas no próximo login bem-sucedido (nunca rebaixadas).
+    """
+
+    @property
+    def iterations(self):
+        return max(getattr(settings, 'PASSWORD_HASH_ITERATIONS', None) or 0, PBKDF2PasswordHasher.iterations)
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return decoded['iterations'] < self.iterations or must_update_salt(decoded['salt'], self.salt_entropy)
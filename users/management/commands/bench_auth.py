@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# users/management/commands/bench_auth.py
+import json
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from users.models import User
+from users.tokens import RevokedTokens
+from users.views import AuthViewSet
+
+OPERATIONS = ('login', 'refresh', 'logout')
+
+class Command(BaseCommand):
+    help = 'Benchmark login/refresh/logout throughput through the full middleware stack'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cycles', type=int, default=50, help='Ciclos login -> refresh -> logout por thread')
+        parser.add_argument('--threads', type=int, default=1, help='Clientes simultâneos')
+        parser.add_argument('--warmup', type=int, default=2, help='Ciclos descartados por thread')
+        parser.add_argument('--hash-iterations', type=int, default=None,
+                            help='Sobrescreve PASSWORD_HASH_ITERATIONS durante o teste')
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--prefix', default='/api/v1/auth')
+
+    def handle(self, *args, **options):
+        hash_iterations = getattr(settings, 'PASSWORD_HASH_ITERATIONS', None)
+        if options['hash_iterations']:
+            settings.PASSWORD_HASH_ITERATIONS = options['hash_iterations']
+
+        # O limite de requisições anônimas bloquearia o login repetido
+        throttle_classes, AuthViewSet.throttle_classes = AuthViewSet.throttle_classes, []
+        password = uuid.uuid4().hex
+        user = User.objects.create_user(
+            username=f'bench_{uuid.uuid4().hex[:12]}',
+            email=f'bench_{uuid.uuid4().hex[:12]}@brava.local',
+            password=password,
+        )
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+                results = list(executor.map(
+                    lambda _: self._run(user.email, password, options), range(options['threads'])
+                ))
+            elapsed = time.perf_counter() - started
+        finally:
+            AuthViewSet.throttle_classes = throttle_classes
+            settings.PASSWORD_HASH_ITERATIONS = hash_iterations
+            RevokedTokens.flush()
+            user.delete()
+
+        self.stdout.write(
+            f"{options['threads']} threads x {options['cycles']} ciclos, "
+            f"hasher {user.password.split('$')[0]} ({user.password.split('$')[1]} iterações)"
+        )
+        total = 0
+        for operation in OPERATIONS:
+            timings = sorted(t for result in results for t in result['timings'][operation])
+            errors = sum(result['errors'][operation] for result in results)
+            if not timings:
+                continue
+            total += len(timings)
+            self.stdout.write(
+                f'{operation:<8} {len(timings):>6} req  média {statistics.mean(timings) * 1000:>7.1f}ms  '
+                f'p50 {statistics.median(timings) * 1000:>7.1f}ms  '
+                f'p95 {timings[int(len(timings) * 0.95) - 1] * 1000:>7.1f}ms  '
+                f'p99 {timings[int(len(timings) * 0.99) - 1] * 1000:>7.1f}ms  '
+                f'{errors} erros'
+            )
+        self.stdout.write(f'{total / elapsed:.1f} req/s ({total // len(OPERATIONS) / elapsed:.1f} ciclos/s) em {elapsed:.2f}s')
+        self.stdout.write(
+            self.style.SUCCESS('BRAVA Lite auth benchmark end successfuly!')
+        )
+
+    def _run(self, email, password, options):
+        """Uma thread: ciclos login -> refresh -> logout com tempos por operação"""
+        client = Client(HTTP_HOST=options['host'])
+        prefix = options['prefix'].rstrip('/')
+        timings = {operation: [] for operation in OPERATIONS}
+        errors = dict.fromkeys(OPERATIONS, 0)
+
+        def post(operation, data, **extra):
+            started = time.perf_counter()
+            response = client.post(
+                f'{prefix}/{operation}/', json.dumps(data), content_type='application/json', **extra
+            )
+            return response, time.perf_counter() - started
+
+        try:
+            for cycle in range(options['warmup'] + options['cycles']):
+                measured = cycle >= options['warmup']
+                response, elapsed = post('login', {'email': email, 'password': password})
+                if response.status_code != 200:
+                    errors['login'] += measured
+                    continue
+                tokens = response.json()
+
+                response, refreshed = post('refresh', {'refresh': tokens['refresh']})
+                if response.status_code == 200:
+                    tokens.update(response.json())
+                else:
+                    errors['refresh'] += measured
+
+                response, logged_out = post(
+                    'logout', {'refresh': tokens['refresh']}, HTTP_AUTHORIZATION=f"Bearer {tokens['access']}"
+                )
+                if response.status_code != 200:
+                    errors['logout'] += measured
+
+                if measured:
+                    timings['login'].append(elapsed)
+                    timings['refresh'].append(refreshed)
+                    timings['logout'].append(logged_out)
+        finally:
+            connections.close_all()
+        return {'timings': timings, 'errors': errors}
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# users/management/commands/prune_tokens.py
+import time
+from django.core.management.base import BaseCommand
+from users.tokens import RevokedTokens
+
+class Command(BaseCommand):
+    help = 'Remove expired revoked refresh tokens (USR_TOKEN_REVOGADO)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Registros removidos por DELETE')
+    
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        flushed = RevokedTokens.flush()
+        deleted = RevokedTokens.prune(batch_size=options['batch_size'])
+        
+        self.stdout.write(
+            f'{flushed} revogações pendentes gravadas, {deleted} tokens expirados removidos '
+            f'em {time.perf_counter() - started:.2f}s'
+        )
+        self.stdout.write(
+            self.style.SUCCESS('BRAVA Lite token pruning end successfuly!')
+        )
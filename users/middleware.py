@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# users/middleware.py
+from django.utils.deprecation import MiddlewareMixin
+from .sessions import UserSessionTracker
+
+class UserSessionMiddleware(MiddlewareMixin):
+    """Registra a atividade da sessão em USR_USUARIO_SESSAO (write-behind)"""
+    
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        user = getattr(request, 'user', None)
+        if session is not None and session.session_key and user is not None and user.is_authenticated:
+            UserSessionTracker.touch(
+                session.session_key,
+                user.pk,
+                request.META.get('REMOTE_ADDR'),
+                request.META.get('HTTP_USER_AGENT', ''),
+                session.get_expiry_date(),
+            )
+        return response
@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 import uuid
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from core.audit import AuditQuerySet
 from core.models import BaseAuditModel
 
+class UserManager(BaseUserManager.from_queryset(AuditQuerySet)):
+    """UserManager com a auditoria de BaseAuditModel"""
+
 class User(BaseAuditModel, AbstractUser):
     """Usuário customizado do sistema"""
     
@@ -115,6 +119,15 @@ class User(BaseAuditModel, AbstractUser):
         default='LIGHT',
         db_column='TEMA'
     )
+    Lojas = models.JSONField(
+        _('Lojas'),
+        default=list,
+        blank=True,
+        help_text=_('Slugs das lojas (TENANTS) que o usuário pode acessar; superusuários acessam todas'),
+        db_column='LOJAS'
+    )
+    
+    objects = UserManager()
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -133,24 +146,12 @@ class User(BaseAuditModel, AbstractUser):
     def __str__(self):
         return f"{self.first_name} {self.last_name}" or self.email
     
-    def save(self, *args, **kwargs):
-        # Lógica de auditoria customizada
-        from core.middleware import get_current_user
-        user = get_current_user()
-        username = user.username if user and user.is_authenticated else 'BRAVA'
-        
-        if not self.pk:  # Novo registro
-            self.UsuarioInclusao = username
-        self.UsuarioAlteracao = username
-        
-        super().save(*args, **kwargs)
-    
     def get_language(self):
         """Retorna idioma do usuário ou padrão"""
-        if self.IdIdioma and self.IdIdioma.IsAtivo:
-            return self.IdIdioma
-        from core.models import Language
-        return Language.objects.filter(IsPadrao=True).first()
+        # Registro em memória: sem consulta ao FK Idioma
+        from core.languages import LanguageRegistry
+        language = LanguageRegistry.get_by_id(self.Idioma_id) if self.Idioma_id else None
+        return language or LanguageRegistry.get_default()
     
     @property
     def NomeCompleto(self):
@@ -166,27 +167,8 @@ class User(BaseAuditModel, AbstractUser):
     
     def has_permission(self, permission):
         """Verifica se o usuário tem uma permissão específica"""
-        if self.is_superuser:
-            return True
-        
-        # Verificar permissões por papel
-        role_permissions = {
-            'ADMIN': ['*'],
-            'MANAGER': [
-                'view_dashboard', 'manage_products', 'manage_orders', 
-                'view_customers', 'view_reports'
-            ],
-            'SELLER': [
-                'view_dashboard', 'view_products', 'manage_orders', 
-                'view_customers'
-            ],
-            'OPERATOR': [
-                'view_dashboard', 'view_products', 'view_orders'
-            ]
-        }
-        
-        permissions = role_permissions.get(self.Papel, [])
-        return '*' in permissions or permission in permissions
+        from .permissions import PermissionResolver
+        return PermissionResolver.has_permission(self, permission)
 
 class UserPermission(BaseAuditModel):
     """Permissões customizadas por usuário"""
@@ -275,3 +257,54 @@ class UserSession(BaseAuditModel):
             models.Index(fields=['ChaveSessao'], name='IDX_USR_SES_CHAVE'),
             models.Index(fields=['Usuario', 'Ativo'], name='IDX_USR_SES_USU_AT'),
         ]
+
+class RevokedToken(BaseAuditModel):
+    """Refresh tokens revogados (logout ou rotação) até a expiração"""
+    TokenRevogadoId = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        db_column='ID_TOKEN_REVOGADO'
+    )
+    Usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name=_('Usuário'),
+        db_column='ID_USUARIO'
+    )
+    Jti = models.CharField(
+        _('Identificador do token'),
+        max_length=255,
+        unique=True,
+        db_column='JTI'
+    )
+    DataExpiracao = models.DateTimeField(
+        _('Expira em'),
+        db_column='DATA_EXPIRACAO'
+    )
+
+    class Meta:
+        db_table = 'USR_TOKEN_REVOGADO'
+        verbose_name = _('Token revogado')
+        verbose_name_plural = _('Tokens revogados')
+        indexes = [
+            models.Index(fields=['DataExpiracao'], name='IDX_USR_TOK_EXPIRA'),
+        ]
+
+class ClaimsUser(User):
+    """Usuário montado a partir das claims do token de acesso (ver users/tokens.py)
+
+    Os campos fora das claims ficam diferidos; o primeiro acesso a qualquer
+    um deles carrega todos de uma vez.
+    """
+    
+    class Meta:
+        proxy = True
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = list(deferred)
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# users/permissions.py
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.permissions import BasePermission
+from core.cache import bump_tags_on_commit, tag_versions, versioned_key
+
+PERMISSIONS_TAG = 'permissions'
+
+# Permissões por papel
+ROLE_PERMISSIONS = {
+    'ADMIN': frozenset(['*']),
+    'MANAGER': frozenset([
+        'view_dashboard', 'manage_products', 'manage_orders',
+        'view_customers', 'view_reports'
+    ]),
+    'SELLER': frozenset([
+        'view_dashboard', 'view_products', 'manage_orders',
+        'view_customers'
+    ]),
+    'OPERATOR': frozenset([
+        'view_dashboard', 'view_products', 'view_orders'
+    ]),
+}
+
+class PermissionResolver:
+    """Permissões efetivas do usuário: papel + UserPermission ativas e não expiradas
+
+    O conjunto compilado (frozenset) fica na memória do processo e no cache
+    compartilhado, validado pela versão da tag ``permissions`` (lida no máximo
+    a cada ``PERMISSION_VERSION_CHECK_INTERVAL`` segundos) e pela menor
+    DataExpiracao entre as permissões concedidas.
+    """
+
+    _local = {}
+    _lock = threading.Lock()
+    _version = None
+    _version_checked_at = 0.0
+
+    @staticmethod
+    def current_version():
+        now = time.monotonic()
+        interval = getattr(settings, 'PERMISSION_VERSION_CHECK_INTERVAL', 5)
+        if PermissionResolver._version is None or now - PermissionResolver._version_checked_at >= interval:
+            version = tag_versions([PERMISSIONS_TAG])[PERMISSIONS_TAG]
+            if version != PermissionResolver._version:
+                PermissionResolver._local = {}
+            PermissionResolver._version = version
+            PermissionResolver._version_checked_at = now
+        return PermissionResolver._version
+
+    @staticmethod
+    def invalidate(using=None):
+        """Invalida as permissões compiladas de todos os processos após o commit"""
+        bump_tags_on_commit(PERMISSIONS_TAG, using=using)
+        transaction.on_commit(PermissionResolver._reset, using=using)
+
+    @staticmethod
+    def _reset():
+        PermissionResolver._local = {}
+        PermissionResolver._version = None
+
+    @staticmethod
+    def compile(user):
+        """Lê as permissões individuais e devolve (frozenset, válido_até)"""
+        from .models import UserPermission
+
+        now = timezone.now()
+        codes, valid_until = set(ROLE_PERMISSIONS.get(user.Papel, ())), None
+        for code, expires in UserPermission.objects.filter(Usuario_id=user.pk, Ativo=True).values_list(
+            'CodigoPermissao', 'DataExpiracao'
+        ):
+            if expires is not None:
+                if expires <= now:
+                    continue
+                valid_until = expires if valid_until is None else min(valid_until, expires)
+            codes.add(code)
+        return frozenset(codes), valid_until
+
+    @staticmethod
+    def get_permissions(user):
+        """Conjunto de códigos de permissão do usuário"""
+        if not user or not user.is_authenticated:
+            return frozenset()
+
+        version = PermissionResolver.current_version()
+        local_key = (user.pk, user.Papel)
+        entry = PermissionResolver._local.get(local_key)
+        now = timezone.now()
+        if entry is not None and (entry[1] is None or entry[1] > now):
+            return entry[0]
+
+        # O papel faz parte da chave: mudar o Papel não exige invalidação
+        key = versioned_key('user_permissions', [PERMISSIONS_TAG], user.pk, user.Papel)
+        entry = cache.get(key)
+        if entry is None or (entry[1] is not None and entry[1] <= now):
+            entry = PermissionResolver.compile(user)
+            timeout = settings.CACHE_TTL['LONG']
+            if entry[1] is not None:
+                timeout = max(1, min(timeout, int((entry[1] - now).total_seconds())))
+            cache.set(key, entry, timeout)
+
+        with PermissionResolver._lock:
+            if PermissionResolver._version == version:
+                PermissionResolver._local = {**PermissionResolver._local, local_key: entry}
+        return entry[0]
+
+    @staticmethod
+    def has_permission(user, permission):
+        if user.is_superuser:
+            return True
+        permissions = PermissionResolver.get_permissions(user)
+        return '*' in permissions or permission in permissions
+
+class HasPermission(BasePermission):
+    """Exige a permissão da ação na view
+
+    A view define ``required_permission`` (todas as ações) ou
+    ``required_permissions`` ({ação ou método HTTP: código}).
+    """
+
+    def has_permission(self, request, view):
+        mapping = getattr(view, 'required_permissions', {})
+        permission = (
+            mapping.get(getattr(view, 'action', None))
+            or mapping.get(request.method)
+            or getattr(view, 'required_permission', None)
+        )
+        if permission is None:
+            return True
+        return bool(request.user and request.user.is_authenticated
+                    and PermissionResolver.has_permission(request.user, permission))
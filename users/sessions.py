@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# users/sessions.py
+"""
+Sessões no cache com gravação no banco apenas quando necessário
+
+Engine (SESSION_ENGINE = 'users.sessions') com a semântica do cached_db:
+o estado quente fica no cache e o DJANGO_SESSION só é atualizado quando
+os dados mudam ou a expiração avança mais que SESSION_DB_REFRESH_THRESHOLD
+segundos. Com SESSION_SAVE_EVERY_REQUEST isso evita um UPDATE por request.
+"""
+import atexit
+import hashlib
+import logging
+import os
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+logger = logging.getLogger('django.contrib.sessions')
+
+class SessionStore(CachedDBStore):
+    """cached_db que pula o UPDATE quando nada relevante mudou"""
+
+    cache_key_prefix = 'brava.sessions.'
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # (hash dos dados, expiração) da última versão gravada no banco
+        self._db_state = None
+
+    @staticmethod
+    def _hash(encoded):
+        return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+    def load(self):
+        try:
+            entry = self._cache.get(self.cache_key)
+        except Exception:
+            entry = None
+
+        if isinstance(entry, dict) and 'data' in entry:
+            self._db_state = entry['db']
+            return entry['data']
+
+        s = self._get_session_from_db()
+        if not s:
+            return {}
+        data = self.decode(s.session_data)
+        self._db_state = (self._hash(s.session_data), s.expire_date)
+        self._set_cache(data, self.get_expiry_age(expiry=s.expire_date))
+        return data
+
+    def _set_cache(self, data, timeout):
+        try:
+            self._cache.set(self.cache_key, {'data': data, 'db': self._db_state}, timeout)
+        except Exception:
+            logger.exception('Error saving to cache (%s)', self._cache)
+
+    def _needs_db_write(self, encoded, expire_date):
+        if self._db_state is None:
+            return True
+        db_hash, db_expire = self._db_state
+        threshold = timedelta(seconds=getattr(settings, 'SESSION_DB_REFRESH_THRESHOLD', 600))
+        return db_hash != self._hash(encoded) or expire_date - db_expire > threshold
+
+    def save(self, must_create=False):
+        if self.session_key is None or must_create:
+            return self.create() if self.session_key is None else self._save_to_db(must_create)
+
+        data = self._get_session(no_load=must_create)
+        encoded = self.encode(data)
+        expire_date = self.get_expiry_date()
+        if self._needs_db_write(encoded, expire_date):
+            self._save_to_db(must_create, encoded, expire_date)
+        else:
+            # Dados iguais e expiração próxima da gravada: apenas renova o cache
+            self._set_cache(data, self.get_expiry_age())
+
+    def _save_to_db(self, must_create, encoded=None, expire_date=None):
+        # DBStore.save grava o registro; o cache é atualizado em seguida
+        super(CachedDBStore, self).save(must_create)
+        data = self._get_session(no_load=must_create)
+        encoded = encoded if encoded is not None else self.encode(data)
+        self._db_state = (self._hash(encoded), expire_date or self.get_expiry_date())
+        self._set_cache(data, self.get_expiry_age())
+
+class UserSessionTracker:
+    """Write-behind de USR_USUARIO_SESSAO (último IP, user agent, expiração)
+
+    Os requests apenas registram o estado em memória; um flusher periódico
+    (USER_SESSION_FLUSH_INTERVAL segundos) grava tudo com um upsert em lote.
+    Se o lote falhar, as sessões são gravadas uma a uma e as que falharem
+    são descartadas (nada volta ao buffer).
+    """
+
+    _lock = threading.Lock()
+    _pending = {}
+    _recorded = {}
+    _timer = None
+    _pid = None
+
+    @staticmethod
+    def touch(session_key, user_id, ip, user_agent, expire_date):
+        """Registra a atividade da sessão (sem I/O)"""
+        ip = ip or '0.0.0.0'
+        user_agent = user_agent or ''
+        threshold = timedelta(seconds=getattr(settings, 'SESSION_DB_REFRESH_THRESHOLD', 600))
+        with UserSessionTracker._lock:
+            recorded = UserSessionTracker._recorded.get(session_key)
+            if recorded is not None and recorded[:3] == (user_id, ip, user_agent) \
+                    and expire_date - recorded[3] <= threshold:
+                return
+            UserSessionTracker._recorded[session_key] = (user_id, ip, user_agent, expire_date)
+            UserSessionTracker._pending[session_key] = (user_id, ip, user_agent, expire_date)
+            UserSessionTracker._start()
+
+    @staticmethod
+    def _start():
+        # Nos testes o flush é explícito: o timer gravaria depois que o banco de teste já foi removido
+        if getattr(settings, 'TESTING', False):
+            return
+        # Timer por processo (workers criados por fork não herdam a thread)
+        if UserSessionTracker._timer is not None and UserSessionTracker._pid == os.getpid():
+            return
+        UserSessionTracker._pid = os.getpid()
+        UserSessionTracker._timer = threading.Timer(
+            getattr(settings, 'USER_SESSION_FLUSH_INTERVAL', 30), UserSessionTracker._run
+        )
+        UserSessionTracker._timer.daemon = True
+        UserSessionTracker._timer.start()
+
+    @staticmethod
+    def _run():
+        with UserSessionTracker._lock:
+            UserSessionTracker._timer = None
+        try:
+            UserSessionTracker.flush()
+        finally:
+            from django.db import connections
+            connections.close_all()
+
+    @staticmethod
+    def flush():
+        """Grava as sessões pendentes; devolve a quantidade"""
+        from .models import UserSession
+
+        now = timezone.now()
+        with UserSessionTracker._lock:
+            pending, UserSessionTracker._pending = UserSessionTracker._pending, {}
+            # Sessões expiradas não voltam: libera a memória do processo
+            UserSessionTracker._recorded = {
+                session_key: recorded for session_key, recorded in UserSessionTracker._recorded.items()
+                if recorded[3] > now
+            }
+        if not pending:
+            return 0
+
+        rows = [
+            UserSession(
+                Usuario_id=user_id, ChaveSessao=session_key, EnderecoIp=ip,
+                UserAgent=user_agent, DataExpiracao=expire_date, Ativo=expire_date > now
+            )
+            for session_key, (user_id, ip, user_agent, expire_date) in pending.items()
+        ]
+        try:
+            with transaction.atomic():
+                UserSessionTracker._upsert(rows)
+            return len(rows)
+        except DatabaseError:
+            logger.exception('Erro ao gravar USR_USUARIO_SESSAO em lote; gravando sessão a sessão')
+
+        # Uma linha inválida (ex.: usuário removido) não pode travar o lote para sempre
+        written = 0
+        for row in rows:
+            try:
+                with transaction.atomic():
+                    UserSessionTracker._upsert([row])
+                written += 1
+            except DatabaseError:
+                logger.exception('Sessão %s descartada', row.ChaveSessao)
+                with UserSessionTracker._lock:
+                    # O próximo request da sessão registra o estado de novo
+                    UserSessionTracker._recorded.pop(row.ChaveSessao, None)
+        return written
+
+    @staticmethod
+    def _upsert(rows):
+        from .models import UserSession
+        UserSession.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['ChaveSessao'],
+            update_fields=['EnderecoIp', 'UserAgent', 'DataExpiracao', 'Ativo', 'DataAlteracao'],
+        )
+
+if not getattr(settings, 'TESTING', False):
+    atexit.register(UserSessionTracker.flush)
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# users/signals.py
+from django.db.models.signals import post_delete, post_save
+from core.audit import AUDIT_UPDATE_FIELDS
+from .models import ClaimsUser, User, UserPermission
+from .permissions import PermissionResolver
+from .tokens import UserTokenVersion
+
+def invalidate_permissions(sender, instance, using, **kwargs):
+    """Permissões individuais alteradas: recompila as permissões em todos os processos"""
+    PermissionResolver.invalidate(using=using)
+    UserTokenVersion.bump(instance.Usuario_id, using=using)
+
+def invalidate_token_claims(sender, instance, using, update_fields=None, **kwargs):
+    """Usuário alterado: tokens emitidos deixam de valer como fonte das claims"""
+    # update_last_login (login por sessão): os campos de auditoria vêm junto com o last_login
+    if update_fields is not None and set(update_fields) - set(AUDIT_UPDATE_FIELDS) <= {'last_login'}:
+        return
+    UserTokenVersion.bump(instance.pk, using=using)
+
+post_save.connect(invalidate_permissions, sender=UserPermission, dispatch_uid='permissions_userpermission_save')
+post_delete.connect(invalidate_permissions, sender=UserPermission, dispatch_uid='permissions_userpermission_delete')
+for model in (User, ClaimsUser):
+    post_save.connect(invalidate_token_claims, sender=model, dispatch_uid=f'token_claims_{model.__name__}_save')
@@ -1,4 +1,128 @@
 # -*- coding: utf-8 -*-
-from django.test import TestCase
+import uuid
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import update_last_login
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.request import Request
+from core.database.tenants import TenantManager
+from .hashers import BRAVAPBKDF2PasswordHasher
+from .models import User, UserSession
+from .sessions import UserSessionTracker
+from .tokens import ClaimsJWTAuthentication, UserTokens, UserTokenVersion
 
-# Create your tests here.
+TENANTS = {
+    'loja1': {'SCHEMA': 'LOJA1', 'DEDICATED': False},
+    'loja2': {'SCHEMA': 'LOJA2', 'DEDICATED': False},
+}
+
+@override_settings(TENANTS=TENANTS, TENANT_TRUSTED_PROXIES=['10.0.0.1'], TENANT_DEFAULT=None)
+@mock.patch.object(TenantManager, 'is_provisioned', return_value=True)
+class TenantAccessTests(TestCase):
+    """Usuário preso às lojas de User.Lojas; cabeçalho só via proxy confiável"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(
+            username='vendedor', email='vendedor@example.com', password='x', Lojas=['loja1']
+        )
+
+    def authenticate(self, tenant):
+        token = UserTokens.for_user(self.user).access_token
+        request = Request(self.factory.get('/api/v1/orders/', HTTP_AUTHORIZATION=f'Bearer {token}'))
+        context = TenantManager.activate(tenant)
+        try:
+            return ClaimsJWTAuthentication().authenticate(request)
+        finally:
+            TenantManager.deactivate(context)
+
+    def test_token_for_allowed_tenant(self, is_provisioned):
+        user, _ = self.authenticate('loja1')
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_token_for_other_tenant_is_forbidden(self, is_provisioned):
+        with self.assertRaises(PermissionDenied):
+            self.authenticate('loja2')
+
+    def test_superuser_accesses_every_tenant(self, is_provisioned):
+        self.user.is_superuser = True
+        self.user.save()
+        user, _ = self.authenticate('loja2')
+        self.assertTrue(user.is_superuser)
+
+    def test_header_only_from_trusted_proxy(self, is_provisioned):
+        request = self.factory.get('/', HTTP_HOST='loja1.example.com', HTTP_X_TENANT='loja2')
+        self.assertEqual(TenantManager.resolve(request), 'loja1')
+        request.META['REMOTE_ADDR'] = '10.0.0.1'
+        self.assertEqual(TenantManager.resolve(request), 'loja2')
+
+class UserSessionTrackerTests(TransactionTestCase):
+    """Write-behind de USR_USUARIO_SESSAO"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='sessao', email='sessao@example.com', password='x')
+        UserSessionTracker._pending, UserSessionTracker._recorded = {}, {}
+        self.addCleanup(setattr, UserSessionTracker, '_recorded', {})
+
+    def touch(self, session_key, user_id, expire_date):
+        UserSessionTracker.touch(session_key, user_id, '127.0.0.1', 'tests', expire_date)
+
+    def test_no_background_flush_in_tests(self):
+        self.touch('teste', self.user.pk, timezone.now() + timedelta(days=1))
+        self.assertIsNone(UserSessionTracker._timer)
+        self.assertIn('teste', UserSessionTracker._pending)
+        self.assertEqual(UserSessionTracker.flush(), 1)
+
+    def test_bad_row_is_dropped_and_the_rest_written(self):
+        expires = timezone.now() + timedelta(days=1)
+        self.touch('boa', self.user.pk, expires)
+        self.touch('orfa', uuid.uuid4(), expires)
+
+        self.assertEqual(UserSessionTracker.flush(), 1)
+        self.assertEqual(list(UserSession.objects.values_list('ChaveSessao', flat=True)), ['boa'])
+        self.assertEqual(UserSessionTracker._pending, {})
+        self.assertNotIn('orfa', UserSessionTracker._recorded)
+        self.assertEqual(UserSessionTracker.flush(), 0)
+
+    def test_flush_prunes_expired_sessions(self):
+        self.touch('expirada', self.user.pk, timezone.now() - timedelta(minutes=1))
+        self.touch('ativa', self.user.pk, timezone.now() + timedelta(days=1))
+        UserSessionTracker.flush()
+        self.assertEqual(list(UserSessionTracker._recorded), ['ativa'])
+
+class PasswordHasherTests(SimpleTestCase):
+    """Iterações do PBKDF2 nunca abaixo do padrão do Django"""
+
+    def test_iterations_are_clamped_to_django_default(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            self.assertEqual(BRAVAPBKDF2PasswordHasher().iterations, PBKDF2PasswordHasher.iterations)
+
+    def test_must_update_only_upgrades(self):
+        hasher = BRAVAPBKDF2PasswordHasher()
+        salt = hasher.salt()
+        stronger = hasher.encode('senha', salt, iterations=hasher.iterations + 1)
+        weaker = hasher.encode('senha', salt, iterations=hasher.iterations - 1)
+        self.assertFalse(hasher.must_update(stronger))
+        self.assertTrue(hasher.must_update(weaker))
+
+class TokenClaimsInvalidationTests(TestCase):
+    """Login por sessão (update_last_login) não invalida os JWTs do usuário"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='claims', email='claims@example.com', password='x')
+
+    def saved(self, save):
+        version = UserTokenVersion.get(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            save()
+        return UserTokenVersion.get(self.user.pk) != version
+
+    def test_last_login_keeps_token_version(self):
+        self.assertFalse(self.saved(lambda: update_last_login(None, self.user)))
+
+    def test_profile_change_bumps_token_version(self):
+        self.user.first_name = 'Novo'
+        self.assertTrue(self.saved(lambda: self.user.save(update_fields=['first_name'])))
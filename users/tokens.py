@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+# users/tokens.py
+"""
+Tokens JWT com as claims do usuário (autenticação sem carregar USR_USUARIO)
+
+O token de acesso leva Papel, Idioma, Tema e a versão do usuário. A versão
+fica no cache e é incrementada quando o User ou suas permissões mudam;
+tokens com versão diferente caem no carregamento normal pelo banco.
+
+Refresh tokens revogados (logout e rotação) ficam no cache até expirarem e
+em USR_TOKEN_REVOGADO, gravado em lote; a consulta usa um filtro de Bloom
+em memória e só vai ao banco nos falsos positivos.
+"""
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from core.database.tenants import TenantManager
+from .models import ClaimsUser
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VERSION_KEY = 'user_token_version:{}'
+REVOKED_TOKEN_KEY = 'revoked_token:{}'
+
+# Claim -> campo do User
+USER_CLAIMS = {
+    'username': 'username',
+    'email': 'email',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'papel': 'Papel',
+    'tema': 'Tema',
+    'lojas': 'Lojas',
+    'idioma': 'Idioma_id',
+    'is_staff': 'is_staff',
+    'is_superuser': 'is_superuser',
+    'is_active': 'is_active',
+}
+
+class UserTokenVersion:
+    """Versão das claims por usuário (cache compartilhado)"""
+
+    @staticmethod
+    def _key(user_id):
+        return TOKEN_VERSION_KEY.format(user_id)
+
+    @staticmethod
+    def get(user_id):
+        key = UserTokenVersion._key(user_id)
+        version = cache.get(key)
+        if version is None:
+            # Valor inicial único: se a chave for descartada, tokens antigos deixam de valer como claims
+            version = int(time.time() * 1000)
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+        return version
+
+    @staticmethod
+    def bump(user_id, using=None):
+        """Invalida as claims dos tokens já emitidos após o commit"""
+        def bump():
+            key = UserTokenVersion._key(user_id)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, int(time.time() * 1000), None)
+        transaction.on_commit(bump, using=using)
+
+class BloomFilter:
+    """Conjunto probabilístico: sem falsos negativos, ~1% de falsos positivos na capacidade"""
+
+    HASHES = 7
+
+    def __init__(self, capacity):
+        self.size = max(8192, capacity * 10)
+        self.bits = bytearray(self.size // 8 + 1)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=self.HASHES * 4).digest()
+        for i in range(0, self.HASHES * 4, 4):
+            yield int.from_bytes(digest[i:i + 4], 'little') % self.size
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+class RevokedTokens:
+    """Lista de refresh tokens revogados
+
+    ``revoke`` grava a marca no cache (vale na hora para todos os processos)
+    e agenda a gravação em USR_TOKEN_REVOGADO (TOKEN_BLACKLIST_FLUSH_INTERVAL
+    segundos). ``is_revoked`` confere o cache e o filtro de Bloom do processo,
+    recarregado do banco a cada TOKEN_BLACKLIST_REFRESH_INTERVAL segundos.
+    """
+
+    _lock = threading.Lock()
+    _bloom = None
+    _loaded_at = 0.0
+    _pending = {}
+    _timer = None
+    _pid = None
+
+    @staticmethod
+    def _key(jti):
+        return REVOKED_TOKEN_KEY.format(jti)
+
+    @staticmethod
+    def _get_bloom():
+        interval = getattr(settings, 'TOKEN_BLACKLIST_REFRESH_INTERVAL', 300)
+        now = time.monotonic()
+        if RevokedTokens._bloom is not None and now - RevokedTokens._loaded_at < interval:
+            return RevokedTokens._bloom
+
+        from .models import RevokedToken
+        with RevokedTokens._lock:
+            if RevokedTokens._bloom is not None and now - RevokedTokens._loaded_at < interval:
+                return RevokedTokens._bloom
+            jtis = list(
+                RevokedToken.objects.filter(DataExpiracao__gt=timezone.now()).values_list('Jti', flat=True)
+            )
+            jtis.extend(RevokedTokens._pending)
+            bloom = BloomFilter(len(jtis))
+            for jti in jtis:
+                bloom.add(jti)
+            RevokedTokens._bloom = bloom
+            RevokedTokens._loaded_at = now
+        return bloom
+
+    @staticmethod
+    def is_revoked(jti):
+        if cache.get(RevokedTokens._key(jti)):
+            return True
+        if jti not in RevokedTokens._get_bloom():
+            return False
+        if jti in RevokedTokens._pending:
+            return True
+
+        # Possível falso positivo do filtro (ou marca descartada do cache)
+        from .models import RevokedToken
+        expires = RevokedToken.objects.filter(Jti=jti).values_list('DataExpiracao', flat=True).first()
+        if expires is None or expires <= timezone.now():
+            return False
+        cache.set(RevokedTokens._key(jti), 1, max(1, int((expires - timezone.now()).total_seconds())))
+        return True
+
+    @staticmethod
+    def revoke(token):
+        """Revoga o refresh token (sem I/O no banco)"""
+        jti = token[api_settings.JTI_CLAIM]
+        expires = datetime_from_epoch(token['exp'])
+        timeout = int((expires - timezone.now()).total_seconds())
+        if timeout <= 0:
+            return
+        cache.set(RevokedTokens._key(jti), 1, timeout)
+        with RevokedTokens._lock:
+            RevokedTokens._pending[jti] = (token.get(api_settings.USER_ID_CLAIM), expires)
+            if RevokedTokens._bloom is not None:
+                RevokedTokens._bloom.add(jti)
+            RevokedTokens._start()
+
+    @staticmethod
+    def _start():
+        # Timer por processo (workers criados por fork não herdam a thread)
+        if RevokedTokens._timer is not None and RevokedTokens._pid == os.getpid():
+            return
+        RevokedTokens._pid = os.getpid()
+        RevokedTokens._timer = threading.Timer(
+            getattr(settings, 'TOKEN_BLACKLIST_FLUSH_INTERVAL', 5), RevokedTokens._run
+        )
+        RevokedTokens._timer.daemon = True
+        RevokedTokens._timer.start()
+
+    @staticmethod
+    def _run():
+        with RevokedTokens._lock:
+            RevokedTokens._timer = None
+        try:
+            RevokedTokens.flush()
+        finally:
+            from django.db import connections
+            connections.close_all()
+
+    @staticmethod
+    def flush():
+        """Grava as revogações pendentes; devolve a quantidade"""
+        from .models import RevokedToken
+
+        with RevokedTokens._lock:
+            pending = dict(RevokedTokens._pending)
+        if not pending:
+            return 0
+
+        rows = [
+            RevokedToken(Usuario_id=user_id, Jti=jti, DataExpiracao=expires)
+            for jti, (user_id, expires) in pending.items()
+        ]
+        try:
+            RevokedToken.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+        except DatabaseError:
+            logger.exception('Erro ao gravar USR_TOKEN_REVOGADO')
+            return 0
+        with RevokedTokens._lock:
+            # Pendentes só saem do buffer depois de gravados (is_revoked confere o buffer)
+            for jti in pending:
+                RevokedTokens._pending.pop(jti, None)
+        return len(rows)
+
+    @staticmethod
+    def prune(batch_size=1000):
+        """Remove os tokens revogados já expirados, em lotes; devolve a quantidade"""
+        from .models import RevokedToken
+
+        now, deleted = timezone.now(), 0
+        while True:
+            pks = list(
+                RevokedToken.objects.filter(DataExpiracao__lte=now).values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            deleted += RevokedToken.objects.filter(pk__in=pks).delete()[0]
+        return deleted
+
+atexit.register(RevokedTokens.flush)
+
+class UserRefreshToken(RefreshToken):
+    """RefreshToken que recusa tokens revogados"""
+
+    def verify(self):
+        super().verify()
+        if RevokedTokens.is_revoked(self[api_settings.JTI_CLAIM]):
+            raise TokenError('Token revogado')
+
+class UserTokens:
+    """Emissão de tokens com as claims do usuário"""
+
+    @staticmethod
+    def claims(user):
+        claims = {}
+        for claim, field in USER_CLAIMS.items():
+            value = getattr(user, field)
+            claims[claim] = str(value) if field == 'Idioma_id' and value is not None else value
+        claims['ver'] = UserTokenVersion.get(user.pk)
+        return claims
+
+    @staticmethod
+    def for_user(user):
+        """RefreshToken (e o access derivado) com as claims do usuário"""
+        refresh = UserRefreshToken.for_user(user)
+        for claim, value in UserTokens.claims(user).items():
+            refresh[claim] = value
+        return refresh
+
+    @staticmethod
+    def access_for_refresh(refresh):
+        """Access token do refresh, com claims atualizadas se o usuário mudou"""
+        access = refresh.access_token
+        user_id = refresh.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None and refresh.get('ver') != UserTokenVersion.get(user_id):
+            user = ClaimsUser.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+            if user is not None:
+                for claim, value in UserTokens.claims(user).items():
+                    access[claim] = value
+        return access
+
+    @staticmethod
+    def refresh(refresh):
+        """Resposta do refresh: access e, com ROTATE_REFRESH_TOKENS, um novo refresh"""
+        access = UserTokens.access_for_refresh(refresh)
+        data = {'access': str(access)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                RevokedTokens.revoke(refresh)
+            for claim in (*USER_CLAIMS, 'ver'):
+                if claim in access:
+                    refresh[claim] = access[claim]
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication que monta o usuário a partir das claims (JWT_STATELESS_USER)
+
+    O usuário precisa ter acesso à loja do request (claim ``lojas``): sem
+    isso a resposta é 403.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None and not TenantManager.has_access(result[0], TenantManager.get_current()):
+            raise PermissionDenied('Usuário sem acesso a esta loja')
+        return result
+
+    def get_user(self, validated_token):
+        if not getattr(settings, 'JWT_STATELESS_USER', False) or 'ver' not in validated_token:
+            return super().get_user(validated_token)
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or validated_token['ver'] != UserTokenVersion.get(user_id):
+            return super().get_user(validated_token)
+
+        claims = {api_settings.USER_ID_FIELD: user_id}
+        claims.update({field: validated_token.get(claim) for claim, field in USER_CLAIMS.items()})
+        # from_db espera os valores na ordem dos campos do model
+        field_names, values = [], []
+        for field in ClaimsUser._meta.concrete_fields:
+            if field.attname in claims:
+                value = claims[field.attname]
+                field_names.append(field.attname)
+                values.append(field.to_python(value) if value is not None else None)
+        user = ClaimsUser.from_db('default', field_names, values)
+        if not user.is_active:
+            return super().get_user(validated_token)
+        return user
@@ -4,9 +4,11 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
 from django.contrib.auth import login
 from .models import User
+from .tokens import RevokedTokens, UserRefreshToken, UserTokens
+from api.dynamic import DynamicFieldsViewMixin
 from api.serializers import UserSerializer, LoginSerializer
 
 class AuthViewSet(viewsets.GenericViewSet):
@@ -17,7 +19,7 @@ class AuthViewSet(viewsets.GenericViewSet):
         serializer = LoginSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
+            refresh = UserTokens.for_user(user)
             
             return Response({
                 'access': str(refresh.access_token),
@@ -29,12 +31,10 @@ class AuthViewSet(viewsets.GenericViewSet):
     @action(detail=False, methods=['post'])
     def refresh(self, request):
         try:
-            refresh = RefreshToken(request.data.get('refresh'))
-            return Response({
-                'access': str(refresh.access_token),
-            })
-        except Exception:
+            refresh = UserRefreshToken(request.data.get('refresh'))
+        except TokenError:
             return Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
+        return Response(UserTokens.refresh(refresh))
     
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def user(self, request):
@@ -43,14 +43,14 @@ class AuthViewSet(viewsets.GenericViewSet):
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
     def logout(self, request):
         try:
-            refresh_token = request.data.get('refresh')
-            token = RefreshToken(refresh_token)
-            token.blacklist()
-            return Response({'message': 'Logout realizado com sucesso'})
-        except Exception:
+            token = UserRefreshToken(request.data.get('refresh'))
+        except TokenError:
             return Response({'error': 'Erro no logout'}, status=status.HTTP_400_BAD_REQUEST)
+        # Revogação vale na hora pelo cache; o banco é gravado em lote
+        RevokedTokens.revoke(token)
+        return Response({'message': 'Logout realizado com sucesso'})
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(DynamicFieldsViewMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
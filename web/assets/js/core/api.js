@@ -6,9 +6,16 @@ class BRAVAAPIClient {
             'Content-Type': 'application/json',
             'X-Requested-With': 'XMLHttpRequest'
         };
+        // Respostas GET com ETag (url -> { etag, data }): 304 reaproveita o corpo
+        this.etagCache = new Map();
+        this.etagCacheSize = 100;
     }
     
     setAuthToken(token) {
+        if (!token) {
+            // Logout: o ETag já inclui o usuário, mas não guarda dados de outra sessão
+            this.etagCache.clear();
+        }
         this.token = token;
     }
     
@@ -36,9 +43,31 @@ class BRAVAAPIClient {
             }
         }
         
+        const url = `${this.baseURL}${endpoint}`;
+        const cached = config.method === 'GET' ? this.etagCache.get(url) : null;
+        if (cached) {
+            config.headers['If-None-Match'] = cached.etag;
+        }
+        
         try {
-            const response = await fetch(`${this.baseURL}${endpoint}`, config);
-            return await this.handleResponse(response);
+            const response = await fetch(url, config);
+            if (response.status === 304 && cached) {
+                // Mais recente no fim do Map
+                this.etagCache.delete(url);
+                this.etagCache.set(url, cached);
+                return cached.data;
+            }
+            const result = await this.handleResponse(response);
+            
+            const etag = response.headers.get('ETag');
+            if (config.method === 'GET' && etag && !(result instanceof Response)) {
+                this.etagCache.delete(url);
+                this.etagCache.set(url, { etag, data: result });
+                if (this.etagCache.size > this.etagCacheSize) {
+                    this.etagCache.delete(this.etagCache.keys().next().value);
+                }
+            }
+            return result;
         } catch (error) {
             console.error('API Request Error:', error);
             throw error;
@@ -71,17 +71,37 @@ class InternationalizationManager {
     
     async loadTranslations(languageCode = null) {
         const lang = languageCode || this.currentLanguage;
+        const storageKey = `ecommerce_translations_${lang}`;
+        const cached = JSON.parse(localStorage.getItem(storageKey) || 'null');
         
         try {
-            const response = await API.get(`/core/translations/by_language/?lang=${lang}`);
-            this.translations = response;
-            
-            // Aplicar traduções na interface
-            this.applyTranslations();
+            // Catálogo plano com ETag: 304 reaproveita a cópia do localStorage
+            const headers = API.getHeaders();
+            if (cached?.etag) {
+                headers['If-None-Match'] = cached.etag;
+            }
+            const response = await fetch(`${API.baseURL}/core/translations/catalog/?lang=${encodeURIComponent(lang)}`, { headers });
             
+            if (response.status === 304 && cached) {
+                this.translations = cached.catalog;
+            } else if (response.ok) {
+                this.translations = await response.json();
+                localStorage.setItem(storageKey, JSON.stringify({
+                    etag: response.headers.get('ETag'),
+                    catalog: this.translations
+                }));
+            } else {
+                throw new Error(`HTTP ${response.status}`);
+            }
         } catch (error) {
             console.error('Error to load language:', error);
+            if (cached) {
+                this.translations = cached.catalog;
+            }
         }
+        
+        // Aplicar traduções na interface
+        this.applyTranslations();
     }
     
     isLanguageAvailable(code) {
@@ -90,18 +110,8 @@ class InternationalizationManager {
     
     // Função principal de tradução
     t(key, params = {}, defaultValue = null) {
-        const keys = key.split('.');
-        let value = this.translations;
-        
-        // Navegar pela estrutura aninhada
-        for (const k of keys) {
-            if (value && typeof value === 'object' && value.hasOwnProperty(k)) {
-                value = value[k];
-            } else {
-                value = defaultValue || key;
-                break;
-            }
-        }
+        // Catálogo plano: a chave completa é a própria chave do dicionário
+        let value = this.translations.hasOwnProperty(key) ? this.translations[key] : (defaultValue || key);
         
         // Substituir parâmetros se fornecidos
         if (typeof value === 'string' && Object.keys(params).length > 0) {